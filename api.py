@@ -1,15 +1,26 @@
 
+import os
 import asyncio
 import json
 import logging
-from typing import AsyncGenerator
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncGenerator, Optional
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sse_starlette.sse import EventSourceResponse
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
+from pydantic import BaseModel
 
 # Import existing modules
+from events import Event
 from pipeline import NewsAnalysisPipeline
+from run_coalescer import RunCoalescer
+from run_ledger import RunLedger
+from jobs import JobManager
+from prewarm import TopicPrewarmer
+from http_clients import create_newsapi_client, create_groq_client
+from rate_limiter import get_rate_limiter
+from metrics import get_metrics
 from dotenv import load_dotenv
 
 # Configure logging
@@ -19,7 +30,58 @@ logger = logging.getLogger(__name__)
 # Load env vars
 load_dotenv()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create pooled NewsAPI and Groq clients once and share them across requests,
+    so each request reuses warm keep-alive connections instead of new TLS handshakes.
+    """
+    newsapi_client = create_newsapi_client()
+    llm_client = create_groq_client(os.getenv('GROQ_API_KEY'), get_rate_limiter())
+    # The pipeline keeps no per-run state, so one instance serves every request
+    app.state.pipeline = NewsAnalysisPipeline(newsapi_client=newsapi_client, llm_client=llm_client)
+    # Archive of every validated article, queried by /api/articles
+    app.state.articles = app.state.pipeline.store
+    # Dropped clients resume from Last-Event-ID within the grace period instead of re-running the LLMs
+    buffer_size = int(os.getenv('RUN_REPLAY_BUFFER', '2000'))
+    # With several workers (WEB_CONCURRENCY), identical runs are also shared across processes
+    app.state.runs = RunCoalescer(
+        buffer_size=buffer_size,
+        resume_grace=float(os.getenv('RUN_RESUME_GRACE', '15')),
+        retention=float(os.getenv('RUN_RETENTION', '60')),
+        ledger=RunLedger.from_env()
+    )
+    # Background jobs run on their own bounded worker pool, independent of any connection
+    app.state.jobs = JobManager.from_env(app.state.pipeline, buffer_size=buffer_size)
+    app.state.jobs.start()
+    # Optional (PREWARM_INTERVAL): keep every UI topic's latest results hot
+    app.state.prewarmer = TopicPrewarmer.from_env(app.state.pipeline, runs=app.state.runs)
+    if app.state.prewarmer is not None:
+        app.state.prewarmer.start()
+    try:
+        yield
+    finally:
+        if app.state.prewarmer is not None:
+            await app.state.prewarmer.close()
+        await app.state.jobs.close()
+        if app.state.jobs.store is not None:
+            app.state.jobs.store.close()
+        if app.state.articles is not None:
+            app.state.articles.close()
+        if app.state.runs.ledger is not None:
+            app.state.runs.ledger.close()
+        await newsapi_client.aclose()
+        await llm_client.close()
+
+app = FastAPI(lifespan=lifespan)
+
+def to_sse(event: Event) -> ServerSentEvent:
+    """The transport edge: an event's payload is serialized here, once however many clients receive it."""
+    return ServerSentEvent(data=event.data, event=event.event, id=event.id)
+
+class JobRequest(BaseModel):
+    topic: str = "Indian Politics"
+    count: int = 12
 
 # Configure CORS
 origins = ["*"]
@@ -36,24 +98,117 @@ app.add_middleware(
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/api/metrics")
+async def metrics():
+    """Latency histograms, token usage and error counters in Prometheus text format."""
+    registry = get_metrics()
+    return Response(content=registry.render(), media_type=registry.CONTENT_TYPE)
+
 @app.get("/api/analyze")
-async def analyze_news(request: Request, topic: str = "Indian Politics", count: int = 12):
+async def analyze_news(request: Request, topic: str = "Indian Politics", count: int = 12,
+                       topics: Optional[str] = None):
     """
     Streams analysis progress and results using Server-Sent Events (SSE).
+
+    `topics` (comma separated) analyzes several topics in one run instead:
+    articles are fetched concurrently, analyzed once however many topics list
+    them, and each `article` event carries the topics it belongs to.
+
+    With pre-warming enabled, a fresh snapshot of the topic is served at once;
+    otherwise concurrent requests for the same (topic, count) share one
+    pipeline run. Each finished article is sent as its own `article` event.
+    Events carry ids, so a reconnecting EventSource (which sends Last-Event-ID)
+    resumes the same run instead of starting a new one.
     """
-    async def event_generator() -> AsyncGenerator[dict, None]:
-        pipeline = NewsAnalysisPipeline()
-        
-        async for event in pipeline.run(topic=topic, count=count):
-            if await request.is_disconnected():
-                logger.info("Client disconnected during analysis")
-                break
-                
-            # Filter out 'full_result' as frontend might not need it
-            if event['event'] == 'full_result':
-                continue
-                
-            yield event
+    topic_list = [name.strip() for name in (topics or '').split(',') if name.strip()]
+    if len(topic_list) == 1:
+        topic, topic_list = topic_list[0], []
+
+    prewarmer = request.app.state.prewarmer
+    if prewarmer is not None and not topic_list:
+        snapshot = prewarmer.snapshot(topic, count)
+        get_metrics().record_cache_lookup('snapshot', snapshot is not None)
+        if snapshot is not None:
+            return EventSourceResponse(map(to_sse, snapshot.replay(request.headers.get('last-event-id'))))
+
+    async def event_generator() -> AsyncGenerator[ServerSentEvent, None]:
+        pipeline = request.app.state.pipeline
+        in_flight = get_metrics().requests_in_flight.labels('/api/analyze')
+        if topic_list:
+            key, start = (tuple(topic_list), count), lambda: pipeline.run(topics=topic_list, count=count)
+        else:
+            key, start = (topic, count), lambda: pipeline.run(topic=topic, count=count)
+        shared = request.app.state.runs.subscribe(key, start, last_event_id=request.headers.get('last-event-id'))
+
+        # aclosing() releases our subscription as soon as we stop reading; the
+        # shared run (and its in-flight LLM tasks) is cancelled with the last one
+        with in_flight.track():
+            async with aclosing(shared) as events:
+                async for event in events:
+                    if await request.is_disconnected():
+                        logger.info("Client disconnected during analysis")
+                        break
+                    yield to_sse(event)
+
+    return EventSourceResponse(event_generator())
+
+@app.get("/api/articles")
+async def list_articles(request: Request, topic: Optional[str] = None, source: Optional[str] = None,
+                        sentiment: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+                        q: Optional[str] = None, limit: int = Query(50, ge=1, le=200), offset: int = Query(0, ge=0)):
+    """
+    Previously analyzed articles from the local archive, newest first.
+
+    Filters on topic, source, sentiment and publishedAt range (`since` /
+    `until`, ISO 8601), with `q` searching titles and gists. Served entirely
+    from SQLite: no NewsAPI or LLM calls.
+    """
+    store = request.app.state.articles
+    if store is None:
+        raise HTTPException(status_code=503, detail="Article store is disabled")
+    total, articles = store.query(topic=topic, source=source, sentiment=sentiment, since=since, until=until,
+                                  text=q, limit=limit, offset=offset)
+    return {"total": total, "limit": limit, "offset": offset, "articles": articles}
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(request: Request, job_request: JobRequest):
+    """
+    Queue a pipeline run in the background and return its job record.
+
+    The run continues whether or not anyone is listening; poll
+    /api/jobs/{id} or stream /api/jobs/{id}/events for progress.
+    """
+    job = request.app.state.jobs.submit(job_request.topic, job_request.count)
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(request: Request, job_id: str):
+    """Status of a job, with its result once completed."""
+    job = request.app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: str):
+    """
+    Streams a job's events using Server-Sent Events (SSE).
+
+    Disconnecting does not cancel the job; reconnecting with Last-Event-ID
+    resumes after the last event received.
+    """
+    jobs = request.app.state.jobs
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_generator() -> AsyncGenerator[ServerSentEvent, None]:
+        async with aclosing(jobs.events(job, request.headers.get('last-event-id'))) as events:
+            async for event in events:
+                if await request.is_disconnected():
+                    logger.info(f"Client disconnected from job {job_id}")
+                    break
+                yield to_sse(event)
 
     return EventSourceResponse(event_generator())
 
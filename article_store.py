@@ -0,0 +1,211 @@
+"""
+Persistent store of analyzed articles.
+Every article a pipeline run validates is kept in SQLite with its analysis and
+validation, indexed for filtering and searchable through an FTS5 index on
+title and gist, so history can be queried without NewsAPI or LLM traffic.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.path.join('cache', 'articles.sqlite3')
+
+# Columns a query can filter on by equality
+FILTERS = ('source', 'sentiment')
+
+
+def is_degraded(result: Dict[str, Any]) -> bool:
+    """Whether a result carries a placeholder analysis or validation left by a failed LLM call."""
+    return 'error' in result['analysis'] or 'error' in result['validation']
+
+
+def fts_query(text: str) -> str:
+    """Quote every word of free-text input so FTS5 treats it as terms rather than query syntax."""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class ArticleStore:
+    """
+    SQLite table of articles keyed by URL, with one index per filter and an
+    external-content FTS5 table kept in sync by triggers.
+
+    An article keeps every topic it was archived under in `article_topics`;
+    `articles.topic` is only the first of them.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        has_topics = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_topics'"
+        ).fetchone() is not None
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT,
+                source TEXT,
+                published_at TEXT,
+                sentiment TEXT,
+                tone TEXT,
+                gist TEXT,
+                is_valid INTEGER,
+                validated_by TEXT,
+                analysis TEXT NOT NULL,
+                validation TEXT NOT NULL,
+                stored_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS articles_published ON articles (published_at);
+            CREATE TABLE IF NOT EXISTS article_topics (
+                url TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                PRIMARY KEY (url, topic)
+            );
+            CREATE INDEX IF NOT EXISTS article_topics_topic ON article_topics (topic, url);
+            CREATE INDEX IF NOT EXISTS articles_source ON articles (source, published_at);
+            CREATE INDEX IF NOT EXISTS articles_sentiment ON articles (sentiment, published_at);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, gist, content='articles', content_rowid='rowid'
+            );
+            CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, gist) VALUES (new.rowid, new.title, new.gist);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, gist)
+                VALUES ('delete', old.rowid, old.title, old.gist);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, gist)
+                VALUES ('delete', old.rowid, old.title, old.gist);
+                INSERT INTO articles_fts (rowid, title, gist) VALUES (new.rowid, new.title, new.gist);
+            END;
+        ''')
+        if not has_topics:
+            # Archives from before topics were kept as a set had one topic per article
+            self.conn.execute('INSERT OR IGNORE INTO article_topics (url, topic) SELECT url, topic FROM articles')
+
+    def save(self, topic: str, results: List[Dict[str, Any]]) -> int:
+        """
+        Upsert validated results ({'article', 'analysis', 'validation'} dicts),
+        adding each article's `topics` (or `topic` if it has none) to the topics
+        it is already archived under. Articles without a URL are skipped, and so
+        are degraded results, which would otherwise replace a good archived
+        analysis. Returns how many were stored.
+        """
+        now = time.time()
+        rows, tags = [], []
+        for result in results:
+            article, analysis, validation = result['article'], result['analysis'], result['validation']
+            if not article.get('url') or is_degraded(result):
+                continue
+            rows.append((
+                article['url'], topic, article.get('title', ''), article.get('description'),
+                article.get('source'), article.get('publishedAt'),
+                str(analysis.get('sentiment', 'neutral')).lower(), analysis.get('tone'), analysis.get('gist'),
+                int(bool(validation.get('is_valid', False))), validation.get('validated_by'),
+                json.dumps(analysis, ensure_ascii=False), json.dumps(validation, ensure_ascii=False), now
+            ))
+            tags.extend((article['url'], article_topic) for article_topic in article.get('topics') or [topic])
+
+        with self.conn:
+            self.conn.execute('BEGIN')
+            self.conn.executemany('''
+                INSERT INTO articles (url, topic, title, description, source, published_at, sentiment, tone, gist,
+                                      is_valid, validated_by, analysis, validation, stored_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    title = excluded.title, description = excluded.description,
+                    source = excluded.source, published_at = excluded.published_at,
+                    sentiment = excluded.sentiment, tone = excluded.tone, gist = excluded.gist,
+                    is_valid = excluded.is_valid, validated_by = excluded.validated_by,
+                    analysis = excluded.analysis, validation = excluded.validation, stored_at = excluded.stored_at
+            ''', rows)
+            self.conn.executemany('INSERT OR IGNORE INTO article_topics (url, topic) VALUES (?, ?)', tags)
+        return len(rows)
+
+    def query(self, topic: Optional[str] = None, source: Optional[str] = None, sentiment: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None, text: Optional[str] = None,
+              limit: int = 50, offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Stored articles matching every given filter, newest first.
+
+        `topic` matches any topic an article was archived under; `since` /
+        `until` bound publishedAt (ISO 8601, inclusive); `text` is a full-text
+        search over title and gist. Returns (total matches, one page).
+        """
+        clauses, params = [], []
+        if topic:
+            clauses.append('EXISTS (SELECT 1 FROM article_topics t WHERE t.url = a.url AND t.topic = ?)')
+            params.append(topic)
+        for column, value in zip(FILTERS, (source, sentiment.lower() if sentiment else None)):
+            if value:
+                clauses.append(f'a.{column} = ?')
+                params.append(value)
+        if since:
+            clauses.append('a.published_at >= ?')
+            params.append(since)
+        if until:
+            clauses.append('a.published_at <= ?')
+            params.append(until)
+
+        tables = 'articles a'
+        if text and text.strip():
+            tables += ' JOIN articles_fts f ON f.rowid = a.rowid'
+            clauses.append('articles_fts MATCH ?')
+            params.append(fts_query(text))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        total = self.conn.execute(f'SELECT COUNT(*) FROM {tables} {where}', params).fetchone()[0]
+        rows = self.conn.execute(f'''
+            SELECT a.url, a.topic, a.title, a.description, a.source, a.published_at, a.sentiment, a.tone, a.gist,
+                   a.is_valid, a.validation,
+                   (SELECT json_group_array(t.topic) FROM article_topics t WHERE t.url = a.url)
+            FROM {tables} {where}
+            ORDER BY a.published_at DESC, a.url
+            LIMIT ? OFFSET ?
+        ''', params + [limit, offset]).fetchall()
+        return total, [self._format(row) for row in rows]
+
+    @staticmethod
+    def _format(row: Tuple) -> Dict[str, Any]:
+        url, topic, title, description, source, published_at, sentiment, tone, gist, is_valid, validation, topics = row
+        validation = json.loads(validation)
+        return {
+            "url": url,
+            "topic": topic,
+            "topics": sorted(json.loads(topics)),
+            "title": title,
+            "description": description,
+            "source": source,
+            "publishedAt": published_at,
+            "sentiment": sentiment,
+            "tone": tone,
+            "summary": gist,
+            "validationPassed": bool(is_valid),
+            "validationNote": validation.get('notes', '')
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @classmethod
+    def from_env(cls) -> Optional['ArticleStore']:
+        """Build the store from ARTICLE_STORE_PATH; an empty value disables it."""
+        path = os.getenv('ARTICLE_STORE_PATH', DEFAULT_STORE_PATH)
+        if not path:
+            return None
+        return cls(path)
@@ -0,0 +1,105 @@
+"""
+Benchmark for the concurrent analysis stage of NewsAnalysisPipeline.
+
+Runs the pipeline against in-process stand-ins with simulated LLM latencies
+and compares, at several concurrency levels, the wall-clock of the analysis
+stage, the time to the first validated article and the total run time.
+
+Usage:
+    python -m benchmarks.bench_concurrency [--articles 12] [--latency 1.0] [--validation-latency 0.3]
+"""
+
+import os
+import argparse
+import asyncio
+import random
+import time
+
+from pipeline import NewsAnalysisPipeline
+
+
+class FakeFetcher:
+    def __init__(self, num_articles):
+        self.articles = [
+            {
+                'title': f'Article {i}',
+                'description': f'Description {i}',
+                'content': f'Content {i}',
+                'url': f'https://example.com/{i}',
+                'publishedAt': '2024-01-15T10:00:00Z',
+                'source': 'Bench'
+            }
+            for i in range(num_articles)
+        ]
+
+    async def fetch_news(self, topic="Indian Politics", num_articles=12):
+        return self.articles[:num_articles]
+
+
+class FakeAnalyzer:
+    def __init__(self, latency, jitter):
+        self.latency = latency
+        self.jitter = jitter
+
+    async def analyze_article(self, article):
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        return {'gist': article['title'], 'sentiment': 'neutral', 'tone': 'analytical'}
+
+
+class FakeValidator:
+    def __init__(self, latency, jitter):
+        self.latency = latency
+        self.jitter = jitter
+
+    async def validate_analysis(self, article, analysis):
+        await asyncio.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        return {'is_valid': True, 'notes': 'ok'}
+
+
+async def measure(num_articles, concurrency, args):
+    """Returns (analysis stage, first validated article, total) wall-clock in seconds."""
+    pipeline = NewsAnalysisPipeline(
+        fetcher=FakeFetcher(num_articles),
+        analyzer=FakeAnalyzer(args.latency, args.jitter),
+        validator=FakeValidator(args.validation_latency, args.jitter / 3),
+        max_concurrency=concurrency,
+        validation_concurrency=concurrency
+    )
+    start = time.perf_counter()
+    analysis_done = first_validated = None
+    async for event in pipeline.run(count=num_articles):
+        if event.event != 'log':
+            continue
+        message = event.payload['message']
+        if 'stage 1 complete' in message:
+            analysis_done = time.perf_counter() - start
+        elif message.startswith('Validated article') and first_validated is None:
+            first_validated = time.perf_counter() - start
+    return analysis_done, first_validated, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=12)
+    parser.add_argument('--latency', type=float, default=1.0, help="mean simulated 70B latency (s)")
+    parser.add_argument('--validation-latency', type=float, default=0.3, help="mean simulated 8B latency (s)")
+    parser.add_argument('--jitter', type=float, default=0.3)
+    parser.add_argument('--levels', default="1,2,4,8")
+    args = parser.parse_args()
+
+    random.seed(0)
+    os.environ['ARTICLE_STORE_PATH'] = ''  # Keep synthetic articles out of the real archive
+    levels = [int(level) for level in args.levels.split(',')]
+
+    print(f"{args.articles} articles, simulated latency analyze {args.latency}s / "
+          f"validate {args.validation_latency}s (± jitter)")
+    print(f"  {'concurrency':<12}{'analysis':>10}{'first valid':>13}{'total':>9}{'speedup':>9}")
+    baseline = None
+    for concurrency in levels:
+        analysis, first_validated, total = await measure(args.articles, concurrency, args)
+        baseline = baseline or total
+        print(f"  {concurrency:<12}{analysis:>9.2f}s{first_validated:>12.2f}s{total:>8.2f}s{baseline / total:>8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
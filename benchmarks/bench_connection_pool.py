@@ -0,0 +1,120 @@
+"""
+Benchmark for shared vs. per-request HTTP clients under concurrent load.
+
+Starts a local keep-alive HTTP server that charges a fixed setup cost per new
+connection (standing in for the TCP + TLS handshake to NewsAPI/Groq) and a
+service time per request. Each simulated /api/analyze request makes one
+NewsAPI call followed by several LLM calls, either through fresh clients per
+request (the old behaviour) or through one pooled client shared by all.
+The "fresh" numbers also include building each client (httpx loads an SSL
+context per client), which the old code paid on every request as well.
+
+Usage:
+    python -m benchmarks.bench_connection_pool [--requests 50] [--concurrency 10]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from http_clients import pool_limits
+
+
+async def serve(handshake: float, service_time: float):
+    """Start the stand-in upstream; returns (server, base_url, stats)."""
+    stats = {'connections': 0}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        stats['connections'] += 1
+        await asyncio.sleep(handshake)
+        body = b'{"status": "ok"}'
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                length = 0
+                for line in head.split(b'\r\n'):
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':')[1])
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(service_time)
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    return server, f'http://127.0.0.1:{port}', stats
+
+
+async def simulated_request(base_url: str, llm_calls: int, shared: httpx.AsyncClient = None) -> float:
+    """One /api/analyze request: a NewsAPI fetch then `llm_calls` completions."""
+    start = time.perf_counter()
+    if shared is not None:
+        await shared.get(f'{base_url}/v2/everything')
+        for _ in range(llm_calls):
+            await shared.post(f'{base_url}/chat/completions', json={'model': 'bench'})
+    else:
+        # Old behaviour: a client per fetch call and a separate one per LLM wrapper
+        async with httpx.AsyncClient() as client:
+            await client.get(f'{base_url}/v2/everything')
+        async with httpx.AsyncClient() as analyzer, httpx.AsyncClient() as validator:
+            for i in range(llm_calls):
+                client = analyzer if i % 2 == 0 else validator
+                await client.post(f'{base_url}/chat/completions', json={'model': 'bench'})
+    return time.perf_counter() - start
+
+
+async def run_load(base_url: str, args, shared: httpx.AsyncClient = None):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        async with semaphore:
+            return await simulated_request(base_url, args.llm_calls, shared)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(args.requests)))
+    return sorted(latencies), time.perf_counter() - start
+
+
+def report(label, latencies, elapsed, connections):
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"  {label:<10}{statistics.mean(latencies) * 1000:>9.1f}ms{statistics.median(latencies) * 1000:>9.1f}ms"
+          f"{p95 * 1000:>9.1f}ms{len(latencies) / elapsed:>9.1f}/s{connections:>8}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--llm-calls', type=int, default=4, help="LLM calls per simulated request")
+    parser.add_argument('--handshake', type=float, default=0.05, help="per-connection setup cost (s)")
+    parser.add_argument('--service-time', type=float, default=0.01, help="per-request server time (s)")
+    args = parser.parse_args()
+
+    server, base_url, stats = await serve(args.handshake, args.service_time)
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.llm_calls} LLM calls each, "
+          f"{args.handshake * 1000:.0f}ms handshake")
+    print(f"  {'clients':<10}{'mean':>11}{'p50':>11}{'p95':>11}{'rate':>11}{'conns':>8}")
+
+    async with server:
+        latencies, elapsed = await run_load(base_url, args)
+        report('fresh', latencies, elapsed, stats['connections'])
+
+        stats['connections'] = 0
+        async with httpx.AsyncClient(limits=pool_limits()) as shared:
+            latencies, elapsed = await run_load(base_url, args, shared)
+        report('shared', latencies, elapsed, stats['connections'])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Serialization cost of pipeline events per run.
+
+Runs NewsAnalysisPipeline with instant in-process stand-ins (so only the
+pipeline's own work is measured) and consumes its events the way the API
+does, reading each event's `data` once at the transport edge. Compares:
+
+  eager      every event serialized, full_result included, stdlib json
+             (what the pipeline did before events were typed and lazy)
+  lazy       API path: no full_result, stdlib json
+  lazy+orjson  API path with orjson (if installed)
+
+and reports CPU time per run, the share spent serializing, bytes serialized
+and the peak memory traced while the run is in flight.
+
+Usage:
+    python -m benchmarks.bench_events [--articles 100] [--runs 20]
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import tracemalloc
+from typing import Dict
+
+import events
+from benchmarks.fake_upstream import FakeUpstream
+from pipeline import NewsAnalysisPipeline
+
+
+class InstantFetcher:
+    def __init__(self, num_articles: int):
+        self.articles = [FakeUpstream.article(number, 'Bench') for number in range(num_articles)]
+
+    async def fetch_news(self, topic="Indian Politics", num_articles=12):
+        return self.articles[:num_articles]
+
+
+class InstantAnalyzer:
+    async def analyze_article(self, article):
+        return {'gist': article['description'], 'sentiment': 'neutral', 'tone': 'analytical'}
+
+
+class InstantValidator:
+    async def validate_analysis(self, article, analysis):
+        return {'is_valid': True, 'notes': 'The analysis matches the article.'}
+
+
+class SerializationTimer:
+    """Wraps events.dumps to add up the time and bytes it produces."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.bytes = 0
+        self._dumps = events.dumps
+
+    def __call__(self, value) -> str:
+        start = time.process_time()
+        text = self._dumps(value)
+        self.seconds += time.process_time() - start
+        self.bytes += len(text)
+        return text
+
+
+async def consume(pipeline: NewsAnalysisPipeline, count: int, full_result: bool) -> None:
+    async for event in pipeline.run(count=count, full_result=full_result):
+        event.data  # What the SSE edge does with each event
+
+
+async def measure(num_articles: int, runs: int, full_result: bool, use_orjson: bool) -> Dict[str, float]:
+    saved = events.orjson, events.dumps
+    if not use_orjson:
+        events.orjson = None
+    timer = SerializationTimer()
+    events.dumps = timer
+    try:
+        pipeline = NewsAnalysisPipeline(fetcher=InstantFetcher(num_articles), analyzer=InstantAnalyzer(),
+                                        validator=InstantValidator(), max_concurrency=16, validation_concurrency=16)
+        await consume(pipeline, num_articles, full_result)  # Warm-up
+
+        timer.seconds = timer.bytes = 0
+        cpu = time.process_time()
+        for _ in range(runs):
+            await consume(pipeline, num_articles, full_result)
+        cpu = time.process_time() - cpu
+
+        tracemalloc.start()
+        await consume(pipeline, num_articles, full_result)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        events.orjson, events.dumps = saved
+
+    return {
+        'cpu_ms': cpu / runs * 1000,
+        'serialize_ms': timer.seconds / runs * 1000,
+        'kib': timer.bytes / runs / 1024,
+        'peak_kib': peak / 1024,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=100)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+    os.environ['ARTICLE_STORE_PATH'] = ''  # Keep the archive out of the measurement
+
+    modes = [('eager', True, False), ('lazy', False, False)]
+    if events.orjson is not None:
+        modes.append(('lazy+orjson', False, True))
+
+    print(f"{args.articles} articles per run, {args.runs} runs")
+    print(f"  {'mode':<12}{'cpu/run':>10}{'serialize':>11}{'JSON':>10}{'peak mem':>11}")
+    for name, full_result, use_orjson in modes:
+        result = await measure(args.articles, args.runs, full_result, use_orjson)
+        print(f"  {name:<12}{result['cpu_ms']:>8.1f}ms{result['serialize_ms']:>9.2f}ms"
+              f"{result['kib']:>7.0f}KiB{result['peak_kib']:>8.0f}KiB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,185 @@
+"""
+End-to-end pipeline benchmark against the local NewsAPI / Groq stand-ins.
+
+Runs the real NewsAnalysisPipeline (NewsFetcher, LLMAnalyzer, LLMValidator,
+pooled HTTP clients, rate limiter) against benchmarks.fake_upstream for several
+article counts and concurrency levels, and reports throughput, p50/p99
+per-article latency (analysis request start to validation result) and time to
+the first validated article (and to the first streamed gist with
+ANALYSIS_STREAMING=1). Caching is off and the local pre-check disabled
+so every article goes through both LLM stages; other settings such as
+ANALYSIS_BATCH_SIZE / VALIDATION_BATCH_SIZE or ANALYSIS_HEDGE_MODEL are taken
+from the environment; --slow-rate gives completions a heavy latency tail.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--sizes 12,100,1000] [--levels 4,16,64]
+                                        [--analysis-latency 0.1] [--validation-latency 0.04] [--rate-429 0.0]
+                                        [--slow-rate 0.0] [--slow-factor 10]
+"""
+
+import io
+import os
+import time
+import contextlib
+import asyncio
+import argparse
+from typing import Dict, List, Tuple
+
+from benchmarks.fake_upstream import FakeUpstream
+from http_clients import create_newsapi_client, create_groq_client
+from pipeline import NewsAnalysisPipeline
+from rate_limiter import get_rate_limiter
+
+# Budgets far above anything the stand-in can serve, so the limiter never throttles
+BENCH_RATE_LIMITS = "llama-3.3-70b-versatile=1000000:1000000000,llama-3.1-8b-instant=1000000:1000000000"
+
+
+def configure_environment(upstream: FakeUpstream) -> None:
+    """Point the pipeline at the stand-in; must run before any component is built."""
+    os.environ.update({
+        'NEWSAPI_KEY': 'bench',
+        'GROQ_API_KEY': 'bench',
+        'NEWSAPI_BASE_URL': upstream.newsapi_base_url,
+        'GROQ_BASE_URL': upstream.groq_base_url,
+        'LLM_CACHE_PATH': '',
+        'LLM_RATE_LIMITS': BENCH_RATE_LIMITS,
+        'NEWSAPI_RPM': '1000000',
+        # Keep synthetic articles out of the real archive and high-water marks
+        'ARTICLE_STORE_PATH': '',
+        'WATERMARK_PATH': '',
+    })
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def format_seconds(value) -> str:
+    return f"{value:>8.2f}s" if value is not None else f"{'-':>9}"
+
+
+def instrument(pipeline) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    Wrap the pipeline's LLM components to record, per article URL, when its
+    analysis was requested and when its validation came back.
+    """
+    started: Dict[str, float] = {}
+    finished: Dict[str, float] = {}
+    analyzer, validator = pipeline.analyzer, pipeline.validator
+    analyze_article, analyze_batch = analyzer.analyze_article, analyzer.analyze_batch
+    validate_analysis, validate_batch = validator.validate_analysis, validator.validate_batch
+
+    async def timed_analyze_article(article, **kwargs):
+        started.setdefault(article['url'], time.perf_counter())
+        return await analyze_article(article, **kwargs)
+
+    async def timed_analyze_batch(articles):
+        now = time.perf_counter()
+        for article in articles:
+            started.setdefault(article['url'], now)
+        return await analyze_batch(articles)
+
+    async def timed_validate_analysis(article, analysis):
+        result = await validate_analysis(article, analysis)
+        finished[article['url']] = time.perf_counter()
+        return result
+
+    async def timed_validate_batch(items):
+        results = await validate_batch(items)
+        now = time.perf_counter()
+        for article, _ in items:
+            finished[article['url']] = now
+        return results
+
+    analyzer.analyze_article, analyzer.analyze_batch = timed_analyze_article, timed_analyze_batch
+    validator.validate_analysis, validator.validate_batch = timed_validate_analysis, timed_validate_batch
+    return started, finished
+
+
+async def measure(num_articles: int, concurrency: int, newsapi_client, llm_client) -> Dict[str, float]:
+    pipeline = NewsAnalysisPipeline(
+        max_concurrency=concurrency,
+        validation_concurrency=concurrency,
+        newsapi_client=newsapi_client,
+        llm_client=llm_client,
+        precheck_confidence=2.0
+    )
+    started, finished = instrument(pipeline)
+
+    start = time.perf_counter()
+    first_validated = first_partial = None
+    # NewsFetcher still prints progress for the CLI; keep it out of the table
+    with contextlib.redirect_stdout(io.StringIO()):
+        async for event in pipeline.run(count=num_articles):
+            if event.event == 'log' and first_validated is None and \
+                    event.payload['message'].startswith('Validated article'):
+                first_validated = time.perf_counter() - start
+            elif event.event == 'partial' and first_partial is None:
+                first_partial = time.perf_counter() - start
+            elif event.event == 'error':
+                raise RuntimeError(event.payload['message'])
+    total = time.perf_counter() - start
+
+    latencies = [finished[url] - started[url] for url in finished if url in started]
+    return {
+        'articles': len(latencies),
+        'throughput': len(latencies) / total,
+        'p50': percentile(latencies, 0.50),
+        'p99': percentile(latencies, 0.99),
+        'ttfe': first_validated,
+        'first_gist': first_partial,
+        'total': total,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default="12,100,1000")
+    parser.add_argument('--levels', default="4,16,64")
+    parser.add_argument('--newsapi-latency', type=float, default=0.05)
+    parser.add_argument('--analysis-latency', type=float, default=0.1, help="mean stand-in 70B latency (s)")
+    parser.add_argument('--validation-latency', type=float, default=0.04, help="mean stand-in 8B latency (s)")
+    parser.add_argument('--jitter', type=float, default=0.3)
+    parser.add_argument('--rate-429', type=float, default=0.0, help="share of completions answered with 429")
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="share of completions slowed by --slow-factor")
+    parser.add_argument('--slow-factor', type=float, default=10.0)
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(
+        newsapi_latency=args.newsapi_latency,
+        model_latency={'llama-3.3-70b-versatile': args.analysis_latency,
+                       'llama-3.1-8b-instant': args.validation_latency},
+        jitter=args.jitter,
+        rate_429=args.rate_429,
+        slow_rate=args.slow_rate,
+        slow_factor=args.slow_factor,
+        seed=0
+    )
+
+    async with upstream:
+        configure_environment(upstream)
+        newsapi_client = create_newsapi_client()
+        llm_client = create_groq_client(os.environ['GROQ_API_KEY'], get_rate_limiter())
+
+        print(f"Stand-in latency: NewsAPI {args.newsapi_latency}s, analyze {args.analysis_latency}s, "
+              f"validate {args.validation_latency}s (±{args.jitter:.0%}), 429 rate {args.rate_429:.1%}")
+        print(f"  {'articles':>8}{'conc':>6}{'total':>9}{'art/s':>9}{'p50':>9}{'p99':>9}{'ttfe':>9}{'gist':>9}")
+        try:
+            for size in (int(value) for value in args.sizes.split(',')):
+                for concurrency in (int(value) for value in args.levels.split(',')):
+                    result = await measure(size, concurrency, newsapi_client, llm_client)
+                    print(f"  {size:>8}{concurrency:>6}{result['total']:>8.2f}s{result['throughput']:>9.1f}"
+                          f"{result['p50']:>8.2f}s{result['p99']:>8.2f}s{result['ttfe']:>8.2f}s"
+                          f"{format_seconds(result['first_gist'])}")
+        finally:
+            await newsapi_client.aclose()
+            await llm_client.close()
+
+        stats = upstream.stats
+        print(f"Upstream: {stats['completions']} completions, {stats['rate_limited']} answered 429, "
+              f"{stats['prompt_tokens'] + stats['completion_tokens']} tokens, {stats['connections']} connections")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
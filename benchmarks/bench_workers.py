@@ -0,0 +1,161 @@
+"""
+Multi-worker load test of the API against the local NewsAPI / Groq stand-ins.
+
+For each worker count, starts `uvicorn api:app --workers N` (with
+WEB_CONCURRENCY=N, so the rate budget and run ledger are shared through
+SQLite files in a temporary directory), fires concurrent /api/analyze
+streams for distinct topics and reports requests and articles per second
+and the p50/p99 request latency. LLM caching is off so every request does
+the full analysis work; the stand-in latencies are short so the server
+processes, not the upstreams, are the bottleneck. Throughput only scales
+up to the number of CPU cores available.
+
+Usage:
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--requests 64] [--concurrency 32] [--count 12]
+                                       [--llm-latency 0.02]
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.fake_upstream import FakeUpstream
+from benchmarks.bench_pipeline import BENCH_RATE_LIMITS, percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, port: int, upstream: FakeUpstream, directory: str) -> subprocess.Popen:
+    env = dict(os.environ, **{
+        'NEWSAPI_KEY': 'bench',
+        'GROQ_API_KEY': 'bench',
+        'NEWSAPI_BASE_URL': upstream.newsapi_base_url,
+        'GROQ_BASE_URL': upstream.groq_base_url,
+        'LLM_RATE_LIMITS': BENCH_RATE_LIMITS,
+        'NEWSAPI_RPM': '1000000',
+        'LLM_CACHE_PATH': '',
+        'LOCAL_PRECHECK_CONFIDENCE': '2.0',
+        'PREWARM_INTERVAL': '0',
+        'WEB_CONCURRENCY': str(workers),
+        'RATE_LIMIT_PATH': os.path.join(directory, 'rate_limits.sqlite3'),
+        'RUN_LEDGER_PATH': os.path.join(directory, 'runs.sqlite3'),
+        'JOBS_DB_PATH': os.path.join(directory, 'jobs.sqlite3'),
+        'ARTICLE_STORE_PATH': os.path.join(directory, 'articles.sqlite3'),
+        'WATERMARK_PATH': os.path.join(directory, 'watermarks.sqlite3'),
+    })
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            if (await client.get('/api/health')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become healthy in time")
+
+
+async def analyze(client: httpx.AsyncClient, topic: str, count: int) -> Dict[str, float]:
+    """Read one /api/analyze stream to the end; returns its duration and article count."""
+    start = time.perf_counter()
+    articles = 0
+    async with client.stream('GET', '/api/analyze', params={'topic': topic, 'count': count}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith('event:'):
+                event = line.split(':', 1)[1].strip()
+                if event == 'article':
+                    articles += 1
+                elif event == 'error':
+                    raise RuntimeError(f"Run for {topic!r} failed")
+    return {'seconds': time.perf_counter() - start, 'articles': articles}
+
+
+async def measure(workers: int, upstream: FakeUpstream, requests: int, concurrency: int,
+                  count: int) -> Dict[str, float]:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(workers, port, upstream, directory)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        try:
+            async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits,
+                                         timeout=httpx.Timeout(300.0)) as client:
+                await wait_until_healthy(client, server)
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def one(number: int) -> Dict[str, float]:
+                    async with semaphore:
+                        # Distinct topics: identical requests would be coalesced into one run
+                        return await analyze(client, f'load {workers}-{number}', count)
+
+                start = time.perf_counter()
+                results: List[Dict[str, float]] = await asyncio.gather(*(one(n) for n in range(requests)))
+                total = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    latencies = [result['seconds'] for result in results]
+    articles = sum(result['articles'] for result in results)
+    return {
+        'total': total,
+        'requests_per_second': requests / total,
+        'articles_per_second': articles / total,
+        'p50': percentile(latencies, 0.50),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default="1,2,4")
+    parser.add_argument('--requests', type=int, default=64, help="analysis streams per worker count")
+    parser.add_argument('--concurrency', type=int, default=32, help="streams open at once")
+    parser.add_argument('--count', type=int, default=12, help="articles per stream")
+    parser.add_argument('--newsapi-latency', type=float, default=0.01)
+    parser.add_argument('--llm-latency', type=float, default=0.02, help="stand-in latency of every model (s)")
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(newsapi_latency=args.newsapi_latency, model_latency={},
+                            llm_latency=args.llm_latency, jitter=0.2, seed=0)
+    async with upstream:
+        print(f"{args.requests} streams of {args.count} articles, {args.concurrency} at once; "
+              f"{os.cpu_count()} CPU(s)")
+        print(f"  {'workers':>7}{'total':>9}{'req/s':>9}{'art/s':>9}{'p50':>9}{'p99':>9}")
+        baseline = None
+        for workers in (int(value) for value in args.workers.split(',')):
+            result = await measure(workers, upstream, args.requests, args.concurrency, args.count)
+            baseline = baseline or result['articles_per_second']
+            print(f"  {workers:>7}{result['total']:>8.2f}s{result['requests_per_second']:>9.1f}"
+                  f"{result['articles_per_second']:>9.1f}{result['p50']:>8.2f}s{result['p99']:>8.2f}s"
+                  f"  x{result['articles_per_second'] / baseline:.2f}")
+
+        stats = upstream.stats
+        print(f"Upstream: {stats['completions']} completions, {stats['newsapi']} NewsAPI requests")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+Offline evaluation of the tier-0 local sentiment pre-check.
+
+Scores the articles in a saved validated_results.json with the lexicon and
+compares the local labels against LLM#1's sentiment and LLM#2's verdict. For
+each confidence threshold it reports how many LLM validations would be
+skipped and how often those skips agree with the LLMs.
+
+Usage:
+    python -m benchmarks.eval_local_precheck [--results output/validated_results.json]
+"""
+
+import argparse
+import json
+
+from sentiment_precheck import LocalPrecheck
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--results', default='output/validated_results.json')
+    parser.add_argument('--thresholds', default="0.5,0.6,0.7,0.8,0.9")
+    args = parser.parse_args()
+
+    with open(args.results, encoding='utf-8') as f:
+        results = json.load(f)
+
+    precheck = LocalPrecheck()
+    scores = precheck.score_articles([r['article'] for r in results])
+    llm_labels = [str(r['analysis'].get('sentiment', '')).lower() for r in results]
+    llm_valid = [bool(r.get('validation', {}).get('is_valid')) for r in results]
+
+    agree = sum(label == llm for (label, _), llm in zip(scores, llm_labels))
+    print(f"{len(results)} articles from {args.results}")
+    print(f"Lexicon label agrees with LLM#1 sentiment on {agree}/{len(results)} ({agree / len(results):.0%})")
+    print()
+    print(f"  {'threshold':<11}{'skipped':>9}{'skip rate':>11}{'LLM#2 valid':>13}")
+    for threshold in (float(t) for t in args.thresholds.split(',')):
+        precheck.min_confidence = threshold
+        skipped = [i for i, r in enumerate(results) if precheck.confirm(scores[i], r['analysis'])]
+        valid = sum(llm_valid[i] for i in skipped)
+        valid_rate = f"{valid}/{len(skipped)}" if skipped else "-"
+        print(f"  {threshold:<11}{len(skipped):>9}{len(skipped) / len(results):>10.0%}{valid_rate:>13}")
+
+    print()
+    print("Per article (local label, confidence, LLM#1 sentiment):")
+    for r, (label, confidence), llm in zip(results, scores, llm_labels):
+        marker = '=' if label == llm else '!'
+        print(f"  {marker} {label:<9}{confidence:5.2f}  {llm:<9}{r['article']['title'][:60]}")
+
+
+if __name__ == "__main__":
+    main()
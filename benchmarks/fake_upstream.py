@@ -0,0 +1,322 @@
+"""
+Local stand-in for NewsAPI and the Groq (OpenAI-compatible) API.
+
+Serves GET /v2/everything with synthetic articles and POST .../chat/completions
+with well-formed analysis or validation JSON (single or batched, matching the
+prompts of LLMAnalyzer / LLMValidator, optionally streamed), including a
+`usage` block. Latency,
+jitter and injected 429s are tunable per upstream so pipeline changes can be
+benchmarked offline.
+
+Usage (standalone):
+    python -m benchmarks.fake_upstream --port 8001 --llm-latency 0.3 --rate-429 0.02
+    NEWSAPI_BASE_URL=http://127.0.0.1:8001/v2 GROQ_BASE_URL=http://127.0.0.1:8001 python api.py
+"""
+
+import re
+import json
+import random
+import asyncio
+import argparse
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Default per-model service time in seconds
+MODEL_LATENCY = {
+    'llama-3.3-70b-versatile': 1.0,
+    'llama-3.1-8b-instant': 0.4,
+}
+
+_WORDS = (
+    "minister parliament council budget report court election policy committee market company "
+    "index rupee export import railway airport monsoon harvest startup software platform network "
+    "satellite mission summit treaty border delegation agency survey census district village city "
+    "state province reform bill session statement inquiry tender contract factory plant grid "
+    "battery vehicle highway port bank loan bond fund investor revenue quarter forecast audit "
+    "hospital clinic school campus research study data model chip cloud service regulator panel"
+).split()
+# Streamed completions: share of the latency before the first chunk, and characters per chunk
+FIRST_TOKEN_SHARE = 0.3
+STREAM_CHUNK_CHARS = 12
+
+_SENTIMENTS = ('positive', 'negative', 'neutral')
+_ITEM = re.compile(r'^\[(\d+)\]', re.MULTILINE)
+
+
+class FakeUpstream:
+    """
+    Asyncio HTTP/1.1 server with keep-alive imitating both upstream APIs.
+
+    Latencies are drawn as `latency * (1 + uniform(-jitter, jitter))`. A share
+    `rate_429` of completion requests (and `newsapi_rate_429` of NewsAPI
+    requests) is answered with 429 and a `Retry-After` of `retry_after` seconds.
+    A share `slow_rate` of completions takes `slow_factor` times as long, a
+    heavy tail for hedging to cut.
+    """
+
+    def __init__(self, newsapi_latency: float = 0.05, model_latency: Optional[Dict[str, float]] = None,
+                 llm_latency: float = 0.5, jitter: float = 0.2, rate_429: float = 0.0,
+                 newsapi_rate_429: float = 0.0, retry_after: float = 0.1, seed: Optional[int] = None,
+                 total_results: int = 10000, slow_rate: float = 0.0, slow_factor: float = 10.0):
+        self.newsapi_latency = newsapi_latency
+        # Articles the stand-in claims to have for any query; pages past it come back empty
+        self.total_results = total_results
+        self.model_latency = MODEL_LATENCY if model_latency is None else model_latency
+        # Service time for models missing from `model_latency`
+        self.llm_latency = llm_latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.newsapi_rate_429 = newsapi_rate_429
+        self.retry_after = retry_after
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.random = random.Random(seed)
+        self.stats = {'connections': 0, 'newsapi': 0, 'completions': 0, 'rate_limited': 0,
+                      'prompt_tokens': 0, 'completion_tokens': 0}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.base_url = ''
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> 'FakeUpstream':
+        self._server = await asyncio.start_server(self._handle, host, port)
+        bound_port = self._server.sockets[0].getsockname()[1]
+        self.base_url = f'http://{host}:{bound_port}'
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> 'FakeUpstream':
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    @property
+    def newsapi_base_url(self) -> str:
+        return f'{self.base_url}/v2'
+
+    @property
+    def groq_base_url(self) -> str:
+        return self.base_url
+
+    # --- HTTP plumbing ---
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats['connections'] += 1
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')
+                method, target, _ = request_line.split(' ', 2)
+                headers = {}
+                for line in header_lines:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', '0'))
+                body = await reader.readexactly(length) if length else b''
+
+                status, extra_headers, payload = await self._route(method, target, body)
+                response_headers = {'Content-Type': 'application/json', **extra_headers}
+                status_line = f'HTTP/1.1 {status} {"OK" if status == 200 else "Error"}'
+
+                if isinstance(payload, (dict, list)):
+                    data = json.dumps(payload).encode('utf-8')
+                    response_headers['Content-Length'] = str(len(data))
+                    writer.write(self._head(status_line, response_headers) + data)
+                    await writer.drain()
+                    continue
+
+                # Streamed body: chunked transfer encoding, one chunk per piece
+                response_headers['Transfer-Encoding'] = 'chunked'
+                writer.write(self._head(status_line, response_headers))
+                async for piece in payload:
+                    writer.write(f'{len(piece):x}\r\n'.encode('latin-1') + piece + b'\r\n')
+                    await writer.drain()
+                writer.write(b'0\r\n\r\n')
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.LimitOverrunError):
+            pass
+        except asyncio.CancelledError:
+            # Shutdown with a request still in progress (e.g. a cancelled hedge); ending quietly
+            # keeps asyncio's stream callback from logging the cancellation as an error
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _head(status_line: str, headers: Dict[str, str]) -> bytes:
+        lines = [status_line] + [f'{name}: {value}' for name, value in headers.items()]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[int, Dict[str, str], Any]:
+        url = urlsplit(target)
+        if method == 'GET' and url.path.endswith('/everything'):
+            return await self._everything(parse_qs(url.query))
+        if method == 'POST' and url.path.endswith('/chat/completions'):
+            return await self._completion(json.loads(body or b'{}'))
+        return 404, {}, {'error': {'message': f'No route for {method} {url.path}'}}
+
+    async def _sleep(self, latency: float) -> None:
+        await asyncio.sleep(max(0.0, latency * (1 + self.random.uniform(-self.jitter, self.jitter))))
+
+    def _rate_limited(self, share: float) -> Optional[Tuple[int, Dict[str, str], Any]]:
+        if share <= 0 or self.random.random() >= share:
+            return None
+        self.stats['rate_limited'] += 1
+        return 429, {'Retry-After': f'{self.retry_after:g}'}, {'error': {'message': 'Rate limit reached'}}
+
+    # --- NewsAPI ---
+
+    async def _everything(self, query: Dict[str, List[str]]) -> Tuple[int, Dict[str, str], Any]:
+        self.stats['newsapi'] += 1
+        await self._sleep(self.newsapi_latency)
+        limited = self._rate_limited(self.newsapi_rate_429)
+        if limited:
+            return limited
+
+        page_size = int(query.get('pageSize', ['20'])[0])
+        page = int(query.get('page', ['1'])[0])
+        topic = query.get('q', [''])[0]
+        first = (page - 1) * page_size
+        articles = [self.article(number, topic) for number in range(first, min(first + page_size, self.total_results))]
+        return 200, {}, {'status': 'ok', 'totalResults': self.total_results, 'articles': articles}
+
+    @staticmethod
+    def article(number: int, topic: str = '') -> Dict[str, Any]:
+        """A deterministic synthetic article; different numbers give texts far apart in SimHash."""
+        words = random.Random(number).choices(_WORDS, k=60)
+        return {
+            'source': {'id': None, 'name': 'Fake Wire'},
+            'title': f"{' '.join(words[:9]).capitalize()} ({number})",
+            'description': ' '.join(words[9:30]).capitalize() + '.',
+            'content': ' '.join(words[30:]).capitalize() + f'. Topic: {topic}',
+            'url': f'https://fake.example/{number}',
+            'publishedAt': '2024-01-15T10:00:00Z',
+        }
+
+    # --- Chat completions ---
+
+    async def _completion(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, str], Any]:
+        self.stats['completions'] += 1
+        model = request.get('model', '')
+        prompt = ''.join(message.get('content', '') for message in request.get('messages', []))
+        latency = self.model_latency.get(model, self.llm_latency)
+        if self.slow_rate and self.random.random() < self.slow_rate:
+            latency *= self.slow_factor
+        stream = bool(request.get('stream'))
+
+        # A streamed answer starts after the time to first token and trickles in for the rest
+        await self._sleep(latency * FIRST_TOKEN_SHARE if stream else latency)
+        limited = self._rate_limited(self.rate_429)
+        if limited:
+            return limited
+
+        content = json.dumps(self.answer(prompt))
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        self.stats['prompt_tokens'] += prompt_tokens
+        self.stats['completion_tokens'] += completion_tokens
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+        completion_id = f"chatcmpl-fake-{self.stats['completions']}"
+
+        if stream:
+            include_usage = bool((request.get('stream_options') or {}).get('include_usage'))
+            return 200, {'Content-Type': 'text/event-stream'}, self._stream(
+                completion_id, model, content, usage if include_usage else None, latency * (1 - FIRST_TOKEN_SHARE)
+            )
+
+        return 200, {}, {
+            'id': completion_id,
+            'object': 'chat.completion',
+            'created': 0,
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop'
+            }],
+            'usage': usage
+        }
+
+    async def _stream(self, completion_id: str, model: str, content: str, usage: Optional[Dict[str, int]],
+                      duration: float) -> AsyncIterator[bytes]:
+        """Server-sent `chat.completion.chunk` events, `STREAM_CHUNK_CHARS` characters at a time."""
+        def event(choices, chunk_usage=None) -> bytes:
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': 0, 'model': model,
+                     'choices': choices}
+            if chunk_usage is not None:
+                chunk['usage'] = chunk_usage
+            return f'data: {json.dumps(chunk)}\n\n'.encode('utf-8')
+
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        for number, piece in enumerate(pieces):
+            if number:
+                await self._sleep(duration / len(pieces))
+            yield event([{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}])
+        yield event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        if usage is not None:
+            yield event([], usage)
+        yield b'data: [DONE]\n\n'
+
+    def answer(self, prompt: str) -> Dict[str, Any]:
+        """The JSON document the prompt asks for, single or batched."""
+        validation = 'fact-checker' in prompt
+        make = self._validation if validation else self._analysis
+        if '"results"' in prompt:
+            indices = sorted({int(idx) for idx in _ITEM.findall(prompt)})
+            return {'results': [dict(make(), index=idx) for idx in indices]}
+        return make()
+
+    def _analysis(self) -> Dict[str, Any]:
+        return {
+            'gist': 'A synthetic summary of the synthetic article.',
+            'sentiment': self.random.choice(_SENTIMENTS),
+            'tone': 'analytical'
+        }
+
+    @staticmethod
+    def _validation() -> Dict[str, Any]:
+        return {'is_valid': True, 'notes': 'The analysis matches the synthetic article.'}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--newsapi-latency', type=float, default=0.05)
+    parser.add_argument('--llm-latency', type=float, default=None, help="one latency for every model (s)")
+    parser.add_argument('--jitter', type=float, default=0.2, help="relative latency jitter, e.g. 0.2 for +/-20%%")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="share of completions answered with 429")
+    parser.add_argument('--retry-after', type=float, default=0.1)
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="share of completions slowed by --slow-factor")
+    parser.add_argument('--slow-factor', type=float, default=10.0)
+    args = parser.parse_args()
+
+    upstream = FakeUpstream(
+        newsapi_latency=args.newsapi_latency,
+        model_latency=None if args.llm_latency is None else {},
+        llm_latency=0.5 if args.llm_latency is None else args.llm_latency,
+        jitter=args.jitter, rate_429=args.rate_429, retry_after=args.retry_after,
+        slow_rate=args.slow_rate, slow_factor=args.slow_factor
+    )
+    await upstream.start(args.host, args.port)
+    print(f"Fake upstream listening on {upstream.base_url}")
+    print(f"  NEWSAPI_BASE_URL={upstream.newsapi_base_url} GROQ_BASE_URL={upstream.groq_base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await upstream.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
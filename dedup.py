@@ -0,0 +1,92 @@
+"""
+Near-duplicate detection for syndicated news articles.
+SimHash fingerprints over word shingles of the title and description, with
+banded lookup so each new article is compared only against likely matches.
+"""
+
+import re
+import hashlib
+from typing import Any, Dict, List, Optional
+
+_NON_WORD = re.compile(r'[^\w\s]')
+# Syndicated titles often end with the outlet name, e.g. "... - Reuters" or "... | Mint"
+_SOURCE_SUFFIX = re.compile(r'\s+[-|\u2013\u2014]\s+[^-|\u2013\u2014]{1,40}$')
+
+SIMHASH_BITS = 64
+BANDS = 8
+BAND_BITS = SIMHASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Overlapping word n-grams of the normalized text (the whole text if it is shorter)."""
+    words = _NON_WORD.sub(' ', text.lower()).split()
+    if len(words) <= size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+def simhash(features: List[str]) -> int:
+    """64-bit SimHash of a list of features."""
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def article_simhash(article: Dict[str, Any]) -> int:
+    title = _SOURCE_SUFFIX.sub('', article.get('title') or '')
+    return simhash(shingles(f"{title} {article.get('description') or ''}"))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+class NearDuplicateIndex:
+    """
+    Incremental index of representative articles.
+
+    Two articles are near-duplicates when their SimHashes differ in at most
+    `max_distance` bits. With `max_distance` below the number of bands, any
+    such pair agrees exactly on at least one band, so only articles sharing a
+    band value are compared.
+    """
+
+    def __init__(self, max_distance: int = 6):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS}")
+        self.max_distance = max_distance
+        self._bands: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+        self._hashes: Dict[int, int] = {}
+
+    def add(self, key: int, article: Dict[str, Any]) -> Optional[int]:
+        """
+        Add an article under `key`.
+
+        Returns the key of the representative it duplicates, or None if the
+        article is new (it then becomes a representative itself).
+        """
+        fingerprint = article_simhash(article)
+        band_values = [(fingerprint >> (band * BAND_BITS)) & BAND_MASK for band in range(BANDS)]
+
+        for band, value in enumerate(band_values):
+            for candidate in self._bands[band].get(value, ()):
+                if hamming_distance(fingerprint, self._hashes[candidate]) <= self.max_distance:
+                    return candidate
+
+        self._hashes[key] = fingerprint
+        for band, value in enumerate(band_values):
+            self._bands[band].setdefault(value, []).append(key)
+        return None
+
+
+def find_near_duplicates(articles: List[Dict[str, Any]], max_distance: int = 6) -> List[Optional[int]]:
+    """
+    For each article, the index of the earlier article it duplicates, or None
+    if it is the first of its group.
+    """
+    index = NearDuplicateIndex(max_distance)
+    return [index.add(idx, article) for idx, article in enumerate(articles)]
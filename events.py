@@ -0,0 +1,142 @@
+"""
+Typed pipeline events.
+Events carry their payload as Python objects and serialize it only when a
+transport (SSE, the run ledger) reads `data`; orjson is used when installed.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up: pip install orjson
+    orjson = None
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON text, via orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode()
+        except TypeError:
+            pass  # e.g. non-string keys or integers beyond 64 bits; the stdlib copes
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads(text: str) -> Any:
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+class Event:
+    """
+    One pipeline event: its type (`event`), a JSON-able `payload` and, once
+    broadcast, a run-scoped `id`.
+
+    `data` is the serialized payload, built on first use and cached: events
+    consumed in-process are never serialized, and an event fanned out to many
+    clients is serialized once. Events read back from a transport keep only
+    `data` and parse the payload on demand.
+    """
+
+    __slots__ = ('event', 'id', '_payload', '_data')
+
+    def __init__(self, event: str, payload: Any = None, data: Optional[str] = None, id: Optional[str] = None):
+        self.event = event
+        self.id = id
+        self._payload = payload
+        self._data = data
+
+    @property
+    def payload(self) -> Any:
+        if self._payload is None and self._data is not None:
+            self._payload = loads(self._data)
+        return self._payload
+
+    @property
+    def data(self) -> str:
+        if self._data is None:
+            self._data = dumps(self._payload)
+        return self._data
+
+    def with_id(self, id: str) -> 'Event':
+        """A copy tagged with `id`, sharing the payload and any serialized data."""
+        tagged = object.__new__(type(self))
+        tagged.event, tagged.id, tagged._payload, tagged._data = self.event, id, self._payload, self._data
+        return tagged
+
+    def __getitem__(self, key: str) -> Any:
+        """Read 'event', 'data' or 'id' like the dict events of earlier versions."""
+        if key not in ('event', 'data', 'id'):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Event):
+            return NotImplemented
+        return (self.event, self.id, self.payload) == (other.event, other.id, other.payload)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.event!r}, id={self.id!r})'
+
+
+class LogEvent(Event):
+    __slots__ = ()
+
+    def __init__(self, message: str, step: str):
+        super().__init__('log', {'message': message, 'step': step})
+
+
+class PartialEvent(Event):
+    """The gist streamed so far for article `id` (ANALYSIS_STREAMING=1)."""
+    __slots__ = ()
+
+    def __init__(self, id: int, gist: str):
+        super().__init__('partial', {'id': id, 'gist': gist})
+
+
+class ArticleEvent(Event):
+    """One finished article, as formatted for clients."""
+    __slots__ = ()
+
+    def __init__(self, article: Dict[str, Any]):
+        super().__init__('article', article)
+
+
+class ResultEvent(Event):
+    __slots__ = ()
+
+    def __init__(self, articles: List[Dict[str, Any]]):
+        super().__init__('result', {'articles': articles})
+
+
+class FullResultEvent(Event):
+    """Every article with its analysis and validation, for the CLI's reports."""
+    __slots__ = ()
+
+    def __init__(self, validated_results: List[Dict[str, Any]], raw_articles: List[Dict[str, Any]],
+                 stats: Dict[str, Any]):
+        super().__init__('full_result', {'validated_results': validated_results, 'raw_articles': raw_articles,
+                                         'stats': stats})
+
+
+class ErrorEvent(Event):
+    __slots__ = ()
+
+    def __init__(self, message: str):
+        super().__init__('error', {'message': message})
+
+
+class CloseEvent(Event):
+    __slots__ = ()
+
+    def __init__(self, message: str = "Stream closed"):
+        super().__init__('close', {'message': message})
@@ -0,0 +1,111 @@
+"""
+Request hedging for LLM completions.
+A call that has not answered within an adaptive threshold (a quantile of its
+recent latencies) is duplicated to a fallback model; the first valid answer
+wins and the other request is cancelled.
+"""
+
+import os
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Optional, Set, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Written by list_models.py: one model id per line
+MODELS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models.txt')
+
+
+def available_models(path: str = MODELS_FILE) -> Optional[Set[str]]:
+    """The model ids listed in `path`, or None if the file does not exist."""
+    try:
+        with open(path) as f:
+            return {line.strip() for line in f if line.strip()}
+    except FileNotFoundError:
+        return None
+
+
+def resolve_hedge_model(model: Optional[str], primary: str, path: str = MODELS_FILE) -> Optional[str]:
+    """
+    `model` if it can serve as the hedge for `primary`, else None (hedging off).
+    It must differ from `primary` and, when models.txt exists, be listed there.
+    """
+    if not model:
+        return None
+    if model == primary:
+        logger.warning(f"Hedge model {model} is the primary model; hedging disabled")
+        return None
+    models = available_models(path)
+    if models is None:
+        logger.warning(f"{path} not found (run list_models.py); using hedge model {model} unchecked")
+    elif model not in models:
+        logger.warning(f"Hedge model {model} is not listed in {path}; hedging disabled")
+        return None
+    return model
+
+
+class LatencyTracker:
+    """
+    A sliding window of recent latencies and the hedging threshold derived
+    from it: the `quantile` of the window, never below `min_delay`, and
+    `initial_delay` until `min_samples` latencies have been seen.
+    """
+
+    def __init__(self, quantile: float = 0.9, min_delay: float = 0.5, initial_delay: float = 5.0,
+                 window: int = 200, min_samples: int = 20):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def threshold(self) -> float:
+        if len(self.samples) < self.min_samples:
+            return max(self.min_delay, self.initial_delay)
+        ordered = sorted(self.samples)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(self.quantile * len(ordered)))])
+
+    def expected_beyond(self, elapsed: float) -> Optional[float]:
+        """Mean of the recent latencies longer than `elapsed`, or None if there are none."""
+        slower = [sample for sample in self.samples if sample > elapsed]
+        return sum(slower) / len(slower) if slower else None
+
+
+async def hedged(primary: Callable[[], Awaitable[T]], hedge: Callable[[], Awaitable[T]],
+                 delay: float) -> Tuple[T, bool, float]:
+    """
+    Await `primary()`, starting `hedge()` as well if the primary has not
+    succeeded within `delay` seconds (or failed before then).
+
+    Returns (the first successful result, whether it came from the hedge,
+    seconds since the start). Whichever call is still running is cancelled;
+    if both fail, the primary's error is raised.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    first = asyncio.ensure_future(primary())
+    second = None
+    pending = {first}
+    try:
+        while True:
+            done, pending = await asyncio.wait(
+                pending, timeout=None if second is not None else delay, return_when=asyncio.FIRST_COMPLETED)
+            for task in (first, second):
+                if task in done:
+                    if task.exception() is None:
+                        return task.result(), task is second, loop.time() - started
+            if second is None:
+                second = asyncio.ensure_future(hedge())
+                pending.add(second)
+            elif not pending:
+                raise first.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,76 @@
+"""
+Factories for the pooled HTTP clients used to talk to NewsAPI and Groq.
+Pool limits, keep-alive and HTTP/2 are configured from environment variables.
+"""
+
+import os
+import logging
+import importlib.util
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+NEWSAPI_BASE_URL = "https://newsapi.org/v2"
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+
+def newsapi_base_url() -> str:
+    """NewsAPI root, overridable via NEWSAPI_BASE_URL (e.g. to point at a local stand-in)."""
+    return os.getenv('NEWSAPI_BASE_URL', NEWSAPI_BASE_URL).rstrip('/')
+
+
+def groq_base_url() -> str:
+    """OpenAI-compatible API root, overridable via GROQ_BASE_URL."""
+    return os.getenv('GROQ_BASE_URL', GROQ_BASE_URL).rstrip('/')
+
+
+def pool_limits() -> httpx.Limits:
+    """Connection pool limits from HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE and HTTP_KEEPALIVE_EXPIRY."""
+    return httpx.Limits(
+        max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '100')),
+        max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE', '20')),
+        keepalive_expiry=float(os.getenv('HTTP_KEEPALIVE_EXPIRY', '30'))
+    )
+
+
+def http2_enabled() -> bool:
+    """HTTP/2 is opt-in via HTTP2=1 and needs the optional `h2` package (pip install httpx[http2])."""
+    if os.getenv('HTTP2', '0') != '1':
+        return False
+    if importlib.util.find_spec('h2') is None:
+        logger.warning("HTTP2=1 but the 'h2' package is not installed; falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def create_newsapi_client(timeout: float = 10.0) -> httpx.AsyncClient:
+    """A pooled client for NewsAPI, meant to be shared for the lifetime of the app."""
+    return httpx.AsyncClient(timeout=timeout, limits=pool_limits(), http2=http2_enabled())
+
+
+def create_groq_client(api_key: str, rate_limiter) -> AsyncOpenAI:
+    """
+    A pooled Groq (OpenAI-compatible) client.
+
+    The rate limiter's response hook is installed so every completion made
+    through this client keeps the shared budgets in sync with the provider;
+    the metrics hook counts 429s. The SDK's own retries are off: callers
+    retry through resilience.call_with_retry.
+    """
+    if not api_key:
+        raise ValueError("GROQ_API_KEY not found in environment variables")
+
+    return AsyncOpenAI(
+        api_key=api_key,
+        base_url=groq_base_url(),
+        max_retries=0,
+        http_client=DefaultAsyncHttpxClient(
+            limits=pool_limits(),
+            http2=http2_enabled(),
+            event_hooks={'response': [rate_limiter.on_response, get_metrics().on_llm_response]}
+        )
+    )
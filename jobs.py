@@ -0,0 +1,320 @@
+"""
+Background pipeline jobs, decoupled from any HTTP connection.
+Jobs are queued onto a fixed pool of in-process workers; their events are
+broadcast like shared runs, and their records and results persist in SQLite,
+shared by every worker process of the API.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional
+
+from events import ErrorEvent, Event
+from run_coalescer import SharedRun
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_PATH = os.path.join('cache', 'jobs.sqlite3')
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+FINISHED = (COMPLETED, FAILED)
+
+# Seconds between store reads while waiting on a job run by another worker
+STORE_POLL_INTERVAL = 0.5
+
+
+class Job:
+    """One pipeline run requested through the jobs API."""
+
+    def __init__(self, job_id: str, topic: str, count: int, status: str = QUEUED, created_at: Optional[float] = None,
+                 started_at: Optional[float] = None, finished_at: Optional[float] = None,
+                 result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self.id = job_id
+        self.topic = topic
+        self.count = count
+        self.status = status
+        self.created_at = created_at or time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.result = result
+        self.error = error
+        # Set once a worker picks the job up; subscribers wait on `started` until then
+        self.run: Optional[SharedRun] = None
+        self.started = asyncio.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'topic': self.topic,
+            'count': self.count,
+            'status': self.status,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error
+        }
+
+
+class JobStore:
+    """SQLite persistence for jobs, so results outlive the process that produced them."""
+
+    def __init__(self, path: str = DEFAULT_JOBS_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)')
+        # Owner and heartbeat let several worker processes share the table
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(jobs)')}
+        for column, kind in (('owner', 'TEXT'), ('heartbeat', 'REAL')):
+            if column not in columns:
+                try:
+                    self.conn.execute(f'ALTER TABLE jobs ADD COLUMN {column} {kind}')
+                except sqlite3.OperationalError:
+                    pass  # Added by another worker in the meantime
+
+    def save(self, job: Job, owner: Optional[str] = None) -> None:
+        """Insert or update `job`; an `owner` marks it as kept alive by that manager's heartbeat."""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO jobs (id, topic, count, status, created_at, started_at, finished_at, result, error, '
+            'owner, heartbeat) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (job.id, job.topic, job.count, job.status, job.created_at, job.started_at, job.finished_at,
+             json.dumps(job.result, ensure_ascii=False) if job.result is not None else None, job.error,
+             owner, time.time() if owner else None)
+        )
+
+    def load(self, job_id: str) -> Optional[Job]:
+        row = self.conn.execute(
+            'SELECT id, topic, count, status, created_at, started_at, finished_at, result, error FROM jobs WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        *fields, result, error = row
+        return Job(*fields, result=json.loads(result) if result else None, error=error)
+
+    def touch(self, owner: str) -> None:
+        """Refresh the heartbeat of `owner`'s unfinished jobs."""
+        self.conn.execute('UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status IN (?, ?)',
+                          (time.time(), owner, QUEUED, RUNNING))
+
+    def fail_orphaned(self, error: str, stale_after: float) -> int:
+        """
+        Mark queued or running jobs whose owner has not refreshed them for
+        `stale_after` seconds (a process that exited) as failed. Returns how many.
+        """
+        now = time.time()
+        cursor = self.conn.execute(
+            'UPDATE jobs SET status = ?, error = ?, finished_at = ? '
+            'WHERE status IN (?, ?) AND (heartbeat IS NULL OR heartbeat < ?)',
+            (FAILED, error, now, QUEUED, RUNNING, now - stale_after)
+        )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class JobManager:
+    """
+    Queue of pipeline jobs served by `workers` concurrent workers.
+
+    At most `workers` pipelines run at once however many clients submit jobs.
+    Live jobs are kept in memory for streaming; finished ones are dropped from
+    memory after `retention` seconds and served from the store afterwards.
+
+    Several managers (one per worker process) can share a store: each keeps
+    its unfinished jobs alive with a heartbeat every `heartbeat` seconds and
+    fails the jobs of managers that stopped beating. A job run by another
+    manager is streamed as its stored outcome once it finishes.
+    """
+
+    def __init__(self, pipeline, store: Optional[JobStore] = None, workers: int = 2,
+                 buffer_size: Optional[int] = None, retention: float = 300.0, heartbeat: float = 10.0):
+        self.pipeline = pipeline
+        self.store = store
+        self.workers = max(1, workers)
+        self.buffer_size = buffer_size
+        self.retention = retention
+        self.heartbeat = heartbeat
+        self.owner = uuid.uuid4().hex
+        self.jobs: Dict[str, Job] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.store is not None:
+            self._fail_orphaned()
+            self._tasks.append(asyncio.create_task(self._keep_alive()))
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, topic: str, count: int) -> Job:
+        job = Job(uuid.uuid4().hex, topic, count)
+        self.jobs[job.id] = job
+        self._save(job)
+        self._queue.put_nowait(job)
+        logger.info(f"Queued job {job.id} for '{topic}' ({count} articles), {self._queue.qsize()} waiting")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    async def events(self, job: Job, last_event_id: Optional[str] = None) -> AsyncGenerator[Event, None]:
+        """
+        Stream a job's events, waiting for it to start if it is still queued.
+
+        Events after `last_event_id` are resumed from the job's replay buffer. A
+        job no longer held in memory is summarized by its stored result.
+        """
+        if job.run is None and job.status in FINISHED:
+            yield _final_event(job)
+            return
+
+        if job.id not in self.jobs and self.store is not None:
+            # Queued or running in another worker process: wait for the outcome it stores
+            while job.status not in FINISHED:
+                await asyncio.sleep(STORE_POLL_INTERVAL)
+                job = self.store.load(job.id) or job
+            yield _final_event(job)
+            return
+
+        await job.started.wait()
+        if job.run is None:
+            # The worker failed before the pipeline started
+            yield _final_event(job)
+            return
+
+        after = 0
+        if last_event_id:
+            run_id, _, number = last_event_id.partition(':')
+            if run_id == job.run.id and number.isdigit():
+                after = int(number)
+        async for event in job.run.events(after):
+            yield event
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._execute(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.id} crashed: {e}")
+                self._finish(job, FAILED, error=str(e))
+
+    async def _execute(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._save(job)
+
+        job.run = SharedRun(job.id, self._record(job, self.pipeline.run(topic=job.topic, count=job.count)),
+                            self.buffer_size, run_id=job.id)
+        job.started.set()
+        try:
+            await job.run.wait()
+        except asyncio.CancelledError:
+            job.run.cancel()
+            raise
+
+        if job.status == RUNNING:
+            if job.result is not None:
+                self._finish(job, COMPLETED)
+            else:
+                self._finish(job, FAILED, error=job.error or "Pipeline ended without a result")
+
+    async def _record(self, job: Job, source: AsyncIterator[Event]) -> AsyncGenerator[Event, None]:
+        """Pass events through while keeping the result or error for the job record."""
+        async for event in source:
+            if event.event == 'result':
+                job.result = event.payload
+            elif event.event == 'error':
+                job.error = event.payload.get('message')
+            yield event
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error if error is not None else job.error
+        job.finished_at = time.time()
+        job.started.set()
+        self._save(job)
+        logger.info(f"Job {job.id} {status} in {job.finished_at - (job.started_at or job.created_at):.1f}s")
+        if self.retention > 0:
+            asyncio.get_running_loop().call_later(self.retention, self.jobs.pop, job.id, None)
+        else:
+            self.jobs.pop(job.id, None)
+
+    def _save(self, job: Job) -> None:
+        if self.store is not None:
+            self.store.save(job, owner=self.owner)
+
+    def _fail_orphaned(self) -> None:
+        orphaned = self.store.fail_orphaned("Interrupted by a server restart", stale_after=3 * self.heartbeat)
+        if orphaned:
+            logger.warning(f"Marked {orphaned} job(s) of a stopped worker as failed")
+
+    async def _keep_alive(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            self.store.touch(self.owner)
+            self._fail_orphaned()
+
+    @classmethod
+    def from_env(cls, pipeline, buffer_size: Optional[int] = None) -> 'JobManager':
+        """
+        Build the manager from JOB_WORKERS, JOB_RETENTION and JOBS_DB_PATH
+        (an empty JOBS_DB_PATH keeps jobs in memory only). JOB_WORKERS bounds
+        the whole host, so it is split across the WEB_CONCURRENCY processes
+        (at least one each).
+        """
+        path = os.getenv('JOBS_DB_PATH', DEFAULT_JOBS_PATH)
+        processes = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+        return cls(
+            pipeline,
+            store=JobStore(path) if path else None,
+            workers=max(1, -(-int(os.getenv('JOB_WORKERS', '2')) // processes)),
+            buffer_size=buffer_size,
+            retention=float(os.getenv('JOB_RETENTION', '300'))
+        )
+
+
+def _final_event(job: Job) -> Event:
+    """The single event that stands in for the stream of a job finished in an earlier process."""
+    if job.status == COMPLETED:
+        return Event('result', job.result, id=f'{job.id}:final')
+    return ErrorEvent(job.error).with_id(f'{job.id}:final')
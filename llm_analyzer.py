@@ -1,41 +1,88 @@
 import os
 import json
+import asyncio
 import logging
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
 from openai import AsyncOpenAI, APIError
 
+from rate_limiter import get_rate_limiter, estimate_tokens
+from http_clients import create_groq_client
+from llm_json import parse_json_object, PartialFieldReader
+from metrics import get_metrics
+from resilience import RetryPolicy, call_with_retry, get_breaker
+from hedging import LatencyTracker, hedged, resolve_hedge_model
+
 logger = logging.getLogger(__name__)
 
 class LLMAnalyzer:
     """Analyzes news articles using Groq (Llama 3.3 70B)."""
+
+    # Bump whenever the prompt changes so cached analyses are not reused
+    PROMPT_VERSION = "1"
     
-    def __init__(self):
-        """Initialize Groq client."""
+    def __init__(self, rate_limiter=None, cache=None, client=None):
+        """
+        Initialize Groq client.
+
+        Args:
+            rate_limiter: Shared RateLimiter (defaults to the process-wide one)
+            cache: Optional result cache from llm_cache
+            client: Optional shared AsyncOpenAI client; a new pooled one is created if omitted
+        """
         self.api_key = os.getenv('GROQ_API_KEY')
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url="https://api.groq.com/openai/v1"
-        )
+        # Shared limiter so the analyzer and validator draw from one set of budgets
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.client = client or create_groq_client(self.api_key, self.rate_limiter)
         self.model = "llama-3.3-70b-versatile"
+        self.cache = cache
+        self.metrics = get_metrics()
+
+        # Transient Groq failures are retried with backoff; each model has its own breaker,
+        # so one model's outage doesn't fail the others fast
+        self.retry = RetryPolicy.from_env()
+        self.breaker = get_breaker(f'groq:{self.model}')
+
+        # Single-article analyses slower than the recent ANALYSIS_HEDGE_QUANTILE latency are
+        # duplicated to ANALYSIS_HEDGE_MODEL (unset disables hedging)
+        self.hedge_model = resolve_hedge_model(os.getenv('ANALYSIS_HEDGE_MODEL'), self.model)
+        self.latency = LatencyTracker(
+            quantile=float(os.getenv('ANALYSIS_HEDGE_QUANTILE', '0.9')),
+            min_delay=float(os.getenv('ANALYSIS_HEDGE_MIN_DELAY', '0.5'))
+        )
+
+        # Batching packs several articles into one completion (1 disables it)
+        self.batch_size = max(1, int(os.getenv('ANALYSIS_BATCH_SIZE', '1')))
+        self.batch_token_budget = int(os.getenv('ANALYSIS_BATCH_TOKEN_BUDGET', '4000'))
+
+        # Streaming reports the gist while it is generated (see analyze_article's on_partial)
+        self.streaming = os.getenv('ANALYSIS_STREAMING', '0') == '1'
     
-    async def analyze_article(self, article):
+    async def analyze_article(self, article, on_partial: Optional[Callable[[str], None]] = None):
         """
         Analyze a single article for gist, sentiment, and tone.
         
         Args:
             article: Dictionary with 'title', 'description', 'content'
+            on_partial: Called with the gist generated so far as it grows; only used
+                when streaming is enabled (ANALYSIS_STREAMING=1) and the article is not cached
             
         Returns:
             Dictionary with 'gist', 'sentiment', 'tone'
         """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(article, self.model, self.PROMPT_VERSION)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         # Build the article text
-        article_text = f"""
-Title: {article.get('title', '')}
-Description: {article.get('description', '')}
-Content: {article.get('content', '')}
-        """.strip()
+        article_text = self._article_text(article)
         
         # Create analysis prompt
         prompt = f"""
@@ -56,30 +103,272 @@ Respond ONLY with valid JSON in this exact format:
         """.strip()
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
-            )
-            
-            response_text = response.choices[0].message.content
-            analysis = json.loads(response_text)
-            
-            # Validate required fields
-            required_fields = ['gist', 'sentiment', 'tone']
-            if all(field in analysis for field in required_fields):
-                return analysis
+            estimated_tokens = estimate_tokens(prompt, completion_tokens=300)
+            if self.streaming and on_partial is not None:
+                analysis = await self._complete_analysis(self.model, prompt, estimated_tokens, on_partial)
+            elif self.hedge_model is not None:
+                analysis = await self._hedged_analysis(prompt, estimated_tokens)
             else:
-                raise ValueError("Missing required fields in response")
+                analysis = await self._complete_analysis(self.model, prompt, estimated_tokens)
+
+            # The key names the primary model: a fallback model's answer must not pass for its analysis
+            if cache_key is not None and analysis.get('model', self.model) == self.model:
+                self.cache.put(cache_key, analysis)
+            return analysis
             
         except Exception as e:
+            self.metrics.record_degraded(self.model)
             logger.error(f"Error analyzing article: {str(e)}")
             return {
                 'gist': 'Unable to analyze article',
                 'sentiment': 'neutral',
                 'tone': 'unknown',
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    async def _complete_analysis(self, model: str, prompt: str, estimated_tokens: int,
+                                 on_partial: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Run one single-article analysis completion on `model` (streamed if
+        `on_partial` is given) and return the parsed analysis. Raises if the
+        call fails or the response lacks a required field.
+        """
+        async def complete():
+            if on_partial is not None:
+                return await self._stream_completion(prompt, on_partial)
+            with self.metrics.llm_call(model):
+                completion = await self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    response_format={"type": "json_object"}
+                )
+            return completion.choices[0].message.content, completion
+
+        response_text, response = await call_with_retry(
+            'groq', complete, self.retry, get_breaker(f'groq:{model}'),
+            before_attempt=lambda: self.rate_limiter.acquire(model, estimated_tokens)
+        )
+
+        self.rate_limiter.record_usage(model, estimated_tokens, response)
+        self.metrics.record_usage(model, response)
+
+        try:
+            analysis = parse_json_object(response_text) if on_partial is not None else json.loads(response_text)
+
+            # Validate required fields
+            required_fields = ['gist', 'sentiment', 'tone']
+            if not all(field in analysis for field in required_fields):
+                raise ValueError("Missing required fields in response")
+        except Exception:
+            self.metrics.record_parse_failure(model)
+            raise
+        return analysis
+
+    async def _hedged_analysis(self, prompt: str, estimated_tokens: int) -> Dict[str, Any]:
+        """
+        Analyze on the primary model, hedging to `hedge_model` once the call
+        outlasts the adaptive threshold (or fails). The analysis records which
+        model answered under 'model'.
+        """
+        async def hedge():
+            self.metrics.record_hedge(self.hedge_model)
+            return await self._complete_analysis(self.hedge_model, prompt, estimated_tokens)
+
+        analysis, hedge_won, elapsed = await hedged(
+            lambda: self._complete_analysis(self.model, prompt, estimated_tokens),
+            hedge,
+            self.latency.threshold()
+        )
+        if hedge_won:
+            expected = self.latency.expected_beyond(elapsed)
+            self.metrics.record_hedge_win(self.hedge_model, expected - elapsed if expected is not None else None)
+        # A primary that lost the race took at least `elapsed`, which keeps the slow tail in the window
+        self.latency.observe(elapsed)
+        return dict(analysis, model=self.hedge_model if hedge_won else self.model)
+
+    async def _stream_completion(self, prompt: str, on_partial: Callable[[str], None]) -> Tuple[str, Any]:
+        """
+        Stream a completion, passing the gist to `on_partial` each time it grows.
+
+        JSON mode is not combined with streaming; the prompt alone asks for JSON
+        and the caller parses the text leniently. Returns the full response text
+        and an object carrying the final `usage` like a non-streamed response.
+        """
+        reader = PartialFieldReader('gist')
+        parts = []
+        usage = None
+        with self.metrics.llm_call(self.model):
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            async with stream:
+                async for chunk in stream:
+                    usage = getattr(chunk, 'usage', None) or usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    parts.append(delta)
+                    gist = reader.feed(delta)
+                    if gist is not None:
+                        on_partial(gist)
+        return ''.join(parts), SimpleNamespace(usage=usage)
+
+    async def analyze_batch(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Analyze several articles with as few completions as possible.
+
+        Cached articles are answered from the cache; the rest are packed into
+        JSON-array prompts within `batch_size` / `batch_token_budget`. Items a
+        batch response is missing or gets wrong fall back to `analyze_article`.
+
+        Args:
+            articles: List of article dictionaries
+            
+        Returns:
+            List of analysis dictionaries in the same order as `articles`
+        """
+        results: List[Dict[str, Any]] = [None] * len(articles)
+        pending = []
+        for idx, article in enumerate(articles):
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(self.cache.key(article, self.model, self.PROMPT_VERSION))
+            if cached is not None:
+                results[idx] = cached
+            else:
+                pending.append(idx)
+
+        fallback = []
+        for batch in self.plan_batches([articles[idx] for idx in pending]):
+            indices = [pending[position] for position in batch]
+            if len(indices) == 1:
+                fallback.extend(indices)
+                continue
+
+            parsed = await self._complete_batch([articles[idx] for idx in indices])
+            for position, idx in enumerate(indices):
+                analysis = parsed.get(position)
+                if analysis is None:
+                    fallback.append(idx)
+                    continue
+                results[idx] = analysis
+                if self.cache is not None:
+                    self.cache.put(self.cache.key(articles[idx], self.model, self.PROMPT_VERSION), analysis)
+
+        if fallback:
+            if len(fallback) < len(pending):
+                logger.warning(f"Batch analysis incomplete; analyzing {len(fallback)} article(s) individually")
+            singles = await asyncio.gather(*(self.analyze_article(articles[idx]) for idx in fallback))
+            for idx, analysis in zip(fallback, singles):
+                results[idx] = analysis
+
+        return results
+
+    def plan_batches(self, articles: List[Dict[str, Any]]) -> List[List[int]]:
+        """
+        Group article indices into batches of at most `batch_size` articles whose
+        combined article text stays within `batch_token_budget` tokens.
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for idx, article in enumerate(articles):
+            tokens = estimate_tokens(self._article_text(article))
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.batch_token_budget):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(idx)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _complete_batch(self, articles: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Run one batched completion. Returns the well-formed analyses keyed by
+        position in `articles`; malformed or missing items are simply absent.
+        """
+        numbered = "\n\n".join(
+            f"[{idx}]\n{self._article_text(article)}" for idx, article in enumerate(articles)
+        )
+        prompt = f"""
+Analyze each of the following {len(articles)} news articles and provide for each:
+1. Gist: A 1-2 sentence summary of the news
+2. Sentiment: Choose one - positive, negative, or neutral
+3. Tone: Choose one or more - urgent, analytical, satirical, balanced, critical, optimistic, alarmist
+
+Articles:
+{numbered}
+
+Respond ONLY with valid JSON in this exact format, with exactly one entry per article:
+{{
+  "results": [
+    {{"index": 0, "gist": "your 1-2 sentence summary here", "sentiment": "positive/negative/neutral", "tone": "analytical"}}
+  ]
+}}
+        """.strip()
+
+        response = None
+        try:
+            estimated_tokens = estimate_tokens(prompt, completion_tokens=150 * len(articles))
+
+            async def complete():
+                with self.metrics.llm_call(self.model):
+                    return await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.3,
+                        response_format={"type": "json_object"}
+                    )
+
+            response = await call_with_retry(
+                'groq', complete, self.retry, self.breaker,
+                before_attempt=lambda: self.rate_limiter.acquire(self.model, estimated_tokens)
+            )
+
+            self.rate_limiter.record_usage(self.model, estimated_tokens, response)
+            self.metrics.record_usage(self.model, response)
+
+            items = parse_json_object(response.choices[0].message.content).get('results')
+            if not isinstance(items, list):
+                raise ValueError("Missing 'results' array in batch response")
+
+        except Exception as e:
+            if response is not None:
+                self.metrics.record_parse_failure(self.model)
+            logger.error(f"Error analyzing batch of {len(articles)} articles: {str(e)}")
+            return {}
+
+        parsed = {}
+        required_fields = ['gist', 'sentiment', 'tone']
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                idx = int(item.get('index'))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= idx < len(articles) and idx not in parsed and all(field in item for field in required_fields):
+                parsed[idx] = {field: item[field] for field in required_fields}
+        return parsed
+
+    @staticmethod
+    def _article_text(article: Dict[str, Any]) -> str:
+        return f"""
+Title: {article.get('title', '')}
+Description: {article.get('description', '')}
+Content: {article.get('content', '')}
+        """.strip()
@@ -0,0 +1,202 @@
+"""
+Persistent caches for LLM results.
+Content-addressed SQLite storage with TTL and size-based (LRU) eviction.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+from typing import Any, Dict, Optional
+
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('cache', 'llm_cache.sqlite3')
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lowercase and collapse whitespace so trivial formatting changes hit the same entry."""
+    return _WHITESPACE.sub(' ', (text or '')).strip().lower()
+
+
+def article_fingerprint(article: Dict[str, Any]) -> str:
+    """SHA-256 of the normalized title, description and content of an article."""
+    parts = (normalize_text(article.get(field)) for field in ('title', 'description', 'content'))
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class SQLiteCache:
+    """
+    Key/value store of JSON documents in a SQLite table.
+
+    Entries older than `ttl` seconds are treated as misses and removed; once the
+    table holds more than `max_entries` rows the least recently used are evicted.
+    """
+
+    table = 'entries'
+    env_prefix = 'LLM'
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 7 * 24 * 3600, max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        self.conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {self.table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached document for `key`, or None on a miss."""
+        now = time.time()
+        row = self.conn.execute(f'SELECT value, created_at FROM {self.table} WHERE key = ?', (key,)).fetchone()
+
+        if row is None:
+            self._miss()
+            return None
+
+        value, created_at = row
+        if now - created_at > self.ttl:
+            self.conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+            self._miss()
+            return None
+
+        self.conn.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        get_metrics().record_cache_lookup(self.table, hit=True)
+        return json.loads(value)
+
+    def _miss(self) -> None:
+        self.misses += 1
+        get_metrics().record_cache_lookup(self.table, hit=False)
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store `value` under `key` and evict the least recently used entries over the size limit."""
+        now = time.time()
+        self.conn.execute(
+            f'INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value, ensure_ascii=False), now, now)
+        )
+        self.conn.execute(
+            f'DELETE FROM {self.table} WHERE key IN '
+            f'(SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def purge_expired(self) -> int:
+        """Delete all entries older than the TTL. Returns the number removed."""
+        cursor = self.conn.execute(f'DELETE FROM {self.table} WHERE created_at < ?', (time.time() - self.ttl,))
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self.conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self)
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build the cache from LLM_CACHE_PATH and the <PREFIX>_CACHE_TTL / <PREFIX>_CACHE_MAX_ENTRIES
+        variables. Setting LLM_CACHE_PATH to an empty string disables caching.
+        """
+        path = os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH)
+        if not path:
+            return None
+        return cls(
+            path,
+            ttl=float(os.getenv(f'{cls.env_prefix}_CACHE_TTL', str(7 * 24 * 3600))),
+            max_entries=int(os.getenv(f'{cls.env_prefix}_CACHE_MAX_ENTRIES', '10000'))
+        )
+
+
+class AnalysisCache(SQLiteCache):
+    """Cache of LLMAnalyzer results keyed on article content, model and prompt version."""
+
+    table = 'analyses'
+    env_prefix = 'ANALYSIS'
+
+    @staticmethod
+    def key(article: Dict[str, Any], model: str, prompt_version: str) -> str:
+        material = f"{article_fingerprint(article)}|{model}|{prompt_version}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ValidationCache(SQLiteCache):
+    """
+    Cache of LLMValidator results keyed on the (article, analysis) pair, model and prompt version.
+
+    Failed validations are recorded in a separate table for diagnostics and are
+    never served from the cache, so they are retried on the next run.
+    """
+
+    table = 'validations'
+    env_prefix = 'VALIDATION'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS validation_errors (
+                key TEXT PRIMARY KEY,
+                error TEXT NOT NULL,
+                failures INTEGER NOT NULL,
+                failed_at REAL NOT NULL
+            )
+        ''')
+
+    @staticmethod
+    def key(article: Dict[str, Any], analysis: Dict[str, Any], model: str, prompt_version: str) -> str:
+        analysis_fields = '\x1f'.join(normalize_text(str(analysis.get(field, ''))) for field in ('gist', 'sentiment', 'tone'))
+        material = f"{article_fingerprint(article)}|{analysis_fields}|{model}|{prompt_version}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def record_error(self, key: str, error: str) -> None:
+        """Remember that validating `key` failed, without caching the failure as a result."""
+        self.conn.execute(
+            '''INSERT INTO validation_errors (key, error, failures, failed_at) VALUES (?, ?, 1, ?)
+               ON CONFLICT(key) DO UPDATE SET error = excluded.error,
+                   failures = failures + 1, failed_at = excluded.failed_at''',
+            (key, error, time.time())
+        )
+        self.conn.execute(
+            'DELETE FROM validation_errors WHERE key IN '
+            '(SELECT key FROM validation_errors ORDER BY failed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        super().put(key, value)
+        self.conn.execute('DELETE FROM validation_errors WHERE key = ?', (key,))
+
+    def error_count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM validation_errors').fetchone()[0]
@@ -0,0 +1,84 @@
+"""
+Helpers for parsing JSON out of LLM responses.
+"""
+
+import re
+import json
+from typing import Any, Dict, Optional
+
+_CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$', re.IGNORECASE)
+
+
+def parse_json_object(text: str) -> Dict[str, Any]:
+    """
+    Parse a JSON object from an LLM response.
+
+    Tolerates markdown code fences and stray text around the object.
+    Raises ValueError if no JSON object can be decoded.
+    """
+    cleaned = _CODE_FENCE.sub('', (text or '').strip())
+    try:
+        parsed = json.loads(cleaned)
+    except json.JSONDecodeError:
+        start, end = cleaned.find('{'), cleaned.rfind('}')
+        if start == -1 or end <= start:
+            raise ValueError("No JSON object found in response")
+        parsed = json.loads(cleaned[start:end + 1])
+
+    if not isinstance(parsed, dict):
+        raise ValueError("Expected a JSON object in response")
+    return parsed
+
+
+class PartialFieldReader:
+    """
+    Follows one string field of a JSON object while the object streams in.
+
+    `feed()` takes the next chunk of raw response text and returns the field's
+    decoded value so far whenever it has grown, otherwise None. Incomplete
+    escape sequences at the end of the text are held back until they complete.
+    """
+
+    def __init__(self, field: str):
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._text = ''
+        self._start = None
+        self.value = ''
+        self.complete = False
+
+    def feed(self, chunk: str) -> Optional[str]:
+        if self.complete:
+            return None
+        self._text += chunk
+        if self._start is None:
+            match = self._key.search(self._text)
+            if match is None:
+                return None
+            self._start = match.end()
+
+        raw = self._raw_value()
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            return None
+        if value == self.value:
+            return None
+        self.value = value
+        return value
+
+    def _raw_value(self) -> str:
+        """The still-escaped value text up to the closing quote or the last complete character."""
+        text, position = self._text, self._start
+        while position < len(text):
+            char = text[position]
+            if char == '"':
+                self.complete = True
+                break
+            if char == '\\':
+                width = 6 if text[position + 1:position + 2] == 'u' else 2
+                if position + width > len(text):
+                    break
+                position += width
+            else:
+                position += 1
+        return text[self._start:position]
@@ -1,24 +1,52 @@
 import os
 import json
+import asyncio
 import logging
+from typing import Any, Dict, List, Tuple
+
 from openai import AsyncOpenAI, APIError
 
+from rate_limiter import get_rate_limiter, estimate_tokens
+from http_clients import create_groq_client
+from llm_json import parse_json_object
+from metrics import get_metrics
+from resilience import RetryPolicy, call_with_retry, get_breaker
+
 logger = logging.getLogger(__name__)
 
 class LLMValidator:
     """Validates analysis using Groq (Llama 3.1 8B)."""
+
+    # Bump whenever the prompt changes so cached validations are not reused
+    PROMPT_VERSION = "1"
     
-    def __init__(self):
-        """Initialize Groq client."""
+    def __init__(self, rate_limiter=None, cache=None, client=None):
+        """
+        Initialize Groq client.
+
+        Args:
+            rate_limiter: Shared RateLimiter (defaults to the process-wide one)
+            cache: Optional result cache from llm_cache
+            client: Optional shared AsyncOpenAI client; a new pooled one is created if omitted
+        """
         self.api_key = os.getenv('GROQ_API_KEY')
         if not self.api_key:
             raise ValueError("GROQ_API_KEY not found in environment variables")
         
-        self.client = AsyncOpenAI(
-            api_key=self.api_key,
-            base_url="https://api.groq.com/openai/v1"
-        )
+        # Shared limiter so the analyzer and validator draw from one set of budgets
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.client = client or create_groq_client(self.api_key, self.rate_limiter)
         self.model = "llama-3.1-8b-instant"
+        self.cache = cache
+        self.metrics = get_metrics()
+
+        # Transient Groq failures are retried with backoff; each model has its own breaker,
+        # so an outage of the analyzer's model doesn't fail validations fast
+        self.retry = RetryPolicy.from_env()
+        self.breaker = get_breaker(f'groq:{self.model}')
+
+        # Batching checks several (article, analysis) pairs per completion (1 disables it)
+        self.batch_size = max(1, int(os.getenv('VALIDATION_BATCH_SIZE', '1')))
     
     async def validate_analysis(self, article, analysis):
         """
@@ -31,12 +59,15 @@ class LLMValidator:
         Returns:
             Dictionary with validation results
         """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.key(article, analysis, self.model, self.PROMPT_VERSION)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         # Build article text
-        article_text = f"""
-Title: {article.get('title', '')}
-Description: {article.get('description', '')}
-Content: {article.get('content', '')}
-        """.strip()
+        article_text = self._article_text(article)
         
         # Build validation prompt
         prompt = f"""
@@ -62,30 +93,189 @@ Respond ONLY with valid JSON in this exact format:
 }}
         """.strip()
         
+        response = None
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
+            estimated_tokens = estimate_tokens(prompt, completion_tokens=200)
+
+            async def complete():
+                with self.metrics.llm_call(self.model):
+                    return await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.3,
+                        response_format={"type": "json_object"}
+                    )
+
+            response = await call_with_retry(
+                'groq', complete, self.retry, self.breaker,
+                before_attempt=lambda: self.rate_limiter.acquire(self.model, estimated_tokens)
             )
             
+            self.rate_limiter.record_usage(self.model, estimated_tokens, response)
+            self.metrics.record_usage(self.model, response)
+
             response_text = response.choices[0].message.content
-            validation = json.loads(response_text)
+            validation = parse_json_object(response_text)
             
             # Validate required fields
             if 'is_valid' in validation and 'notes' in validation:
+                if cache_key is not None:
+                    self.cache.put(cache_key, validation)
                 return validation
             else:
                 raise ValueError("Missing required fields in validation response")
         
         except Exception as e:
+            if response is not None:
+                self.metrics.record_parse_failure(self.model)
+            self.metrics.record_degraded(self.model)
             logger.error(f"Error validating analysis: {str(e)}")
+            if cache_key is not None:
+                self.cache.record_error(cache_key, str(e))
             # Return default validation on error
             return {
                 'is_valid': False,
                 'notes': f'Validation failed due to error: {str(e)}',
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    async def validate_batch(self, items: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Validate several (article, analysis) pairs with as few completions as possible.
+
+        Cached pairs are answered from the cache; the rest are checked up to
+        `batch_size` per completion. Items the batch response is missing or
+        gets wrong fall back to `validate_analysis`.
+
+        Args:
+            items: List of (article, analysis) tuples
+            
+        Returns:
+            List of validation dictionaries in the same order as `items`
+        """
+        results: List[Dict[str, Any]] = [None] * len(items)
+        pending = []
+        for idx, (article, analysis) in enumerate(items):
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(self.cache.key(article, analysis, self.model, self.PROMPT_VERSION))
+            if cached is not None:
+                results[idx] = cached
+            else:
+                pending.append(idx)
+
+        fallback = []
+        for start in range(0, len(pending), self.batch_size):
+            indices = pending[start:start + self.batch_size]
+            if len(indices) == 1:
+                fallback.extend(indices)
+                continue
+
+            parsed = await self._complete_batch([items[idx] for idx in indices])
+            for position, idx in enumerate(indices):
+                validation = parsed.get(position)
+                if validation is None:
+                    fallback.append(idx)
+                    continue
+                results[idx] = validation
+                if self.cache is not None:
+                    article, analysis = items[idx]
+                    self.cache.put(self.cache.key(article, analysis, self.model, self.PROMPT_VERSION), validation)
+
+        if fallback:
+            if len(fallback) < len(pending):
+                logger.warning(f"Batch validation incomplete; validating {len(fallback)} item(s) individually")
+            singles = await asyncio.gather(*(self.validate_analysis(*items[idx]) for idx in fallback))
+            for idx, validation in zip(fallback, singles):
+                results[idx] = validation
+
+        return results
+
+    async def _complete_batch(self, items: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+        """
+        Run one batched validation completion. Returns well-formed validations
+        keyed by position in `items`; malformed or missing items are absent.
+        """
+        numbered = "\n\n".join(
+            f"""[{idx}]
+Original Article:
+{self._article_text(article)}
+
+AI Analysis:
+- Gist: {analysis.get('gist', '')}
+- Sentiment: {analysis.get('sentiment', '')}
+- Tone: {analysis.get('tone', '')}"""
+            for idx, (article, analysis) in enumerate(items)
+        )
+        prompt = f"""
+You are a fact-checker validating an AI's analysis of {len(items)} news articles.
+
+{numbered}
+
+Questions to answer for each item:
+1. Does the gist accurately summarize the article? Is it factually correct?
+2. Is the sentiment classification (positive/negative/neutral) justified by the article's content?
+3. Is the tone assessment accurate based on the article's language and style?
+
+Respond ONLY with valid JSON in this exact format, with exactly one entry per item:
+{{
+  "results": [
+    {{"index": 0, "is_valid": true, "notes": "Explain your validation here. If invalid, point out specific errors or mismatches."}}
+  ]
+}}
+        """.strip()
+
+        response = None
+        try:
+            estimated_tokens = estimate_tokens(prompt, completion_tokens=120 * len(items))
+
+            async def complete():
+                with self.metrics.llm_call(self.model):
+                    return await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=[
+                            {"role": "user", "content": prompt}
+                        ],
+                        temperature=0.3,
+                        response_format={"type": "json_object"}
+                    )
+
+            response = await call_with_retry(
+                'groq', complete, self.retry, self.breaker,
+                before_attempt=lambda: self.rate_limiter.acquire(self.model, estimated_tokens)
+            )
+
+            self.rate_limiter.record_usage(self.model, estimated_tokens, response)
+            self.metrics.record_usage(self.model, response)
+
+            results = parse_json_object(response.choices[0].message.content).get('results')
+            if not isinstance(results, list):
+                raise ValueError("Missing 'results' array in batch validation response")
+
+        except Exception as e:
+            if response is not None:
+                self.metrics.record_parse_failure(self.model)
+            logger.error(f"Error validating batch of {len(items)} items: {str(e)}")
+            return {}
+
+        parsed = {}
+        for result in results:
+            if not isinstance(result, dict):
+                continue
+            try:
+                idx = int(result.get('index'))
+            except (TypeError, ValueError):
+                continue
+            if 0 <= idx < len(items) and idx not in parsed and isinstance(result.get('is_valid'), bool) and 'notes' in result:
+                parsed[idx] = {'is_valid': result['is_valid'], 'notes': result['notes']}
+        return parsed
+
+    @staticmethod
+    def _article_text(article: Dict[str, Any]) -> str:
+        return f"""
+Title: {article.get('title', '')}
+Description: {article.get('description', '')}
+Content: {article.get('content', '')}
+        """.strip()
@@ -6,9 +6,11 @@ Orchestrates fetching, analysis, validation, and reporting.
 import os
 import json
 import asyncio
+import argparse
 from datetime import datetime
 from dotenv import load_dotenv
 from pipeline import NewsAnalysisPipeline
+from news_fetcher import TOPIC_QUERIES
 
 def ensure_output_directory():
     """Create output directory if it doesn't exist."""
@@ -70,6 +72,10 @@ def generate_markdown_report(validated_results):
         report_lines.extend([
             f"### Article {idx}: \"{title}\"",
             f"- **Source:** [{url}]({url})",
+        ])
+        if article.get('topics'):
+            report_lines.append(f"- **Topics:** {', '.join(article['topics'])}")
+        report_lines.extend([
             f"- **Gist:** {gist}",
             f"- **LLM#1 Sentiment:** {sentiment}",
             f"- **LLM#2 Validation:** {validation_symbol} {validation_notes}",
@@ -87,8 +93,20 @@ def generate_markdown_report(validated_results):
     
     return report_content
 
-async def main():
+def parse_args(argv=None):
+    """Command-line options: one topic, or several analyzed together with --topics."""
+    parser = argparse.ArgumentParser(description="Fetch, analyze and validate news articles.")
+    parser.add_argument('--topic', default="Indian Politics", help="topic to analyze")
+    parser.add_argument('--topics', help="comma-separated topics to analyze in one run "
+                                         f"(e.g. '{','.join(TOPIC_QUERIES)}'); overrides --topic")
+    parser.add_argument('--count', type=int, default=12, help="articles per topic")
+    args = parser.parse_args(argv)
+    args.topics = [topic.strip() for topic in args.topics.split(',') if topic.strip()] if args.topics else None
+    return args
+
+async def main(argv=None):
     """Main execution flow."""
+    args = parse_args(argv)
     print("=" * 60)
     print("NEWS ANALYSIS PIPELINE - DUAL LLM VALIDATION")
     print("=" * 60)
@@ -102,28 +120,22 @@ async def main():
     pipeline = NewsAnalysisPipeline()
     
     # Run pipeline and listen for events
-    async for event_data in pipeline.run(topic="Indian Politics", count=12):
-        event_type = event_data.get('event')
-        data = event_data.get('data')
+    async for event in pipeline.run(topic=args.topic, count=args.count, topics=args.topics, full_result=True):
+        event_type = event.event
         
         if event_type == 'log':
-            # Parse the JSON string in data to get the message
-            try:
-                msg_data = json.loads(data)
-                print(f"[LOG] {msg_data.get('message')}")
-            except:
-                print(f"[LOG] {data}")
+            print(f"[LOG] {event.payload.get('message')}")
                 
         elif event_type == 'error':
-            print(f"✗ ERROR: {data}")
+            print(f"✗ ERROR: {event.payload.get('message')}")
             return
             
         elif event_type == 'close':
             print("Stream closed.")
             
         elif event_type == 'full_result':
-            # Extract full data for saving
-            full_data = json.loads(data)
+            # Events are consumed in-process, so the payload is never serialized
+            full_data = event.payload
             validated_results = full_data.get('validated_results', [])
             raw_articles = full_data.get('raw_articles', [])
             
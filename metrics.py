@@ -0,0 +1,340 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+A deliberately small registry (counters, gauges, histograms with labels) so
+the API can serve /api/metrics without an extra dependency.
+"""
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; covers sub-100ms cache-warm calls up to slow 70B completions
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    """A metric family: one child per combination of label values."""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values, **labels):
+        """The child for the given label values (positional or by name)."""
+        if labels:
+            values = tuple(str(labels[name]) for name in self.label_names)
+        else:
+            values = tuple(str(value) for value in values)
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}")
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _default(self):
+        # Unlabelled metrics act as their own single child
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self, values: Tuple[str, ...], child) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._samples(values, child))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def _samples(self, values, child) -> List[str]:
+        return [f'{self.name}{_label_text(self.label_names, values)} {_format_value(child.value)}']
+
+
+class _CounterChild(_Value):
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self.value += amount
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+
+class _GaugeChild(_Value):
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count the enclosed block as in progress."""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, plus their sum and count."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _samples(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, child.counts):
+            cumulative += count
+            labels = _label_text(self.label_names, values, ('le', _format_value(bound)))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _label_text(self.label_names, values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+                return
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the wall-clock duration of the enclosed block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Registry:
+    """An ordered collection of metric families."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class PipelineMetrics:
+    """
+    The metrics the pipeline, its components and the API report into.
+
+    Instrumentation goes through the hook methods below so call sites stay
+    one-liners and the metric names live in one place.
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self.registry = Registry()
+        r = self.registry
+        self.fetch_latency = r.histogram(
+            'newsapi_fetch_duration_seconds', 'NewsAPI request latency in seconds.')
+        self.llm_latency = r.histogram(
+            'llm_request_duration_seconds', 'LLM completion latency in seconds.', ['model'])
+        self.stage_latency = r.histogram(
+            'pipeline_stage_duration_seconds', 'Pipeline stage duration in seconds.', ['stage'])
+        self.time_to_first_event = r.histogram(
+            'pipeline_time_to_first_event_seconds',
+            'Seconds from the start of a run until its first per-article result.')
+        self.llm_tokens = r.counter(
+            'llm_tokens_total', 'Tokens reported in LLM usage.', ['model', 'kind'])
+        self.rate_limited = r.counter(
+            'upstream_rate_limited_total', 'HTTP 429 responses from upstream APIs.', ['upstream'])
+        self.parse_failures = r.counter(
+            'llm_parse_failures_total', 'LLM responses that could not be parsed into the expected JSON.', ['model'])
+        self.retries = r.counter(
+            'upstream_retries_total', 'Upstream calls retried after a transient failure.', ['upstream', 'reason'])
+        self.breaker_state = r.gauge(
+            'circuit_breaker_state', 'Upstream circuit breaker state (0 closed, 1 half-open, 2 open).', ['upstream'])
+        self.breaker_rejections = r.counter(
+            'circuit_breaker_rejections_total', 'Calls failed fast because the circuit was open.', ['upstream'])
+        self.degraded_results = r.counter(
+            'llm_degraded_results_total', 'Placeholder analyses or validations returned after an LLM error.', ['model'])
+        self.hedges = r.counter(
+            'llm_hedged_requests_total', 'Duplicate completions sent to a hedge model after the primary ran slow or failed.', ['model'])
+        self.hedge_wins = r.counter(
+            'llm_hedge_wins_total', 'Hedged completions whose hedge answered first.', ['model'])
+        self.hedge_latency_saved = r.histogram(
+            'llm_hedge_latency_saved_seconds',
+            'Estimated seconds saved per winning hedge (recent primary latencies beyond the win, minus the win time).')
+        self.cache_lookups = r.counter(
+            'llm_cache_lookups_total', 'LLM result cache lookups.', ['cache', 'result'])
+        self.llm_in_flight = r.gauge(
+            'llm_requests_in_flight', 'LLM completions currently awaiting a response.', ['model'])
+        self.requests_in_flight = r.gauge(
+            'api_requests_in_flight', 'API requests currently being served.', ['path'])
+
+    @contextmanager
+    def llm_call(self, model: str) -> Iterator[None]:
+        """Time one completion and count it as in flight while it runs."""
+        with self.llm_in_flight.labels(model).track(), self.llm_latency.labels(model).time():
+            yield
+
+    def record_usage(self, model: str, response) -> None:
+        """Add the prompt/completion tokens from a completion's `usage`, if present."""
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return
+        for kind in ('prompt', 'completion'):
+            tokens = getattr(usage, f'{kind}_tokens', None)
+            if isinstance(tokens, (int, float)):
+                self.llm_tokens.labels(model, kind).inc(tokens)
+
+    def record_parse_failure(self, model: str) -> None:
+        self.parse_failures.labels(model).inc()
+
+    def record_rate_limited(self, upstream: str) -> None:
+        self.rate_limited.labels(upstream).inc()
+
+    def record_retry(self, upstream: str, reason: str) -> None:
+        self.retries.labels(upstream, reason).inc()
+
+    def set_breaker_state(self, upstream: str, state: int) -> None:
+        self.breaker_state.labels(upstream).set(state)
+
+    def record_breaker_rejection(self, upstream: str) -> None:
+        self.breaker_rejections.labels(upstream).inc()
+
+    def record_degraded(self, model: str) -> None:
+        self.degraded_results.labels(model).inc()
+
+    def record_hedge(self, model: str) -> None:
+        self.hedges.labels(model).inc()
+
+    def record_hedge_win(self, model: str, saved: Optional[float]) -> None:
+        self.hedge_wins.labels(model).inc()
+        if saved is not None:
+            self.hedge_latency_saved.observe(max(0.0, saved))
+
+    def record_cache_lookup(self, cache: str, hit: bool) -> None:
+        self.cache_lookups.labels(cache, 'hit' if hit else 'miss').inc()
+
+    async def on_llm_response(self, response) -> None:
+        """httpx response hook counting 429s from the chat completions endpoint."""
+        if response.status_code == 429:
+            self.record_rate_limited('groq')
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+_shared_metrics: Optional[PipelineMetrics] = None
+
+
+def get_metrics() -> PipelineMetrics:
+    """Return the process-wide metrics served by /api/metrics."""
+    global _shared_metrics
+    if _shared_metrics is None:
+        _shared_metrics = PipelineMetrics()
+    return _shared_metrics
@@ -1,112 +1,265 @@
 """
 News fetcher module to retrieve articles from NewsAPI.
-Handles API calls, rate limiting, and error handling.
+Handles API calls, retries with backoff, and error handling.
 """
 
 import os
+import math
 import httpx
 from datetime import datetime, timedelta
 import asyncio
 import logging
 
+from metrics import get_metrics
+from rate_limiter import get_rate_limiter
+from http_clients import newsapi_base_url
+from watermarks import WatermarkStore, advance
+from resilience import CircuitOpenError, RetryPolicy, call_with_retry, get_breaker
+
 logger = logging.getLogger(__name__)
 
+# Topics offered by the UI, mapped to their NewsAPI queries
+TOPIC_QUERIES = {
+    "Indian Politics": "India politics OR India government",
+    "Technology": "technology OR tech news OR artificial intelligence",
+    "Business": "business OR economy OR market",
+    "International": "international news OR world news"
+}
+
+# NewsAPI serves at most 100 articles per page
+MAX_PAGE_SIZE = 100
+
+
+class IncompleteFetchError(Exception):
+    """A page after the first failed, so a paged fetch ended before all its results."""
+
+    def __init__(self, page, pages):
+        super().__init__(f"page {page} of {pages} could not be fetched")
+        self.page = page
+        self.pages = pages
+
 class NewsFetcher:
     """Fetches news articles from NewsAPI."""
     
-    def __init__(self):
-        """Initialize with API key from environment."""
+    def __init__(self, client=None, watermarks=None, rate_limiter=None):
+        """
+        Initialize with API key from environment.
+
+        Args:
+            client: Optional shared httpx.AsyncClient; a short-lived one is opened per call if omitted
+            watermarks: Optional WatermarkStore of per-topic high-water marks (from WATERMARK_PATH by default)
+            rate_limiter: Optional RateLimiter holding the 'newsapi' request budget (the process-wide one by default)
+        """
         self.api_key = os.getenv('NEWSAPI_KEY')
         if not self.api_key:
             raise ValueError("NEWSAPI_KEY not found in environment variables")
         
-        self.base_url = "https://newsapi.org/v2/everything"
+        self.base_url = f"{newsapi_base_url()}/everything"
         self.timeout = 10.0  # seconds
+        self.client = client
+        self.watermarks = watermarks if watermarks is not None else WatermarkStore.from_env()
+
+        # 429s, 5xx and timeouts are retried with backoff; the breaker is shared process-wide
+        self.retry = RetryPolicy.from_env()
+        self.breaker = get_breaker('newsapi')
+
+        # Larger requests are fetched as pages, up to `page_concurrency` at once
+        self.page_size = min(MAX_PAGE_SIZE, max(1, int(os.getenv('NEWSAPI_PAGE_SIZE', str(MAX_PAGE_SIZE)))))
+        self.page_concurrency = max(1, int(os.getenv('NEWSAPI_PAGE_CONCURRENCY', '4')))
+
+        # Every request, retries included, draws on a NEWSAPI_RPM budget shared like the LLM ones
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        if 'newsapi' not in self.rate_limiter.limits:
+            self.rate_limiter.limits['newsapi'] = {'rpm': int(os.getenv('NEWSAPI_RPM', '60')), 'tpm': 0}
+
+    def watermark(self, topic):
+        """
+        The topic's high-water mark: (newest publishedAt processed, URLs published
+        at that instant), or None if the topic has no mark yet.
+        """
+        if self.watermarks is None:
+            return None
+        return self.watermarks.get(topic)
+
+    def advance_watermark(self, topic, articles, retry=()):
+        """
+        Move the topic's high-water mark past `articles` once they have been
+        processed, stopping short of any in `retry` so they are fetched again.
+        """
+        if self.watermarks is None:
+            return
+        mark = advance(self.watermarks.get(topic), articles, retry)
+        if mark is not None:
+            self.watermarks.set(topic, mark)
     
-    async def fetch_news(self, topic="Indian Politics", num_articles=12):
+    async def fetch_news(self, topic="Indian Politics", num_articles=12, since=None):
         """
         Fetch recent news articles based on topic (Async).
         
         Args:
             topic: Topic to fetch (default: "Indian Politics")
             num_articles: Number of articles to fetch (default: 12)
+            since: Optional ISO 8601 publishedAt to fetch from instead of the last 24 hours
             
         Returns:
             List of article dictionaries, or empty list on error
         """
+        params = self._params(topic, num_articles, since)
+        
+        if self.client is not None:
+            return await self._request(self.client, params, num_articles)
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            return await self._request(client, params, num_articles)
+
+    async def stream_news(self, topic="Indian Politics", num_articles=500, since=None):
+        """
+        Fetch articles page by page, yielding each page of cleaned articles as soon
+        as it (and every page before it) has arrived.
+
+        The first page also reports how many results exist, so only the pages
+        needed are then requested, `page_concurrency` at a time. An empty first
+        page means no articles or an API error, as with fetch_news; a later page
+        that fails raises IncompleteFetchError once the pages before it are out.
+
+        Args:
+            topic: Topic to fetch (default: "Indian Politics")
+            num_articles: Total number of articles wanted (default: 500)
+            since: Optional ISO 8601 publishedAt to fetch from instead of the last 24 hours
+        """
+        if self.client is not None:
+            async for page in self._stream_pages(self.client, topic, num_articles, since):
+                yield page
+            return
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async for page in self._stream_pages(client, topic, num_articles, since):
+                yield page
+
+    async def _stream_pages(self, client, topic, num_articles, since):
+        page_size = min(self.page_size, num_articles)
+        first, total_results = await self._fetch_page(client, self._params(topic, page_size, since, page=1))
+        remaining = num_articles
+        yield first[:remaining]
+        remaining -= len(first)
+
+        pages = min(math.ceil(num_articles / page_size), math.ceil(total_results / page_size))
+        if not first or pages <= 1:
+            return
+
+        slots = asyncio.Semaphore(self.page_concurrency)
+
+        async def fetch(page):
+            async with slots:
+                return await self._fetch_page(client, self._params(topic, page_size, since, page=page))
+
+        tasks = {page: asyncio.create_task(fetch(page)) for page in range(2, pages + 1)}
+        try:
+            for page, task in tasks.items():
+                articles, total_results = await task
+                if remaining <= 0:
+                    break
+                if not total_results:
+                    # An error, not the end of the results: those were counted on the first page
+                    logger.warning(f"NewsAPI page {page} of {pages} for '{topic}' failed; later pages dropped")
+                    raise IncompleteFetchError(page, pages)
+                yield articles[:remaining]
+                remaining -= len(articles)
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    def _params(self, topic, page_size, since=None, page=None):
+        """Query parameters for one NewsAPI /everything request."""
         # Calculate date range (last 24 hours for realtime news)
         to_date = datetime.now()
         from_date = to_date - timedelta(days=1)
         
-        # Topic mapping
-        topic_queries = {
-            "Indian Politics": "India politics OR India government",
-            "Technology": "technology OR tech news OR artificial intelligence",
-            "Business": "business OR economy OR market",
-            "International": "international news OR world news"
-        }
-        
-        query = topic_queries.get(topic, "India politics")
+        query = TOPIC_QUERIES.get(topic, "India politics")
         
         params = {
             'q': query,
-            'from': from_date.strftime('%Y-%m-%d'),
+            'from': since[:19] if since else from_date.strftime('%Y-%m-%d'),
             'to': to_date.strftime('%Y-%m-%d'),
             'language': 'en',
             'sortBy': 'publishedAt',
-            'pageSize': num_articles,
+            'pageSize': page_size,
             'apiKey': self.api_key
         }
-        
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                print(f"  Requesting articles from NewsAPI...") # Keep print for CLI compatibility, or use logger
+        if since:
+            # Open-ended: everything published after the mark (publishedAt is UTC, to_date is local)
+            del params['to']
+        if page is not None:
+            params['page'] = page
+        return params
+
+    async def _request(self, client, params, num_articles):
+        """Perform the NewsAPI request and clean the returned articles."""
+        articles, _ = await self._fetch_page(client, params)
+        return articles[:num_articles]
+
+    async def _fetch_page(self, client, params):
+        """Perform one NewsAPI request. Returns the cleaned articles and the reported totalResults."""
+        metrics = get_metrics()
+
+        async def get():
+            with metrics.fetch_latency.time():
                 response = await client.get(self.base_url, params=params)
+            if response.status_code == 429:
+                metrics.record_rate_limited('newsapi')
+            response.raise_for_status()
+            return response
+
+        try:
+            print(f"  Requesting articles from NewsAPI...") # Keep print for CLI compatibility, or use logger
+            response = await call_with_retry(
+                'newsapi', get, self.retry, self.breaker,
+                before_attempt=lambda: self.rate_limiter.acquire('newsapi', 0)
+            )
+            
+            data = response.json()
+            
+            if data.get('status') != 'ok':
+                print(f"  API Error: {data.get('message', 'Unknown error')}")
+                return [], 0
+            
+            articles = data.get('articles', [])
+            
+            # Clean and normalize articles
+            cleaned_articles = []
+            for article in articles:
+                # Skip articles without content
+                if not article.get('title') or not article.get('description'):
+                    continue
                 
-                # Handle rate limiting
-                if response.status_code == 429:
-                    print("  Rate limit hit. Waiting 60 seconds...")
-                    await asyncio.sleep(60)
-                    response = await client.get(self.base_url, params=params)
-                
-                # Check for successful response
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                if data.get('status') != 'ok':
-                    print(f"  API Error: {data.get('message', 'Unknown error')}")
-                    return []
-                
-                articles = data.get('articles', [])
-                
-                # Clean and normalize articles
-                cleaned_articles = []
-                for article in articles:
-                    # Skip articles without content
-                    if not article.get('title') or not article.get('description'):
-                        continue
-                    
-                    cleaned_article = {
-                        'title': article.get('title', '').strip(),
-                        'description': article.get('description', '').strip(),
-                        'content': article.get('content', '').strip(),
-                        'url': article.get('url', ''),
-                        'publishedAt': article.get('publishedAt', ''),
-                        'source': article.get('source', {}).get('name', 'Unknown')
-                    }
-                    cleaned_articles.append(cleaned_article)
-                
-                return cleaned_articles[:num_articles]
-                
-            except httpx.TimeoutException:
-                print(f"  Request timed out after {self.timeout} seconds")
-                return []
+                cleaned_article = {
+                    'title': article.get('title', '').strip(),
+                    'description': article.get('description', '').strip(),
+                    'content': article.get('content', '').strip(),
+                    'url': article.get('url', ''),
+                    'publishedAt': article.get('publishedAt', ''),
+                    'source': article.get('source', {}).get('name', 'Unknown')
+                }
+                cleaned_articles.append(cleaned_article)
             
-            except httpx.RequestError as e:
-                print(f"  Request error: {str(e)}")
-                return []
+            return cleaned_articles, data.get('totalResults', len(articles))
             
-            except Exception as e:
-                print(f"  Unexpected error: {str(e)}")
-                return []
+        except CircuitOpenError as e:
+            print(f"  Skipping request: {str(e)}")
+            return [], 0
+
+        except httpx.TimeoutException:
+            print(f"  Request timed out after {self.timeout} seconds")
+            return [], 0
+
+        except httpx.HTTPStatusError as e:
+            print(f"  HTTP error: {e.response.status_code}")
+            return [], 0
+        
+        except httpx.RequestError as e:
+            print(f"  Request error: {str(e)}")
+            return [], 0
+        
+        except Exception as e:
+            print(f"  Unexpected error: {str(e)}")
+            return [], 0
@@ -3,14 +3,24 @@ Centralized pipeline logic for news analysis.
 Used by both the API and CLI to ensure consistent behavior.
 """
 
-import json
+import os
 import logging
 import asyncio
-from typing import AsyncGenerator, List, Dict, Any
+import time
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, List, Dict, Any, Optional, Tuple
 
-from news_fetcher import NewsFetcher
+from news_fetcher import IncompleteFetchError, NewsFetcher
 from llm_analyzer import LLMAnalyzer
 from llm_validator import LLMValidator
+from llm_cache import AnalysisCache, ValidationCache
+from article_store import ArticleStore, is_degraded
+from dedup import NearDuplicateIndex
+from sentiment_precheck import LocalPrecheck
+from metrics import get_metrics
+from watermarks import newer_than
+from events import (Event, LogEvent, PartialEvent, ArticleEvent, ResultEvent, FullResultEvent, ErrorEvent,
+                    CloseEvent)
 
 logger = logging.getLogger(__name__)
 
@@ -20,122 +30,550 @@ class NewsAnalysisPipeline:
     Generates events for progress tracking.
     """
     
-    def __init__(self):
-        self.fetcher = NewsFetcher()
-        self.analyzer = LLMAnalyzer()
-        self.validator = LLMValidator()
+    def __init__(self, fetcher=None, analyzer=None, validator=None, max_concurrency=None, validation_concurrency=None,
+                 newsapi_client=None, llm_client=None, precheck_confidence=None, metrics=None, store=None):
+        """
+        Components can be injected directly; otherwise they are built here.
+        `newsapi_client` / `llm_client` let long-lived callers (the API) share
+        pooled HTTP clients across pipeline runs. Stage timings are reported
+        to `metrics` (the process-wide PipelineMetrics by default), and
+        validated articles are kept in `store` (an ArticleStore from the
+        environment by default).
+        """
+        self.fetcher = fetcher or NewsFetcher(client=newsapi_client)
+        self.analyzer = analyzer or LLMAnalyzer(cache=AnalysisCache.from_env(), client=llm_client)
+        self.validator = validator or LLMValidator(cache=ValidationCache.from_env(), client=llm_client)
+
+        # Upper bound on LLM analyses in flight at once
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv('ANALYSIS_CONCURRENCY', '4'))
+        self.max_concurrency = max(1, max_concurrency)
+
+        # Upper bound on LLM validations in flight at once
+        if validation_concurrency is None:
+            validation_concurrency = int(os.getenv('VALIDATION_CONCURRENCY', '4'))
+        self.validation_concurrency = max(1, validation_concurrency)
+
+        # How long a validation worker waits for more analyzed articles to fill a batch
+        self.validation_linger = float(os.getenv('VALIDATION_BATCH_LINGER', '0.2'))
+
+        # Near-duplicate (syndicated) articles share one analysis; DEDUP_MAX_DISTANCE=-1 disables it
+        self.dedup_max_distance = int(os.getenv('DEDUP_MAX_DISTANCE', '6'))
+
+        # An incremental run pages back to the high-water mark, through at most this many articles
+        self.incremental_limit = int(os.getenv('INCREMENTAL_MAX_ARTICLES', '500'))
+
+        # Tier-0 local sentiment check, opt-in: unset or above 1 disables it
+        if precheck_confidence is None:
+            precheck_confidence = float(os.getenv('LOCAL_PRECHECK_CONFIDENCE') or 'inf')
+        self.precheck = LocalPrecheck(precheck_confidence) if precheck_confidence <= 1 else None
+
+        self.metrics = metrics or get_metrics()
+        self.store = store if store is not None else ArticleStore.from_env()
 
-    async def run(self, topic: str = "Indian Politics", count: int = 12) -> AsyncGenerator[Dict[str, Any], None]:
+    async def run(self, topic: str = "Indian Politics", count: int = 12, incremental: bool = False,
+                  topics: Optional[List[str]] = None, full_result: bool = False,
+                  advance_mark: bool = False) -> AsyncGenerator[Event, None]:
         """
         Runs the full analysis pipeline and yields events.
         
-        Events are dictionaries with 'event' and 'data' keys, suitable for SSE.
+        Events are typed Event objects (see events.py) whose payloads are
+        only serialized when a transport reads their `data`. The closing
+        `full_result` event, with every article's analysis and validation,
+        is only built if `full_result` is set (the CLI's reports need it).
+        An incremental run only processes articles newer than the topic's
+        high-water mark, however many arrived since (up to INCREMENTAL_MAX_ARTICLES),
+        and moves the mark past them once they are done;
+        `advance_mark` has a full run move it too. The mark never passes an
+        article whose analysis or validation failed, so it is retried.
+
+        With several `topics` (instead of `topic`), `count` articles per topic
+        are fetched concurrently and merged into one run: an article listed
+        under more than one topic is analyzed once, and every article is
+        tagged with the topics it appeared under.
         """
+        started = time.perf_counter()
+        pages = None
+        topics = list(dict.fromkeys(topics)) if topics else [topic]
+        multi_topic = len(topics) > 1
+        topic = topics[0]
         try:
             # --- Step 1: Initialization ---
-            yield self._create_log_event(f"Initializing pipeline for '{topic}' ({count} articles)...", "fetch")
+            label = f"topics {', '.join(topics)}" if multi_topic else f"'{topic}'"
+            yield self._create_log_event(f"Initializing pipeline for {label} ({count} articles)...", "fetch")
             await asyncio.sleep(0.1)
 
             # --- Step 2: Fetching ---
             yield self._create_log_event("Connecting to NewsAPI...", "fetch")
             
-            # Fetching is now async in NewsFetcher
-            articles = await self.fetcher.fetch_news(topic=topic, num_articles=count)
+            # Fetching is now async in NewsFetcher. Counts beyond one NewsAPI page
+            # are fetched as a stream of pages, analyzed as each page arrives.
+            mark = self.fetcher.watermark(topic) if incremental and not multi_topic else None
+            window = {'since': mark[0]} if mark else {}
+            page_size = getattr(self.fetcher, 'page_size', None)
+            # Past a mark every new article is wanted, not only the newest `count`: page back to the mark
+            wanted = max(count, self.incremental_limit) if mark else count
+            paged = page_size is not None and wanted > page_size
+            if paged and not multi_topic:
+                pages = self.fetcher.stream_news(topic=topic, num_articles=wanted, **window)
+            # In paged mode this times the first page, after which analysis starts
+            with self.metrics.stage_latency.labels('fetch').time():
+                if multi_topic:
+                    first_page = await self._fetch_topics(topics, count, paged)
+                elif pages is not None:
+                    first_page = await anext(pages, [])
+                else:
+                    first_page = await self.fetcher.fetch_news(topic=topic, num_articles=count, **window)
             
-            if not articles:
-                yield {
-                    "event": "error",
-                    "data": json.dumps({"message": "No articles found or API error."})
-                }
+            if not first_page:
+                yield ErrorEvent("No articles found or API error.")
                 return
 
-            yield self._create_log_event(f"Retrieved {len(articles)} articles successfully", "fetch")
+            if multi_topic:
+                shared = sum(1 for article in first_page if len(article['topics']) > 1)
+                yield self._create_log_event(
+                    f"Retrieved {len(first_page)} unique articles across {len(topics)} topics "
+                    f"({shared} listed under more than one)", "fetch"
+                )
+            elif pages is not None:
+                yield self._create_log_event(
+                    f"Retrieved first {len(first_page)} articles - analyzing while the remaining pages download", "fetch"
+                )
+            else:
+                yield self._create_log_event(f"Retrieved {len(first_page)} articles successfully", "fetch")
+            if mark:
+                first_page = newer_than(first_page, mark)
+                yield self._create_log_event(f"{len(first_page)} new since the last refresh ({mark[0]})", "fetch")
+                if not first_page:
+                    yield ResultEvent([])
+                    yield CloseEvent()
+                    return
             await asyncio.sleep(0.1)
 
-            # --- Step 3: Analysis ---
+            articles: List[Dict[str, Any]] = []
+            duplicate_of: List[Optional[int]] = []
+            unique: List[int] = []
+            copies: Dict[int, List[int]] = {}
+            analyses: List[Dict[str, Any]] = []
+            validations: List[Dict[str, Any]] = []
+            results: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+            # Duplicates arriving on a later page than their already-validated original
+            late_copies: List[int] = []
+            dedup = NearDuplicateIndex(self.dedup_max_distance) if self.dedup_max_distance >= 0 else None
+
+            def add_page(page: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+                """Append a page of articles; returns the ones that are not near-duplicates of earlier articles."""
+                start = len(articles)
+                articles.extend(page)
+                for slots in (analyses, validations, results):
+                    slots.extend([None] * len(page))
+                for idx in range(start, len(articles)):
+                    # Only one representative per group of near-duplicates goes to the LLMs
+                    original = dedup.add(idx, articles[idx]) if dedup is not None else None
+                    duplicate_of.append(original)
+                    if original is None:
+                        unique.append(idx)
+                    elif validations[original] is not None:
+                        late_copies.append(idx)
+                    else:
+                        copies.setdefault(original, []).append(idx)
+                return [articles[idx] for idx in range(start, len(articles)) if duplicate_of[idx] is None]
+
+            async def later_pages() -> AsyncGenerator[List[Dict[str, Any]], None]:
+                nonlocal incomplete
+                try:
+                    async for page in pages:
+                        yield add_page(newer_than(page, mark) if mark else page)
+                except IncompleteFetchError as e:
+                    # Analyze what did arrive; the run reports the shortfall instead of failing
+                    incomplete = e
+
+            def duplicates_log() -> Event:
+                return self._create_log_event(
+                    f"Found {len(articles) - len(unique)} near-duplicate articles - analyzing {len(unique)} unique",
+                    "analyze"
+                )
+
+            # --- Steps 3 & 4: Analysis streamed into Validation ---
+            # Each article moves on to validation as soon as its analysis returns,
+            # so the 70B and 8B models work at the same time.
+            first_unique = add_page(first_page)
+            if len(unique) < len(articles):
+                yield duplicates_log()
             yield self._create_log_event("Starting LLM Analysis (Stage 1)...", "analyze")
 
-            analysis_results = []
-            
-            for idx, article in enumerate(articles, 1):
-                yield self._create_log_event(f"Analyzed article {idx}/{len(articles)}: Analyzing...", "analyze")
-                
-                # Run async analysis
-                analysis = await self.analyzer.analyze_article(article)
-                analysis_results.append({
-                    'article': article,
-                    'analysis': analysis
-                })
-                # Small delay to respect rate limits if needed, but not blocking logic
-                await asyncio.sleep(0.5) 
+            analyzed = validated = 0
+            fetched = pages is None
+            incomplete: Optional[IncompleteFetchError] = None
+            analysis_cache_before = self._cache_counts(self.analyzer)
+            validation_cache_before = self._cache_counts(self.validator)
+            stage_started = time.perf_counter()
 
-            yield self._create_log_event("Analysis stage 1 complete - moving to validation", "analyze")
+            def article_event(idx: int) -> Event:
+                results[idx] = self._assemble(idx, articles, duplicate_of, analyses, validations)
+                return ArticleEvent(results[idx][1])
 
-            # --- Step 4: Validation ---
-            yield self._create_log_event("Starting LLM Validation (Stage 2)...", "validate")
+            def late_copy_events() -> List[Event]:
+                events = [article_event(idx) for idx in late_copies]
+                late_copies.clear()
+                return events
 
-            final_articles = []
-            validated_results_full = [] # For CLI report generation if needed
+            def analysis_complete() -> List[Event]:
+                self._observe_stage('analysis', stage_started)
+                events = [self._create_log_event("Analysis stage 1 complete - finishing validation", "analyze")]
+                if analysis_cache_before is not None:
+                    hits, misses = self._cache_delta(self.analyzer, analysis_cache_before)
+                    events.append(self._create_log_event(f"Analysis cache: {hits} hits, {misses} misses", "analyze"))
+                return events
 
-            for idx, result in enumerate(analysis_results, 1):
-                yield self._create_log_event(f"Validating article {idx}/{len(analysis_results)}...", "validate")
-                
-                validation = await self.validator.validate_analysis(
-                    result['article'], 
-                    result['analysis']
-                )
+            more = later_pages() if pages is not None else None
+            async with aclosing(self._process_articles(first_unique, more)) as stages:
+                async for stage, position, payload in stages:
+                    for event in late_copy_events():
+                        yield event
+                    if stage == 'fetched':
+                        # Every page is in (paginated fetches only)
+                        fetched = True
+                        if incomplete is not None:
+                            yield self._create_log_event(
+                                f"Fetching stopped after {len(articles)} articles: NewsAPI {incomplete}", "fetch"
+                            )
+                        else:
+                            yield self._create_log_event(f"Retrieved {len(articles)} articles successfully", "fetch")
+                        if len(unique) < len(articles):
+                            yield duplicates_log()
+                        if analyzed == len(unique):
+                            for event in analysis_complete():
+                                yield event
+                        continue
 
-                validated_results_full.append({
-                    'article': result['article'],
-                    'analysis': result['analysis'],
-                    'validation': validation
-                })
+                    idx = unique[position]
+                    title = articles[idx]['title'][:60]
 
-                # Format for frontend
-                final_articles.append({
-                    "id": idx,
-                    "title": result['article']['title'],
-                    "sentiment": result['analysis'].get('sentiment', 'neutral').lower(),
-                    "validationPassed": validation.get('is_valid', False),
-                    "validationNote": validation.get('notes', ''),
-                    "summary": result['analysis'].get('gist', ''),
-                    "url": result['article'].get('url', '#')
-                })
-                await asyncio.sleep(0.5)
+                    if stage == 'partial':
+                        # Streamed gist so far (ANALYSIS_STREAMING=1), ahead of the full analysis
+                        yield PartialEvent(idx + 1, payload)
+                    elif stage == 'analyzed':
+                        analyses[idx] = payload
+                        analyzed += 1
+                        yield self._create_log_event(f"Analyzed article {analyzed}/{len(unique)}: {title}", "analyze")
+                        if analyzed == 1:
+                            yield self._create_log_event("Starting LLM Validation (Stage 2)...", "validate")
+                        if fetched and analyzed == len(unique):
+                            for event in analysis_complete():
+                                yield event
+                    else:
+                        validations[idx] = payload
+                        validated += 1
+                        if validated == 1:
+                            self.metrics.time_to_first_event.observe(time.perf_counter() - started)
+                        yield self._create_log_event(f"Validated article {validated}/{len(unique)}: {title}", "validate")
+
+                        # Each finished article (and any near-duplicates sharing its analysis)
+                        # goes out on its own, so clients need not wait for the final result
+                        for article_idx in [idx] + copies.get(idx, []):
+                            yield article_event(article_idx)
+
+            for event in late_copy_events():
+                yield event
+            self._observe_stage('validation', stage_started)
+
+            validated_results_full = [result for result, _ in results] # For CLI report generation if needed
+            final_articles = [formatted for _, formatted in results]
 
             yield self._create_log_event("All articles validated successfully", "validate")
+            locally_confirmed = sum(1 for idx in unique if validations[idx].get('validated_by') == 'local')
+            skip_rate = locally_confirmed / len(unique)
+            if self.precheck:
+                yield self._create_log_event(
+                    f"Local pre-check confirmed {locally_confirmed}/{len(unique)} articles "
+                    f"(LLM validation skip rate {skip_rate:.0%})",
+                    "validate"
+                )
+            if validation_cache_before is not None:
+                hits, misses = self._cache_delta(self.validator, validation_cache_before)
+                yield self._create_log_event(f"Validation cache: {hits} hits, {misses} misses", "validate")
+
+            if self.store is not None:
+                try:
+                    # Articles of a multi-topic run are archived under every topic they were listed under
+                    stored = self.store.save(topic, validated_results_full)
+                    yield self._create_log_event(f"Stored {stored} articles in the archive", "done")
+                except Exception as e:
+                    # Losing history is no reason to fail the run
+                    logger.warning(f"Could not store articles: {e}")
+            if mark and len(articles) >= wanted:
+                logger.warning(f"More than {wanted} articles for '{topic}' since {mark[0]}; older ones were skipped")
+                yield self._create_log_event(
+                    f"Processed the newest {wanted} articles since the last refresh; older ones were skipped", "done"
+                )
+            if mark and incomplete is not None:
+                # The pages that failed hold the oldest new articles: leave the mark for the next refresh
+                logger.warning(f"Keeping the mark for '{topic}' at {mark[0]}: the fetch was incomplete")
+            elif (incremental or advance_mark) and not multi_topic:
+                degraded = [result['article'] for result in validated_results_full if is_degraded(result)]
+                self.fetcher.advance_watermark(topic, articles, retry=degraded)
             
             # --- Step 5: Done ---
+            self._observe_stage('total', started)
             yield self._create_log_event("Pipeline complete - results ready", "done")
             
             # Send final data
-            yield {
-                "event": "result",
-                "data": json.dumps({"articles": final_articles})
-            }
+            yield ResultEvent(final_articles)
             
-            # Send full detailed data (optional, useful for CLI saving files)
-            yield {
-                "event": "full_result",
-                "data": json.dumps({"validated_results": validated_results_full, "raw_articles": articles})
-            }
+            # Send full detailed data (only on request: the CLI saves it to files)
+            if full_result:
+                yield FullResultEvent(validated_results_full, articles, {
+                    "unique_articles": len(unique),
+                    "locally_confirmed": locally_confirmed,
+                    "validation_skip_rate": skip_rate
+                })
 
             # Close stream
-            yield {
-                "event": "close",
-                "data": json.dumps({"message": "Stream closed"})
-            }
+            yield CloseEvent()
 
         except Exception as e:
             logger.error(f"Error in pipeline: {e}")
-            yield {
-                "event": "error",
-                "data": json.dumps({"message": f"Internal Server Error: {str(e)}"})
-            }
+            yield ErrorEvent(f"Internal Server Error: {str(e)}")
+        finally:
+            if pages is not None:
+                await pages.aclose()
 
-    def _create_log_event(self, message: str, step: str) -> Dict[str, Any]:
-        """Helper to create a log event."""
-        return {
-            "event": "log",
-            "data": json.dumps({"message": message, "step": step})
+    async def _process_articles(self, articles: List[Dict[str, Any]],
+                                more: Optional[AsyncIterator[List[Dict[str, Any]]]] = None
+                                ) -> AsyncGenerator[Tuple[str, int, Dict[str, Any]], None]:
+        """
+        Analyzes and validates articles as a two-stage streaming pipeline.
+
+        At most `max_concurrency` analysis requests (single articles or batches) and
+        `validation_concurrency` validation requests are in flight at once. Yields ('analyzed', index, analysis) and
+        ('validated', index, validation) tuples in completion order, preceded by
+        ('partial', index, gist) updates when the analyzer streams. Pending tasks
+        are cancelled if the consumer stops early (e.g. the client disconnected).
+
+        Pages from `more` are appended to `articles` (indices continue across
+        pages) and start analysis as soon as they arrive; a ('fetched', total, None)
+        tuple reports that the last page is in.
+        """
+        articles = list(articles)
+        total = None if more is not None else len(articles)
+        outbox: asyncio.Queue = asyncio.Queue()
+        analysis_slots = asyncio.Semaphore(self.max_concurrency)
+        validation_slots = asyncio.Semaphore(self.validation_concurrency)
+        tasks: List[asyncio.Task] = []
+
+        # With validation batching, analyzed articles are queued for a pool of
+        # workers that each take up to `batch_size` of them per completion
+        validation_batch_size = getattr(self.validator, 'batch_size', 1)
+        validation_queue: asyncio.Queue = asyncio.Queue()
+        handed_off = 0
+
+        # Streaming analyzers report the gist while it is generated (single-article requests only)
+        streaming = getattr(self.analyzer, 'streaming', False)
+
+        # Tier 0: lexicon scores for each page, used to skip clear-cut LLM validations
+        local_scores = self.precheck.score_articles(articles) if self.precheck else None
+
+        async def validate(idx: int, analysis: Dict[str, Any]) -> None:
+            try:
+                async with validation_slots:
+                    validation = await self.validator.validate_analysis(articles[idx], analysis)
+                outbox.put_nowait(('validated', idx, validation))
+            except Exception as e:
+                outbox.put_nowait(('failed', idx, e))
+
+        async def validation_worker() -> None:
+            try:
+                while True:
+                    item = await validation_queue.get()
+                    if item is None:
+                        return
+                    batch = [item]
+                    # Give slower analyses a moment to fill the batch
+                    if validation_queue.qsize() < validation_batch_size - 1:
+                        await asyncio.sleep(self.validation_linger)
+                    while len(batch) < validation_batch_size and not validation_queue.empty():
+                        item = validation_queue.get_nowait()
+                        if item is None:
+                            validation_queue.put_nowait(None)  # leave the stop marker for the next loop
+                            break
+                        batch.append(item)
+
+                    results = await self.validator.validate_batch([(articles[idx], analysis) for idx, analysis in batch])
+                    for (idx, _), validation in zip(batch, results):
+                        outbox.put_nowait(('validated', idx, validation))
+            except Exception as e:
+                outbox.put_nowait(('failed', -1, e))
+
+        def hand_off(idx: int, analysis: Dict[str, Any]) -> None:
+            nonlocal handed_off
+            handed_off += 1
+            confirmed = self.precheck.confirm(local_scores[idx], analysis) if self.precheck else None
+
+            if confirmed is not None:
+                outbox.put_nowait(('validated', idx, confirmed))
+            elif validation_batch_size <= 1:
+                tasks.append(asyncio.create_task(validate(idx, analysis)))
+            else:
+                validation_queue.put_nowait((idx, analysis))
+
+            if handed_off == total:
+                stop_validation_workers()
+
+        def stop_validation_workers() -> None:
+            if validation_batch_size > 1:
+                for _ in range(self.validation_concurrency):
+                    validation_queue.put_nowait(None)
+
+        async def analyze(indices: List[int]) -> None:
+            try:
+                async with analysis_slots:
+                    if len(indices) == 1 and streaming:
+                        idx = indices[0]
+                        results = [await self.analyzer.analyze_article(
+                            articles[idx], on_partial=lambda gist: outbox.put_nowait(('partial', idx, gist))
+                        )]
+                    elif len(indices) == 1:
+                        results = [await self.analyzer.analyze_article(articles[indices[0]])]
+                    else:
+                        results = await self.analyzer.analyze_batch([articles[idx] for idx in indices])
+                for idx, analysis in zip(indices, results):
+                    outbox.put_nowait(('analyzed', idx, analysis))
+                    hand_off(idx, analysis)
+            except Exception as e:
+                outbox.put_nowait(('failed', indices[0], e))
+
+        async def feed() -> None:
+            nonlocal total
+            try:
+                async for page in more:
+                    start = len(articles)
+                    articles.extend(page)
+                    if self.precheck:
+                        local_scores.extend(self.precheck.score_articles(page))
+                    tasks.extend(
+                        asyncio.create_task(analyze([start + idx for idx in batch]))
+                        for batch in self._analysis_batches(page)
+                    )
+                total = len(articles)
+                if handed_off == total:
+                    stop_validation_workers()
+                outbox.put_nowait(('fetched', total, None))
+            except Exception as e:
+                outbox.put_nowait(('failed', -1, e))
+
+        if validation_batch_size > 1:
+            tasks.extend(asyncio.create_task(validation_worker()) for _ in range(self.validation_concurrency))
+        tasks.extend(asyncio.create_task(analyze(batch)) for batch in self._analysis_batches(articles))
+        feeder = asyncio.create_task(feed()) if more is not None else None
+        try:
+            validated = 0
+            while total is None or validated < total:
+                stage, idx, payload = await outbox.get()
+                if stage == 'failed':
+                    raise payload
+                if stage == 'validated':
+                    validated += 1
+                yield stage, idx, payload
+        finally:
+            for task in tasks:
+                task.cancel()
+            if feeder is not None:
+                # Let the page stream unwind (cancelling its downloads) before the caller closes it
+                feeder.cancel()
+                await asyncio.gather(feeder, return_exceptions=True)
+
+    async def _fetch_topics(self, topics: List[str], count: int, paged: bool) -> List[Dict[str, Any]]:
+        """
+        Fetch `count` articles for each topic concurrently and merge them newest
+        first, one entry per URL, each tagged with every topic it appeared under.
+        """
+        async def fetch(topic: str) -> List[Dict[str, Any]]:
+            if paged:
+                articles: List[Dict[str, Any]] = []
+                try:
+                    async for page in self.fetcher.stream_news(topic=topic, num_articles=count):
+                        articles.extend(page)
+                except IncompleteFetchError as e:
+                    logger.warning(f"Fetching '{topic}' stopped after {len(articles)} articles: NewsAPI {e}")
+                return articles
+            return await self.fetcher.fetch_news(topic=topic, num_articles=count)
+
+        fetched = await asyncio.gather(*(fetch(topic) for topic in topics))
+        merged: Dict[str, Dict[str, Any]] = {}
+        for topic, articles in zip(topics, fetched):
+            for article in articles:
+                key = article.get('url') or f"{topic}:{len(merged)}"
+                if key in merged:
+                    merged[key]['topics'].append(topic)
+                else:
+                    merged[key] = dict(article, topics=[topic])
+        return sorted(merged.values(), key=lambda article: article.get('publishedAt', ''), reverse=True)
+
+    def _analysis_batches(self, articles: List[Dict[str, Any]]) -> List[List[int]]:
+        """
+        Article indices grouped into analysis units: batches planned by the analyzer
+        when batching is enabled (ANALYSIS_BATCH_SIZE > 1), single articles otherwise.
+        """
+        if getattr(self.analyzer, 'batch_size', 1) > 1:
+            return self.analyzer.plan_batches(articles)
+        return [[idx] for idx in range(len(articles))]
+
+    def _assemble(self, idx: int, articles: List[Dict[str, Any]], duplicate_of: List[Optional[int]],
+                  analyses: List[Dict[str, Any]], validations: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """The full result and the frontend view of article `idx`; duplicates reuse their original's results."""
+        article = articles[idx]
+        original = duplicate_of[idx]
+        if original is None:
+            analysis, validation = analyses[idx], validations[idx]
+        else:
+            analysis, validation = dict(analyses[original]), dict(validations[original])
+
+        result = {
+            'article': article,
+            'analysis': analysis,
+            'validation': validation
+        }
+        formatted = self._format_article(idx + 1, article, analysis, validation)
+        if original is not None:
+            result['duplicate_of'] = original + 1
+            formatted['duplicateOf'] = original + 1
+        return result, formatted
+
+    def _observe_stage(self, stage: str, started: float) -> None:
+        self.metrics.stage_latency.labels(stage).observe(time.perf_counter() - started)
+
+    def _format_article(self, article_id: int, article: Dict[str, Any], analysis: Dict[str, Any], validation: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Formats one validated article for the frontend, with the topics it appeared
+        under in multi-topic runs and the model that answered a hedged analysis.
+        """
+        formatted = {
+            "id": article_id,
+            "title": article['title'],
+            "sentiment": analysis.get('sentiment', 'neutral').lower(),
+            "validationPassed": validation.get('is_valid', False),
+            "validationNote": validation.get('notes', ''),
+            "summary": analysis.get('gist', ''),
+            "url": article.get('url', '#')
         }
+        if 'topics' in article:
+            formatted['topics'] = article['topics']
+        if 'model' in analysis:
+            formatted['model'] = analysis['model']
+        return formatted
+
+    @staticmethod
+    def _cache_counts(component) -> Optional[Tuple[int, int]]:
+        """Current (hits, misses) of a component's cache, or None if it has none."""
+        cache = getattr(component, 'cache', None)
+        return (cache.hits, cache.misses) if cache is not None else None
+
+    @staticmethod
+    def _cache_delta(component, before: Tuple[int, int]) -> Tuple[int, int]:
+        """(hits, misses) recorded by a component's cache since `before`."""
+        return component.cache.hits - before[0], component.cache.misses - before[1]
+
+    def _create_log_event(self, message: str, step: str) -> Event:
+        """Helper to create a log event."""
+        return LogEvent(message, step)
@@ -0,0 +1,228 @@
+"""
+Scheduled pre-warming of the topics offered by the UI.
+Every configured topic is refreshed on an interval and its latest results kept
+as a snapshot, so /api/analyze can answer without a cold pipeline run.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Tuple
+
+from events import ArticleEvent, CloseEvent, Event, LogEvent, ResultEvent
+from news_fetcher import TOPIC_QUERIES
+
+logger = logging.getLogger(__name__)
+
+
+def merge_articles(new: List[Dict[str, Any]], old: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """
+    The newest `count` of `new` followed by the `old` articles not among them,
+    renumbered from 1 with `duplicateOf` references remapped (or dropped if
+    the original no longer made the cut).
+    """
+    fresh = {article['url'] for article in new}
+    picked = [(article, new) for article in new] + [(article, old) for article in old if article['url'] not in fresh]
+    picked = picked[:count]
+    ids = {article['url']: number for number, (article, _) in enumerate(picked, 1)}
+
+    merged = []
+    for article, source in picked:
+        article = dict(article, id=ids[article['url']])
+        original = article.pop('duplicateOf', None)
+        if original is not None:
+            original_url = next((other['url'] for other in source if other['id'] == original), None)
+            if original_url in ids:
+                article['duplicateOf'] = ids[original_url]
+        merged.append(article)
+    return merged
+
+
+class TopicSnapshot:
+    """The latest articles of a topic, replayable as the events of a finished run with fresh ids."""
+
+    def __init__(self, topic: str, count: int, articles: List[Dict[str, Any]], id: Optional[str] = None,
+                 created_at: Optional[float] = None):
+        self.id = id or f'snapshot-{uuid.uuid4().hex[:12]}'
+        self.topic = topic
+        self.count = count
+        self.articles = articles
+        self.created_at = created_at if created_at is not None else time.time()
+        # Built once: each event's JSON is then shared by every replay
+        self._events = [ArticleEvent(article) for article in articles] + [ResultEvent(articles), CloseEvent()]
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def replay(self, last_event_id: Optional[str] = None) -> List[Event]:
+        """The snapshot as SSE events, after `last_event_id` if it points into this snapshot."""
+        after = 0
+        if last_event_id:
+            snapshot_id, _, number = last_event_id.partition(':')
+            if snapshot_id == self.id and number.isdigit():
+                after = int(number)
+
+        events = [LogEvent(f"Serving results refreshed {self.age:.0f}s ago", "done")] + self._events
+        return [event.with_id(f'{self.id}:{number}') for number, event in enumerate(events, 1)][after:]
+
+
+class TopicPrewarmer:
+    """
+    Refreshes every topic in `topics` each `interval` seconds.
+
+    A topic's first refresh is a full pipeline run that sets the topic's
+    high-water mark; when a RunCoalescer is
+    given it is a shared run that a concurrent /api/analyze request for the
+    same topic joins instead of duplicating. Later refreshes are incremental
+    runs that only fetch and analyze articles past the topic's high-water
+    mark, merged into the snapshot ahead of the articles it already holds.
+    Snapshots older than `max_age` are not served.
+
+    The high-water marks are shared by every worker process, so with a
+    RunLedger only one worker (the holder of the 'prewarm' lease) refreshes
+    topics. It publishes each snapshot through the ledger, and the other
+    workers pick them up every `sync_interval` seconds and serve the same
+    results. If the refreshing worker goes away, another takes over once its
+    lease lapses.
+    """
+
+    def __init__(self, pipeline, interval: float, topics: Optional[Iterable[str]] = None, count: int = 12,
+                 max_age: Optional[float] = None, runs=None, ledger=None, sync_interval: float = 1.0):
+        self.pipeline = pipeline
+        self.interval = interval
+        self.topics = list(topics) if topics is not None else list(TOPIC_QUERIES)
+        self.count = count
+        self.max_age = max_age if max_age is not None else 2 * interval
+        self.runs = runs
+        self.ledger = ledger
+        self.sync_interval = sync_interval
+        self.snapshots: Dict[Tuple[str, int], TopicSnapshot] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._schedule())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def snapshot(self, topic: str, count: int) -> Optional[TopicSnapshot]:
+        """The warm snapshot for (topic, count), or None if there is none or it is stale."""
+        snapshot = self.snapshots.get((topic, count))
+        if snapshot is None or snapshot.age > self.max_age:
+            return None
+        return snapshot
+
+    async def refresh(self, topic: str) -> Optional[TopicSnapshot]:
+        """Run the pipeline for `topic` and keep its results. Returns the new snapshot, or None on failure."""
+        started = time.perf_counter()
+        previous = self.snapshots.get((topic, self.count))
+        articles = None
+        async with aclosing(self._run(topic, incremental=previous is not None)) as stream:
+            async for event in stream:
+                if event.event == 'error':
+                    logger.warning(f"Pre-warming '{topic}' failed, keeping the previous snapshot: {event.data}")
+                    return None
+                if event.event == 'result':
+                    articles = event.payload['articles']
+
+        if articles is None:
+            logger.warning(f"Pre-warming '{topic}' ended without a result")
+            return None
+
+        new = len(articles)
+        if previous is not None:
+            articles = merge_articles(articles, previous.articles, self.count)
+        snapshot = TopicSnapshot(topic, self.count, articles)
+        self.snapshots[(topic, self.count)] = snapshot
+        if self.ledger is not None:
+            await self.ledger.share(json.dumps(['prewarm', topic, self.count]), snapshot.id,
+                                    {'articles': articles, 'created_at': snapshot.created_at})
+        logger.info(f"Pre-warmed '{topic}' in {time.perf_counter() - started:.1f}s ({new} new articles)")
+        return snapshot
+
+    def _run(self, topic: str, incremental: bool) -> AsyncGenerator[Event, None]:
+        if incremental:
+            return self.pipeline.run(topic=topic, count=self.count, incremental=True)
+        start = lambda: self.pipeline.run(topic=topic, count=self.count, advance_mark=True)
+        if self.runs is not None:
+            return self.runs.subscribe((topic, self.count), start)
+        return start()
+
+    async def sync(self) -> None:
+        """Take over the snapshots another worker published through the ledger."""
+        known = {json.dumps(['prewarm', topic, count]): snapshot.id
+                 for (topic, count), snapshot in self.snapshots.items()}
+        for name, (version, value) in (await self.ledger.shared_since(known)).items():
+            kind, topic, count = json.loads(name)
+            if kind == 'prewarm':
+                self.snapshots[(topic, count)] = TopicSnapshot(topic, count, value['articles'], id=version,
+                                                               created_at=value['created_at'])
+
+    async def _leading(self) -> bool:
+        """Whether this worker is the one to refresh topics (always, without a ledger)."""
+        if self.ledger is None:
+            return True
+        # Renewed before every topic; a lapsed lease lets another worker take over
+        try:
+            return await self.ledger.lead('prewarm', 2 * self.interval)
+        except Exception as e:
+            logger.warning(f"Could not check the pre-warming lease: {e}")
+            return False
+
+    async def _schedule(self) -> None:
+        while True:
+            if not await self._leading():
+                # Another worker refreshes: serve what it publishes
+                waited = 0.0
+                while waited < self.interval:
+                    await self._sync_quietly()
+                    await asyncio.sleep(self.sync_interval)
+                    waited += self.sync_interval
+                continue
+            if self.ledger is not None:
+                # Merge into the latest snapshots, whichever worker refreshed them
+                await self._sync_quietly()
+            # One topic at a time, so pre-warming never competes with users for the whole rate budget
+            for topic in self.topics:
+                if not await self._leading():
+                    break
+                try:
+                    await self.refresh(topic)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Pre-warming '{topic}' crashed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def _sync_quietly(self) -> None:
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.warning(f"Could not load pre-warmed snapshots: {e}")
+
+    @classmethod
+    def from_env(cls, pipeline, runs=None) -> Optional['TopicPrewarmer']:
+        """
+        Build the pre-warmer from PREWARM_INTERVAL (0, the default, disables it),
+        PREWARM_COUNT and PREWARM_MAX_AGE.
+        """
+        interval = float(os.getenv('PREWARM_INTERVAL', '0'))
+        if interval <= 0:
+            return None
+        max_age = os.getenv('PREWARM_MAX_AGE')
+        return cls(
+            pipeline,
+            interval,
+            count=int(os.getenv('PREWARM_COUNT', '12')),
+            max_age=float(max_age) if max_age else None,
+            runs=runs,
+            ledger=runs.ledger if runs is not None else None
+        )
@@ -0,0 +1,363 @@
+"""
+Shared rate limiting for Groq LLM calls.
+Tracks requests-per-minute and tokens-per-minute budgets per model and keeps
+them in sync with the provider's x-ratelimit-* response headers. Budgets can be
+shared by several worker processes through a SQLite file.
+"""
+
+import os
+import re
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Requests / tokens per minute for the models we use (Groq free tier)
+DEFAULT_LIMITS = {
+    "llama-3.3-70b-versatile": {"rpm": 30, "tpm": 12000},
+    "llama-3.1-8b-instant": {"rpm": 30, "tpm": 6000},
+}
+FALLBACK_LIMITS = {"rpm": 30, "tpm": 6000}
+
+DEFAULT_SHARED_PATH = os.path.join('cache', 'rate_limits.sqlite3')
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a reset duration such as '7.66s', '2m59.56s', '1h2m' or '120ms' into seconds.
+    Plain numbers are treated as seconds. Returns None if the value can't be parsed.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+
+def estimate_tokens(text: str, completion_tokens: int = 0) -> int:
+    """Rough token estimate (~4 characters per token) plus the expected completion size."""
+    return len(text) // 4 + completion_tokens
+
+
+class TokenBucket:
+    """A token bucket that refills its full capacity over `period` seconds."""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.period = period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        """Return over-reserved tokens (negative amounts record extra usage as debt)."""
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def set_capacity(self, capacity: float, now: float) -> None:
+        self._refill(now)
+        self.capacity = float(capacity)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def cap_remaining(self, remaining: float, now: float) -> None:
+        """Never believe we have more budget left than the provider says we do."""
+        self._refill(now)
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class ModelBudget:
+    """Request and token budgets for a single model."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+
+
+class RateLimiter:
+    """
+    Per-model RPM/TPM limiter shared by all LLM clients in the process.
+
+    Callers `acquire()` budget before each completion and report actual usage
+    afterwards. `on_response` is an httpx response hook that feeds the
+    provider's rate-limit headers (and 429 Retry-After) back into the budgets.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self.budgets: Dict[str, ModelBudget] = {}
+
+    def budget(self, model: str) -> ModelBudget:
+        if model not in self.budgets:
+            limits = self.limits.get(model, FALLBACK_LIMITS)
+            self.budgets[model] = ModelBudget(limits["rpm"], limits["tpm"])
+        return self.budgets[model]
+
+    @contextmanager
+    def _locked(self, model: str) -> Iterator[ModelBudget]:
+        """
+        The model's budget, held for one read-modify-write. Within one process
+        the event loop already makes that atomic; SharedRateLimiter locks it.
+        """
+        yield self.budget(model)
+
+    async def _update(self, function: Callable[..., Any], *args) -> Any:
+        """Run a budget read-modify-write from async code; in-process budgets are updated inline."""
+        return function(*args)
+
+    def _try_acquire(self, model: str, tokens: int) -> float:
+        """Take one request and `tokens` tokens if available; otherwise return the seconds to wait."""
+        with self._locked(model) as budget:
+            now = time.monotonic()
+            wait = max(
+                budget.blocked_until - now,
+                budget.requests.wait_time(1, now),
+                budget.tokens.wait_time(tokens, now)
+            )
+            if wait <= 0:
+                budget.requests.take(1)
+                budget.tokens.take(tokens)
+            return wait
+
+    async def acquire(self, model: str, tokens: int) -> float:
+        """
+        Wait until one request and `tokens` tokens are available for `model`.
+
+        Returns the number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            wait = await self._update(self._try_acquire, model, tokens)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def record_usage(self, model: str, estimated_tokens: int, response) -> None:
+        """Reconcile the reserved token estimate with the `usage` reported for a completion."""
+        usage = getattr(response, 'usage', None)
+        actual = getattr(usage, 'total_tokens', None)
+        if isinstance(actual, int):
+            with self._locked(model) as budget:
+                budget.tokens.give_back(estimated_tokens - actual)
+
+    def block(self, model: str, seconds: float) -> None:
+        """Pause all calls to `model` for `seconds` (e.g. after a 429)."""
+        with self._locked(model) as budget:
+            budget.blocked_until = max(budget.blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, model: str, headers) -> None:
+        """
+        Update a model's budgets from x-ratelimit-* response headers.
+
+        Groq reports the tokens-per-minute quota in the *-tokens headers and the
+        daily request quota in the *-requests headers, so the request headers
+        only cap the bucket and pause the model once the quota is exhausted.
+        """
+        def number(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        limit_tokens = number('x-ratelimit-limit-tokens')
+        remaining_tokens = number('x-ratelimit-remaining-tokens')
+        remaining_requests = number('x-ratelimit-remaining-requests')
+        if not limit_tokens and remaining_tokens is None and remaining_requests is None:
+            return
+
+        with self._locked(model) as budget:
+            now = time.monotonic()
+            if limit_tokens:
+                budget.tokens.set_capacity(limit_tokens, now)
+
+            if remaining_tokens is not None:
+                budget.tokens.cap_remaining(remaining_tokens, now)
+
+            if remaining_requests is not None:
+                budget.requests.cap_remaining(remaining_requests, now)
+                if remaining_requests <= 0:
+                    reset = parse_reset(headers.get('x-ratelimit-reset-requests'))
+                    if reset:
+                        budget.blocked_until = max(budget.blocked_until, now + reset)
+
+    async def on_response(self, response) -> None:
+        """httpx response hook for clients talking to the chat completions endpoint."""
+        if not response.request.url.path.endswith('/chat/completions'):
+            return
+        try:
+            model = json.loads(response.request.content).get('model')
+        except (ValueError, AttributeError):
+            return
+        if not model:
+            return
+
+        await self._update(self.update_from_headers, model, response.headers)
+
+        if response.status_code == 429:
+            retry_after = parse_reset(response.headers.get('retry-after')) \
+                or parse_reset(response.headers.get('x-ratelimit-reset-tokens')) \
+                or 1.0
+            logger.warning(f"Rate limited on {model}; pausing for {retry_after:.1f}s")
+            await self._update(self.block, model, retry_after)
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    A RateLimiter whose budgets live in a SQLite file, so every worker process
+    on the host draws from one set of budgets.
+
+    Each read-modify-write of a model's budget runs in an IMMEDIATE
+    transaction (a file lock shared by all processes). Bucket timestamps are
+    stored as wall-clock times and converted to this process's monotonic clock
+    when loaded. Waiting for that lock happens in a worker thread, so another
+    worker holding it never stalls this process's event loop.
+    """
+
+    def __init__(self, path: str, limits: Optional[Dict[str, Dict[str, int]]] = None):
+        super().__init__(limits)
+        self.path = path
+        # One transaction at a time on the shared connection, whichever thread runs it
+        self._lock = threading.Lock()
+        self._pending: Set[asyncio.Future] = set()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        # Coordination state only: losing the last commits on power loss is harmless, an fsync per write is not
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS budgets (
+                model TEXT PRIMARY KEY,
+                state TEXT NOT NULL
+            )
+        ''')
+
+    @contextmanager
+    def _locked(self, model: str) -> Iterator[ModelBudget]:
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.conn.execute('SELECT state FROM budgets WHERE model = ?', (model,)).fetchone()
+                budget = self.budget(model)
+                if row is not None:
+                    self._load(budget, json.loads(row[0]))
+                yield budget
+                self.conn.execute('INSERT OR REPLACE INTO budgets (model, state) VALUES (?, ?)',
+                                  (model, json.dumps(self._dump(budget))))
+                self.conn.execute('COMMIT')
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    async def _update(self, function: Callable[..., Any], *args) -> Any:
+        return await asyncio.to_thread(function, *args)
+
+    def record_usage(self, model: str, estimated_tokens: int, response) -> None:
+        """Reconcile usage in the background, so completions never wait on the file lock."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return super().record_usage(model, estimated_tokens, response)
+        future = loop.run_in_executor(None, super().record_usage, model, estimated_tokens, response)
+        self._pending.add(future)
+        future.add_done_callback(self._reconciled)
+
+    def _reconciled(self, future: asyncio.Future) -> None:
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Could not record token usage: {future.exception()}")
+
+    @staticmethod
+    def _dump(budget: ModelBudget) -> Dict[str, Any]:
+        offset = time.time() - time.monotonic()
+        state: Dict[str, Any] = {'blocked_until': budget.blocked_until + offset}
+        for name, bucket in (('requests', budget.requests), ('tokens', budget.tokens)):
+            state[name] = {'capacity': bucket.capacity, 'tokens': bucket.tokens, 'updated': bucket.updated + offset}
+        return state
+
+    @staticmethod
+    def _load(budget: ModelBudget, state: Dict[str, Any]) -> None:
+        offset = time.time() - time.monotonic()
+        budget.blocked_until = state['blocked_until'] - offset
+        for name, bucket in (('requests', budget.requests), ('tokens', budget.tokens)):
+            bucket.capacity = state[name]['capacity']
+            bucket.tokens = state[name]['tokens']
+            bucket.updated = state[name]['updated'] - offset
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _limits_from_env() -> Dict[str, Dict[str, int]]:
+    """
+    Parse LLM_RATE_LIMITS, e.g. "llama-3.3-70b-versatile=30:12000,llama-3.1-8b-instant=30:6000".
+    """
+    limits = {}
+    for entry in filter(None, os.getenv('LLM_RATE_LIMITS', '').split(',')):
+        try:
+            model, budget = entry.strip().split('=')
+            rpm, tpm = budget.split(':')
+            limits[model] = {"rpm": int(rpm), "tpm": int(tpm)}
+        except ValueError:
+            logger.warning(f"Ignoring malformed LLM_RATE_LIMITS entry: {entry}")
+    return limits
+
+
+_shared_limiter: Optional[RateLimiter] = None
+
+
+def shared_budget_path() -> str:
+    """
+    RATE_LIMIT_PATH, the file budgets are shared through. It defaults to
+    cache/rate_limits.sqlite3 when several workers serve the API
+    (WEB_CONCURRENCY > 1) and to in-process budgets otherwise.
+    """
+    default = DEFAULT_SHARED_PATH if int(os.getenv('WEB_CONCURRENCY', '1')) > 1 else ''
+    return os.getenv('RATE_LIMIT_PATH', default)
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter shared by LLMAnalyzer and LLMValidator."""
+    global _shared_limiter
+    if _shared_limiter is None:
+        path = shared_budget_path()
+        _shared_limiter = SharedRateLimiter(path, _limits_from_env()) if path else RateLimiter(_limits_from_env())
+    return _shared_limiter
@@ -0,0 +1,257 @@
+"""
+Retries and circuit breaking for calls to upstream APIs (NewsAPI, Groq).
+Transient failures (429, 5xx, timeouts, connection errors) are retried with
+exponential backoff and full jitter, honoring Retry-After, within a per-call
+deadline. A per-upstream circuit breaker fails calls fast while the provider
+keeps failing; 429s are left to backoff and the rate limiter instead.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+from openai import APIConnectionError
+
+from metrics import get_metrics
+from rate_limiter import parse_reset
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, upstream: str, retry_in: float):
+        super().__init__(f"{upstream} is unavailable (circuit open, retrying in {retry_in:.0f}s)")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+def status_code(error: BaseException) -> Optional[int]:
+    """The HTTP status behind an openai.APIStatusError or httpx.HTTPStatusError, if any."""
+    status = getattr(error, 'status_code', None)
+    if status is None and isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for failures worth retrying: 429, 5xx, timeouts and connection errors."""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError, APIConnectionError)):
+        return True
+    return status_code(error) in RETRYABLE_STATUS
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """
+    Seconds the upstream asked us to wait, from the failed response's
+    retry-after-ms or Retry-After header (delta seconds or an HTTP date).
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if headers is None:
+        return None
+
+    millis = headers.get('retry-after-ms')
+    if millis:
+        try:
+            return max(0.0, float(millis) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    seconds = parse_reset(value)
+    if seconds is not None:
+        return max(0.0, seconds)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    How often and how long to retry a call.
+
+    `attempts` bounds the tries, `attempt_timeout` each try and `deadline` the
+    whole call including waits; a wait that would overrun the deadline is not
+    taken. Waits are full-jitter exponential backoff (uniform up to
+    `base_delay * 2**n`, capped at `max_delay`), but never shorter than the
+    upstream's Retry-After.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 20.0,
+                 attempt_timeout: float = 60.0, deadline: float = 90.0):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+
+    def backoff(self, retry: int, error: Optional[BaseException] = None) -> float:
+        """Seconds to wait before retry number `retry` (1-based) after `error`."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+        requested = retry_after(error) if error is not None else None
+        return max(delay, requested or 0.0)
+
+    @classmethod
+    def from_env(cls) -> 'RetryPolicy':
+        """Build a policy from RETRY_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY, RETRY_ATTEMPT_TIMEOUT and RETRY_DEADLINE."""
+        return cls(
+            attempts=int(os.getenv('RETRY_ATTEMPTS', '3')),
+            base_delay=float(os.getenv('RETRY_BASE_DELAY', '0.5')),
+            max_delay=float(os.getenv('RETRY_MAX_DELAY', '20')),
+            attempt_timeout=float(os.getenv('RETRY_ATTEMPT_TIMEOUT', '60')),
+            deadline=float(os.getenv('RETRY_DEADLINE', '90'))
+        )
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream.
+
+    After `failure_threshold` retryable failures in a row the circuit opens
+    and calls fail fast with CircuitOpenError. Rate limiting (429) is not a
+    failure: it says the budget is spent, not that the upstream is down.
+    Upstreams are keyed as finely as they fail, e.g. 'groq:<model>'. Once `reset_timeout` seconds
+    have passed a single probe call is let through (half-open): its success
+    closes the circuit, its failure opens it again.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+    # Gauge values for circuit_breaker_state
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, upstream: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.upstream = upstream
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.state = self.CLOSED
+        self._probing = False
+        self._set_state(self.CLOSED)
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        if self.state == self.CLOSED:
+            return
+        retry_in = self.opened_at + self.reset_timeout - time.monotonic()
+        if self.state == self.OPEN and retry_in <= 0:
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return
+        get_metrics().record_breaker_rejection(self.upstream)
+        raise CircuitOpenError(self.upstream, max(0.0, retry_in))
+
+    def release(self) -> None:
+        """Forget a call that ended without a verdict (e.g. was cancelled)."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._probing = False
+        if self.state != self.CLOSED:
+            logger.info(f"{self.upstream} recovered; closing the circuit")
+            self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            logger.warning(f"{self.upstream} failing ({self.failures} in a row); "
+                           f"opening the circuit for {self.reset_timeout:.0f}s")
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        get_metrics().set_breaker_state(self.upstream, self.STATE_VALUES[state])
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(upstream: str) -> CircuitBreaker:
+    """
+    Return the process-wide breaker for `upstream`, configured from
+    BREAKER_FAILURE_THRESHOLD and BREAKER_RESET_TIMEOUT.
+    """
+    if upstream not in _breakers:
+        _breakers[upstream] = CircuitBreaker(
+            upstream,
+            failure_threshold=int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5')),
+            reset_timeout=float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+        )
+    return _breakers[upstream]
+
+
+async def call_with_retry(upstream: str, call: Callable[[], Awaitable[T]],
+                          policy: Optional[RetryPolicy] = None,
+                          breaker: Optional[CircuitBreaker] = None,
+                          before_attempt: Optional[Callable[[], Awaitable[None]]] = None) -> T:
+    """
+    Await `call()` until it succeeds, retrying retryable failures per `policy`.
+
+    Every attempt first asks the upstream's breaker; the last error is raised
+    once attempts or the deadline run out, non-retryable errors immediately.
+    Non-retryable errors still count as a healthy upstream for the breaker.
+
+    `before_attempt()` (e.g. acquiring local rate-limit budget) is awaited
+    before each attempt, outside its timeout: the time it takes doesn't count
+    against the deadline, and its errors are raised without touching the breaker.
+    """
+    policy = policy or RetryPolicy.from_env()
+    breaker = breaker or get_breaker(upstream)
+    deadline = time.monotonic() + policy.deadline
+    attempt = 0
+    while True:
+        attempt += 1
+        breaker.before_call()
+        if before_attempt is not None:
+            waited = time.monotonic()
+            try:
+                await before_attempt()
+            except BaseException:
+                breaker.release()
+                raise
+            deadline += time.monotonic() - waited
+        remaining = deadline - time.monotonic()
+        try:
+            result = await asyncio.wait_for(call(), min(policy.attempt_timeout, max(0.0, remaining)))
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.record_success()
+                raise
+            if status_code(e) == 429:
+                breaker.release()
+            else:
+                breaker.record_failure()
+            if attempt >= policy.attempts:
+                raise
+            delay = policy.backoff(attempt, e)
+            if time.monotonic() + delay >= deadline:
+                logger.warning(f"{upstream} call failed and a {delay:.1f}s retry would overrun the deadline: {e!r}")
+                raise
+            reason = status_code(e) or type(e).__name__
+            get_metrics().record_retry(upstream, str(reason))
+            logger.warning(f"{upstream} call failed ({reason}); retry {attempt} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
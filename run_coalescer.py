@@ -0,0 +1,242 @@
+"""
+Single-flight coalescing of identical pipeline runs.
+Concurrent requests for the same key share one run whose events are
+broadcast to every subscriber; late joiners replay what was already emitted.
+Every event gets a run-scoped id so a dropped client can resume where it left off.
+"""
+
+import json
+import uuid
+import asyncio
+import logging
+from collections import deque
+from contextlib import aclosing
+from typing import AsyncGenerator, AsyncIterator, Callable, Deque, Dict, Hashable, Optional, Set, Tuple
+
+from events import Event
+
+logger = logging.getLogger(__name__)
+
+
+class SharedRun:
+    """
+    One in-flight event stream fanned out to any number of subscribers.
+
+    Events are numbered from 1 and tagged with an `id` of the form
+    "<run id>:<number>". Only the last `buffer_size` events are kept for
+    replay (all of them if `buffer_size` is None).
+    """
+
+    def __init__(self, key: Hashable, source: AsyncIterator[Event], buffer_size: Optional[int] = None,
+                 run_id: Optional[str] = None):
+        self.key = key
+        self.id = run_id or uuid.uuid4().hex[:12]
+        self.history: Deque[Event] = deque(maxlen=buffer_size)
+        self.emitted = 0
+        self.subscribers = 0
+        self.done = False
+        self._updated = asyncio.Event()
+        self._cancel_handle: Optional[asyncio.TimerHandle] = None
+        self._task = asyncio.create_task(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator[Event]) -> None:
+        try:
+            async with aclosing(source) as events:
+                async for event in events:
+                    self.history.append(event.with_id(f'{self.id}:{self.emitted + 1}'))
+                    self.emitted += 1
+                    self._notify()
+        except asyncio.CancelledError:
+            logger.info(f"Shared run {self.key} cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Shared run {self.key} failed: {e}")
+        finally:
+            self.done = True
+            self._notify()
+
+    def _notify(self) -> None:
+        # Wake everyone waiting on the current event, then arm a fresh one
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def events(self, after: int = 0) -> AsyncGenerator[Event, None]:
+        """Replay the buffered events numbered above `after`, then follow live events until the run finishes."""
+        position = after
+        while True:
+            while position < self.emitted:
+                oldest = self.emitted - len(self.history) + 1
+                if position + 1 < oldest:
+                    logger.warning(f"Run {self.key}: events {position + 1}-{oldest - 1} fell out of the replay buffer")
+                    position = oldest - 1
+                yield self.history[position + 1 - oldest]
+                position += 1
+            if self.done:
+                return
+            await self._updated.wait()
+
+    async def wait(self) -> None:
+        """Wait until the run has finished, failed or been cancelled."""
+        await asyncio.wait({self._task})
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+    def cancel_later(self, delay: float, callback: Callable[['SharedRun'], None]) -> None:
+        """Cancel the run after `delay` seconds unless a subscriber returns first."""
+        def expire():
+            self._cancel_handle = None
+            if self.subscribers == 0 and not self.done:
+                self.cancel()
+                callback(self)
+        self._cancel_handle = asyncio.get_running_loop().call_later(delay, expire)
+
+    def keep(self) -> None:
+        """Call off a pending `cancel_later`."""
+        if self._cancel_handle is not None:
+            self._cancel_handle.cancel()
+            self._cancel_handle = None
+
+    def on_done(self, callback: Callable[['SharedRun'], None]) -> None:
+        self._task.add_done_callback(lambda _: callback(self))
+
+
+class RunCoalescer:
+    """
+    Registry of shared runs keyed by request parameters.
+
+    A run starts with its first subscriber and is removed once it finishes.
+    When its last subscriber disconnects it is cancelled after `resume_grace`
+    seconds (immediately by default) unless someone resumes it in the meantime.
+    Finished runs stay resumable by event id for `retention` seconds.
+
+    With a RunLedger, runs are also shared with the other worker processes:
+    a key already running in another worker is followed through the ledger.
+    A run that other workers follow outlives its local subscribers; its
+    followers are checked every `follower_check` seconds, and once they are
+    gone too the run is cancelled like any other.
+    """
+
+    def __init__(self, buffer_size: Optional[int] = None, resume_grace: float = 0.0, retention: float = 0.0,
+                 ledger=None, follower_check: float = 1.0):
+        self.buffer_size = buffer_size
+        self.resume_grace = resume_grace
+        self.retention = retention
+        self.ledger = ledger
+        self.follower_check = follower_check
+        self.runs: Dict[Hashable, SharedRun] = {}
+        self.resumable: Dict[str, SharedRun] = {}
+        # Ids of ledger runs this worker owns
+        self.published: Set[str] = set()
+        # Owned runs kept alive only by other workers' followers
+        self._watchers: Dict[str, asyncio.Task] = {}
+        # Runs being claimed in the ledger, so concurrent subscribers wait for the same one
+        self._starting: Dict[Hashable, asyncio.Future] = {}
+
+    async def subscribe(self, key: Hashable, start: Callable[[], AsyncIterator[Event]],
+                        last_event_id: Optional[str] = None) -> AsyncGenerator[Event, None]:
+        """
+        Stream the events of the run for `key`, starting it via `start()` if none is in flight.
+
+        With the `last_event_id` of an earlier subscription to a run that is still
+        known, only the events after it are streamed and no new run is started.
+        """
+        run, after = self._resume_point(key, last_event_id)
+        if run is not None:
+            logger.info(f"Resuming run {key} after event {after} ({run.emitted - after} events to replay)")
+        else:
+            run, after = self.runs.get(key), 0
+            if run is None or run.done:
+                run = await self._start(key, start)
+            else:
+                logger.info(f"Joining in-flight run {key} ({run.emitted} events to replay)")
+
+        run.keep()
+        run.subscribers += 1
+        try:
+            async for event in run.events(after):
+                yield event
+        finally:
+            run.subscribers -= 1
+            self._release(run)
+
+    def _release(self, run: SharedRun) -> None:
+        """Once a run has neither local subscribers nor followers in other workers, let it go."""
+        if run.subscribers > 0 or run.done:
+            return
+        if run.id in self.published:
+            # Other workers may be following it: ask the ledger without blocking the loop
+            if run.id not in self._watchers:
+                self._watchers[run.id] = asyncio.create_task(self._watch_followers(run))
+            return
+        self._let_go(run)
+
+    def _let_go(self, run: SharedRun) -> None:
+        if self.resume_grace > 0:
+            run.cancel_later(self.resume_grace, self._forget)
+        else:
+            run.cancel()
+            self._forget(run)
+
+    async def _watch_followers(self, run: SharedRun) -> None:
+        try:
+            while run.subscribers == 0 and not run.done and await self.ledger.followers(run.id) > 0:
+                await asyncio.sleep(self.follower_check)
+        finally:
+            del self._watchers[run.id]
+        if run.subscribers == 0 and not run.done:
+            self._let_go(run)
+
+    async def _start(self, key: Hashable, start: Callable[[], AsyncIterator[Event]]) -> SharedRun:
+        """Start and register the run for `key`, or wait for the one another subscriber is starting."""
+        while key in self._starting:
+            await asyncio.wait({self._starting[key]})
+            run = self.runs.get(key)
+            if run is not None and not run.done:
+                return run
+        pending = self._starting[key] = asyncio.get_running_loop().create_future()
+        try:
+            run = await self._create(key, start)
+            self.runs[key] = run
+            self.resumable[run.id] = run
+            run.on_done(self._finished)
+            return run
+        finally:
+            del self._starting[key]
+            pending.set_result(None)
+
+    async def _create(self, key: Hashable, start: Callable[[], AsyncIterator[Event]]) -> SharedRun:
+        if self.ledger is None:
+            return SharedRun(key, start(), self.buffer_size)
+        run_id, owned = await self.ledger.claim(json.dumps(key))
+        if owned:
+            self.published.add(run_id)
+            return SharedRun(key, self.ledger.publish(run_id, start()), self.buffer_size, run_id=run_id)
+        logger.info(f"Following run {key} from another worker")
+        return SharedRun(key, self.ledger.follow(run_id), self.buffer_size, run_id=run_id)
+
+    def _resume_point(self, key: Hashable, last_event_id: Optional[str]) -> Tuple[Optional[SharedRun], int]:
+        """The run and event number a Last-Event-ID points at, or (None, 0) if it can't be resumed."""
+        if not last_event_id:
+            return None, 0
+        run_id, _, number = last_event_id.partition(':')
+        run = self.resumable.get(run_id)
+        if run is None or run.key != key or not number.isdigit() or int(number) > run.emitted:
+            return None, 0
+        return run, int(number)
+
+    def _finished(self, run: SharedRun) -> None:
+        self._forget_key(run)
+        if self.retention > 0:
+            asyncio.get_running_loop().call_later(self.retention, self._forget, run)
+        else:
+            self._forget(run)
+
+    def _forget_key(self, run: SharedRun) -> None:
+        if self.runs.get(run.key) is run:
+            del self.runs[run.key]
+
+    def _forget(self, run: SharedRun) -> None:
+        self._forget_key(run)
+        self.resumable.pop(run.id, None)
+        self.published.discard(run.id)
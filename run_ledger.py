@@ -0,0 +1,265 @@
+"""
+Cross-process coordination of shared pipeline runs.
+When several worker processes serve the API, the first to claim a run key in
+a SQLite ledger runs the pipeline and appends its events there; the other
+workers follow those events instead of starting a duplicate run. The ledger
+also elects one worker per background role (leases) and shares the values
+that worker produces (e.g. pre-warmed snapshots) with the others.
+"""
+
+import os
+import time
+import uuid
+import socket
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from events import ErrorEvent, Event, dumps, loads
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEDGER_PATH = os.path.join('cache', 'runs.sqlite3')
+
+
+class RunLedger:
+    """
+    SQLite table of in-flight runs and their events, shared by the workers of one host.
+
+    A run's owner refreshes its heartbeat while the run is alive; a run whose
+    heartbeat is older than `lease` seconds is considered abandoned, so its key
+    can be claimed again and its followers stop waiting. Finished runs and
+    their events are deleted after `retention` seconds.
+
+    The ledger is on the path of every shared event, and another worker may
+    hold the file lock for up to the busy timeout, so every statement runs in
+    a worker thread, one at a time on the shared connection, and never blocks
+    the event loop.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_PATH, lease: float = 30.0, poll_interval: float = 0.05,
+                 retention: float = 300.0):
+        self.path = path
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        # Coordination state only: losing the last commits on power loss is harmless, an fsync per write is not
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                key TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                heartbeat REAL NOT NULL,
+                followers INTEGER NOT NULL DEFAULT 0,
+                finished_at REAL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS runs_key ON runs (key, finished_at)')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS run_events (
+                run_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                PRIMARY KEY (run_id, seq)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS leases (
+                role TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS shared_values (
+                name TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                value TEXT NOT NULL
+            )
+        ''')
+
+    async def _call(self, function: Callable[..., Any], *args) -> Any:
+        """Run `function(*args)` against the connection in a worker thread."""
+        return await asyncio.to_thread(self._locked, function, *args)
+
+    def _locked(self, function: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            return function(*args)
+
+    def _execute(self, sql: str, params: Tuple = ()) -> None:
+        self.conn.execute(sql, params)
+
+    def _fetchone(self, sql: str, params: Tuple = ()) -> Optional[Tuple]:
+        return self.conn.execute(sql, params).fetchone()
+
+    async def claim(self, key: str) -> Tuple[str, bool]:
+        """
+        The id of the live run for `key` and whether this worker now owns it.
+        A new run is registered (and owned) unless another worker's is alive.
+        """
+        return await self._call(self._claim, key)
+
+    def _claim(self, key: str) -> Tuple[str, bool]:
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute(
+                'SELECT id FROM runs WHERE key = ? AND finished_at IS NULL AND heartbeat > ? '
+                'ORDER BY heartbeat DESC LIMIT 1',
+                (key, now - self.lease)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute('COMMIT')
+                return row[0], False
+
+            run_id = uuid.uuid4().hex[:12]
+            self.conn.execute('INSERT INTO runs (id, key, owner, heartbeat) VALUES (?, ?, ?, ?)',
+                              (run_id, key, self.worker_id, now))
+            self._purge(now)
+            self.conn.execute('COMMIT')
+            return run_id, True
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    def _purge(self, now: float) -> None:
+        """Forget finished or abandoned runs past the retention period."""
+        cutoff = now - self.retention
+        self.conn.execute('DELETE FROM run_events WHERE run_id IN '
+                          '(SELECT id FROM runs WHERE COALESCE(finished_at, heartbeat) < ?)', (cutoff,))
+        self.conn.execute('DELETE FROM runs WHERE COALESCE(finished_at, heartbeat) < ?', (cutoff,))
+
+    async def publish(self, run_id: str,
+                      source: AsyncIterator[Event]) -> AsyncGenerator[Event, None]:
+        """Pass the owned run's events through, appending each to the ledger and keeping the run alive."""
+        heartbeat = asyncio.create_task(self._heartbeat(run_id))
+        seq = 0
+        try:
+            async for event in source:
+                seq += 1
+                await self._call(self._execute, 'INSERT INTO run_events (run_id, seq, event) VALUES (?, ?, ?)',
+                                 (run_id, seq, dumps([event.event, event.data])))
+                yield event
+        finally:
+            heartbeat.cancel()
+            await self._call(self._execute, 'UPDATE runs SET finished_at = ? WHERE id = ?', (time.time(), run_id))
+
+    async def _heartbeat(self, run_id: str) -> None:
+        while True:
+            await self._call(self._execute, 'UPDATE runs SET heartbeat = ? WHERE id = ?', (time.time(), run_id))
+            await asyncio.sleep(self.lease / 3)
+
+    async def follow(self, run_id: str) -> AsyncGenerator[Event, None]:
+        """
+        Yield the events of a run owned by another worker as they are appended,
+        until it finishes. If its owner stops responding an error event ends the stream.
+        """
+        await self._call(self._execute, 'UPDATE runs SET followers = followers + 1 WHERE id = ?', (run_id,))
+        seq = 0
+        try:
+            while True:
+                rows = await self._call(self._events_after, run_id, seq)
+                for seq, event in rows:
+                    yield _event(event)
+                if rows:
+                    continue
+
+                row = await self._call(self._fetchone, 'SELECT heartbeat, finished_at FROM runs WHERE id = ?',
+                                       (run_id,))
+                if row is None or row[1] is not None:
+                    # Finished: pick up anything appended between the two reads
+                    for seq, event in await self._call(self._events_after, run_id, seq):
+                        yield _event(event)
+                    return
+                if row[0] < time.time() - self.lease:
+                    logger.warning(f"Run {run_id} was abandoned by its worker")
+                    yield ErrorEvent("The worker running this analysis stopped responding.")
+                    return
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            await self._call(self._execute, 'UPDATE runs SET followers = followers - 1 WHERE id = ?', (run_id,))
+
+    def _events_after(self, run_id: str, seq: int) -> List[Tuple[int, str]]:
+        return self.conn.execute(
+            'SELECT seq, event FROM run_events WHERE run_id = ? AND seq > ? ORDER BY seq', (run_id, seq)
+        ).fetchall()
+
+    async def lead(self, role: str, term: float) -> bool:
+        """
+        Whether this worker holds `role` for the next `term` seconds. A free
+        or expired role is taken and one this worker holds is renewed.
+        """
+        return await self._call(self._lead, role, term)
+
+    def _lead(self, role: str, term: float) -> bool:
+        now = time.time()
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute('SELECT owner, expires_at FROM leases WHERE role = ?', (role,)).fetchone()
+            held = row is None or row[0] == self.worker_id or row[1] < now
+            if held:
+                self.conn.execute('INSERT OR REPLACE INTO leases (role, owner, expires_at) VALUES (?, ?, ?)',
+                                  (role, self.worker_id, now + term))
+            self.conn.execute('COMMIT')
+            return held
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+
+    async def share(self, name: str, version: str, value: Any) -> None:
+        """Publish `value` under `name` for the other workers; `version` identifies it."""
+        await self._call(self._execute, 'INSERT OR REPLACE INTO shared_values (name, version, value) VALUES (?, ?, ?)',
+                         (name, version, dumps(value)))
+
+    async def shared_since(self, known: Dict[str, str]) -> Dict[str, Tuple[str, Any]]:
+        """The (version, value) of every shared value whose version differs from `known[name]`."""
+        return await self._call(self._shared_since, known)
+
+    def _shared_since(self, known: Dict[str, str]) -> Dict[str, Tuple[str, Any]]:
+        changed = {}
+        for name, version in self.conn.execute('SELECT name, version FROM shared_values').fetchall():
+            if known.get(name) == version:
+                continue
+            row = self.conn.execute('SELECT version, value FROM shared_values WHERE name = ?', (name,)).fetchone()
+            if row is not None:
+                changed[name] = row[0], loads(row[1])
+        return changed
+
+    async def followers(self, run_id: str) -> int:
+        """How many streams on other workers are following the run."""
+        row = await self._call(self._fetchone, 'SELECT followers FROM runs WHERE id = ?', (run_id,))
+        return row[0] if row is not None else 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    @classmethod
+    def from_env(cls) -> Optional['RunLedger']:
+        """
+        Build the ledger from RUN_LEDGER_PATH, which defaults to
+        cache/runs.sqlite3 when several workers serve the API (WEB_CONCURRENCY > 1).
+        Returns None (runs coordinated within one process only) if it is empty.
+        """
+        default = DEFAULT_LEDGER_PATH if int(os.getenv('WEB_CONCURRENCY', '1')) > 1 else ''
+        path = os.getenv('RUN_LEDGER_PATH', default)
+        return cls(path) if path else None
+
+
+def _event(row: str) -> Event:
+    """An event as appended by `publish`: its type and serialized data."""
+    name, data = loads(row)
+    return Event(name, data=data)
@@ -0,0 +1,138 @@
+"""
+Tier-0 validation: a local lexicon-based sentiment scorer.
+Confirms an LLM#1 sentiment label without an LLM call when the lexicon
+agrees with it confidently; everything else still goes to LLM#2.
+"""
+
+import re
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+# Word polarity in [-1, 1], tuned for news copy
+LEXICON = {
+    # positive
+    'achieve': 0.6, 'achieved': 0.6, 'advance': 0.4, 'agreement': 0.4, 'approve': 0.4, 'approved': 0.4,
+    'benefit': 0.6, 'benefits': 0.6, 'best': 0.7, 'boost': 0.6, 'boosted': 0.6, 'boosts': 0.6,
+    'breakthrough': 0.8, 'celebrate': 0.7, 'celebrated': 0.7, 'confidence': 0.5, 'cooperation': 0.5,
+    'efficient': 0.5, 'expand': 0.4, 'expansion': 0.4, 'gain': 0.5, 'gains': 0.5, 'good': 0.5,
+    'grow': 0.4, 'growth': 0.5, 'historic': 0.5, 'hope': 0.5, 'improve': 0.6, 'improved': 0.6,
+    'improvement': 0.6, 'innovation': 0.5, 'innovative': 0.5, 'launch': 0.3, 'launched': 0.3,
+    'milestone': 0.6, 'optimism': 0.7, 'optimistic': 0.7, 'peace': 0.6, 'praise': 0.7, 'praised': 0.7,
+    'progress': 0.6, 'prosperity': 0.7, 'rally': 0.5, 'rallied': 0.5, 'record': 0.3, 'recover': 0.5,
+    'recovery': 0.5, 'relief': 0.5, 'rise': 0.3, 'rises': 0.3, 'robust': 0.6, 'safe': 0.4,
+    'secure': 0.4, 'strong': 0.5, 'stronger': 0.5, 'succeed': 0.7, 'success': 0.7, 'successful': 0.7,
+    'support': 0.3, 'surge': 0.4, 'thrive': 0.7, 'top': 0.3, 'upbeat': 0.7, 'welcome': 0.5,
+    'welcomed': 0.5, 'win': 0.6, 'wins': 0.6, 'won': 0.6,
+    # negative
+    'accused': -0.6, 'alarm': -0.6, 'anger': -0.7, 'attack': -0.8, 'attacks': -0.8, 'ban': -0.4,
+    'bankrupt': -0.8, 'bankruptcy': -0.8, 'collapse': -0.8, 'concern': -0.4, 'concerns': -0.4,
+    'conflict': -0.6, 'corruption': -0.8, 'crash': -0.8, 'crisis': -0.8, 'criticism': -0.5,
+    'criticised': -0.5, 'criticized': -0.5, 'cut': -0.3, 'cuts': -0.3, 'damage': -0.6, 'dead': -0.9,
+    'deadly': -0.9, 'death': -0.9, 'deaths': -0.9, 'debt': -0.3, 'decline': -0.5, 'declined': -0.5,
+    'deficit': -0.4, 'delay': -0.4, 'delayed': -0.4, 'disaster': -0.9, 'dispute': -0.5,
+    'downturn': -0.6, 'drop': -0.4, 'dropped': -0.4, 'fail': -0.7, 'failed': -0.7, 'failure': -0.7,
+    'fall': -0.4, 'falls': -0.4, 'fear': -0.6, 'fears': -0.6, 'fraud': -0.8, 'hit': -0.3,
+    'injured': -0.7, 'kill': -0.9, 'killed': -0.9, 'kills': -0.9, 'layoffs': -0.7, 'loss': -0.6,
+    'losses': -0.6, 'outage': -0.6, 'plunge': -0.7, 'plunged': -0.7, 'protest': -0.5, 'protests': -0.5,
+    'recession': -0.8, 'risk': -0.4, 'risks': -0.4, 'scandal': -0.8, 'shortage': -0.6, 'slump': -0.7,
+    'slowdown': -0.5, 'struggle': -0.5, 'struggling': -0.5, 'tension': -0.5, 'tensions': -0.5,
+    'threat': -0.6, 'threats': -0.6, 'turmoil': -0.7, 'uncertainty': -0.5, 'violence': -0.9,
+    'war': -0.8, 'warn': -0.5, 'warned': -0.5, 'warning': -0.5, 'worst': -0.8, 'worry': -0.5,
+    'worries': -0.5,
+}
+
+NEGATORS = frozenset({'not', 'no', 'never', 'without', "n't", 'nor', 'hardly'})
+
+# A compound score beyond this is polar; inside it is neutral
+POLARITY_THRESHOLD = 0.25
+# Normalization constant for the compound score. VADER's 15 is sized for valences
+# in [-4, 4]; scaled to this lexicon's [-1, 1] it is about 1, so one strong word
+# scores ~0.67 and two agreeing ones ~0.8
+ALPHA = 1.0
+# Polar words that must balance out before a "neutral" verdict is trusted fully;
+# a text without any carries no evidence of neutrality, only of an unknown vocabulary
+MIN_NEUTRAL_HITS = 3
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|n't")
+
+
+class LexiconSentimentScorer:
+    """
+    Scores a whole batch of texts in one pass.
+
+    Every text is tokenized once and looked up against a shared vocabulary;
+    per-text polarity sums are then turned into a label and a confidence.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None):
+        self.lexicon = lexicon or LEXICON
+
+    def score_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """Return a (label, confidence) pair per text, label in positive/negative/neutral."""
+        tokenized = [_TOKEN.findall((text or '').lower()) for text in texts]
+        lookup = self.lexicon.get
+
+        totals = []
+        hit_counts = []
+        for tokens in tokenized:
+            total = 0.0
+            hits = 0
+            negate = False
+            for token in tokens:
+                if token in NEGATORS:
+                    negate = True
+                    continue
+                polarity = lookup(token)
+                if polarity is not None:
+                    total += -polarity if negate else polarity
+                    hits += 1
+                negate = False
+            totals.append(total)
+            hit_counts.append(hits)
+
+        return [self._label(total, hits) for total, hits in zip(totals, hit_counts)]
+
+    @staticmethod
+    def _label(total: float, hits: int) -> Tuple[str, float]:
+        compound = total / math.sqrt(total * total + ALPHA)
+        if compound >= POLARITY_THRESHOLD:
+            return 'positive', compound
+        if compound <= -POLARITY_THRESHOLD:
+            return 'negative', -compound
+        # Neutral: confident only when enough polar words were found and cancel out
+        evidence = min(1.0, hits / MIN_NEUTRAL_HITS)
+        return 'neutral', (1.0 - abs(compound) / POLARITY_THRESHOLD) * evidence
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    return f"{article.get('title', '')}. {article.get('description', '')} {article.get('content', '')}"
+
+
+class LocalPrecheck:
+    """
+    Decides which analyses can skip LLM validation.
+
+    An analysis is locally confirmed when the lexicon label matches its
+    sentiment with at least `min_confidence`.
+    """
+
+    def __init__(self, min_confidence: float = 0.75, scorer: Optional[LexiconSentimentScorer] = None):
+        self.min_confidence = min_confidence
+        self.scorer = scorer or LexiconSentimentScorer()
+
+    def score_articles(self, articles: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        return self.scorer.score_batch([article_text(article) for article in articles])
+
+    def confirm(self, score: Tuple[str, float], analysis: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """A validation result if the local score confirms `analysis`, otherwise None."""
+        if 'error' in analysis:
+            return None
+        label, confidence = score
+        if confidence < self.min_confidence or str(analysis.get('sentiment', '')).lower() != label:
+            return None
+        return {
+            'is_valid': True,
+            'notes': f"Locally confirmed: lexicon sentiment '{label}' (confidence {confidence:.2f}) "
+                     f"agrees with the analysis.",
+            'validated_by': 'local'
+        }
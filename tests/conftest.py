@@ -0,0 +1,33 @@
+import pytest
+
+import metrics
+import rate_limiter
+import resilience
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter(monkeypatch):
+    """Give every test its own in-process limiter so budgets don't leak between tests."""
+    monkeypatch.setattr(rate_limiter, '_shared_limiter', None)
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    monkeypatch.delenv('RATE_LIMIT_PATH', raising=False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    """Give every test closed circuit breakers and short retry backoff."""
+    monkeypatch.setattr(resilience, '_breakers', {})
+    monkeypatch.setenv('RETRY_BASE_DELAY', '0.01')
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    """Start every test with empty process-wide metrics."""
+    monkeypatch.setattr(metrics, '_shared_metrics', None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(monkeypatch, tmp_path):
+    """Keep articles and high-water marks written under test out of the real cache directory."""
+    monkeypatch.setenv('ARTICLE_STORE_PATH', str(tmp_path / 'articles.sqlite3'))
+    monkeypatch.setenv('WATERMARK_PATH', str(tmp_path / 'watermarks.sqlite3'))
@@ -121,6 +121,127 @@ class TestLLMAnalyzer:
             assert 'gist' in result
             assert 'error' in result or result['gist'] == 'Unable to analyze article'
 
+def make_articles(n):
+    return [dict(SAMPLE_ARTICLE, title=f'Article {i}', url=f'https://example.com/{i}') for i in range(n)]
+
+def completion(content):
+    """Mock chat completion response with the given message content."""
+    mock_choice = Mock()
+    mock_choice.message.content = content
+    mock_response = Mock()
+    mock_response.choices = [mock_choice]
+    return mock_response
+
+@pytest.mark.asyncio
+class TestLLMAnalyzerBatch:
+    """Test batched analysis."""
+
+    @pytest.fixture
+    def analyzer(self):
+        with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key', 'ANALYSIS_BATCH_SIZE': '4'}):
+            return LLMAnalyzer()
+
+    def test_plan_batches_respects_size_and_token_budget(self, analyzer):
+        """Batches hold at most batch_size articles and stay within the token budget."""
+        assert analyzer.plan_batches(make_articles(10)) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+        analyzer.batch_token_budget = 60
+        assert all(len(batch) <= 2 for batch in analyzer.plan_batches(make_articles(10)))
+
+    async def test_batch_maps_results_by_index(self, analyzer):
+        """Results come back in article order even if the model reorders them."""
+        items = [dict(SAMPLE_ANALYSIS, index=i, gist=f'Gist {i}') for i in (2, 0, 1)]
+        analyzer.client.chat.completions.create = AsyncMock(return_value=completion(json.dumps({'results': items})))
+
+        results = await analyzer.analyze_batch(make_articles(3))
+
+        assert [r['gist'] for r in results] == ['Gist 0', 'Gist 1', 'Gist 2']
+        assert analyzer.client.chat.completions.create.await_count == 1
+
+    async def test_incomplete_batch_falls_back_per_article(self, analyzer):
+        """Items missing from the batch response are analyzed individually."""
+        batch = json.dumps({'results': [dict(SAMPLE_ANALYSIS, index=0), {'index': 1, 'gist': 'no sentiment'}]})
+        analyzer.client.chat.completions.create = AsyncMock(side_effect=[
+            completion(batch),
+            completion(json.dumps(dict(SAMPLE_ANALYSIS, gist='Single'))),
+            completion(json.dumps(dict(SAMPLE_ANALYSIS, gist='Single'))),
+        ])
+
+        results = await analyzer.analyze_batch(make_articles(3))
+
+        assert results[0]['gist'] == SAMPLE_ANALYSIS['gist']
+        assert results[1]['gist'] == results[2]['gist'] == 'Single'
+        assert analyzer.client.chat.completions.create.await_count == 3
+
+    async def test_malformed_batch_falls_back_per_article(self, analyzer):
+        """A batch response that isn't the expected JSON is retried article by article."""
+        analyzer.client.chat.completions.create = AsyncMock(side_effect=[
+            completion("Sorry, I can't do that"),
+            completion(json.dumps(SAMPLE_ANALYSIS)),
+            completion(json.dumps(SAMPLE_ANALYSIS)),
+        ])
+
+        results = await analyzer.analyze_batch(make_articles(2))
+
+        assert all(r['gist'] == SAMPLE_ANALYSIS['gist'] for r in results)
+        assert analyzer.client.chat.completions.create.await_count == 3
+
+class FakeStream:
+    """Async iterator of chat completion chunks, like openai's AsyncStream."""
+
+    def __init__(self, pieces, usage=None):
+        self.chunks = [Mock(choices=[Mock(delta=Mock(content=piece))], usage=None) for piece in pieces]
+        self.chunks.append(Mock(choices=[], usage=usage))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+@pytest.mark.asyncio
+class TestLLMAnalyzerStreaming:
+    """Test streamed analysis."""
+
+    @pytest.fixture
+    def analyzer(self):
+        with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key', 'ANALYSIS_STREAMING': '1'}):
+            return LLMAnalyzer()
+
+    async def test_streaming_reports_gist_and_returns_same_object(self, analyzer):
+        """Partial gists arrive while streaming; the final analysis equals the non-streamed one."""
+        text = json.dumps(SAMPLE_ANALYSIS)
+        pieces = [text[i:i + 7] for i in range(0, len(text), 7)]
+        analyzer.client.chat.completions.create = AsyncMock(return_value=FakeStream(pieces))
+        partials = []
+
+        result = await analyzer.analyze_article(SAMPLE_ARTICLE, on_partial=partials.append)
+
+        assert result == SAMPLE_ANALYSIS
+        assert partials[-1] == SAMPLE_ANALYSIS['gist']
+        assert len(partials) > 1 and all(SAMPLE_ANALYSIS['gist'].startswith(p) for p in partials)
+        assert analyzer.client.chat.completions.create.call_args.kwargs['stream'] is True
+
+    async def test_without_callback_the_completion_is_not_streamed(self, analyzer):
+        analyzer.client.chat.completions.create = AsyncMock(return_value=completion(json.dumps(SAMPLE_ANALYSIS)))
+
+        assert await analyzer.analyze_article(SAMPLE_ARTICLE) == SAMPLE_ANALYSIS
+        assert 'stream' not in analyzer.client.chat.completions.create.call_args.kwargs
+
+    async def test_truncated_stream_returns_error_placeholder(self, analyzer):
+        analyzer.client.chat.completions.create = AsyncMock(return_value=FakeStream(['{"gist": "Half a', ' sentence']))
+        partials = []
+
+        result = await analyzer.analyze_article(SAMPLE_ARTICLE, on_partial=partials.append)
+
+        assert partials == ['Half a', 'Half a sentence']
+        assert result['gist'] == 'Unable to analyze article'
+        assert 'error' in result
+
 @pytest.mark.asyncio
 class TestLLMValidator:
     """Test the LLMValidator class."""
@@ -169,6 +290,52 @@ class TestLLMValidator:
             assert result['is_valid'] is False
             assert 'error' in result
 
+@pytest.mark.asyncio
+class TestLLMValidatorBatch:
+    """Test batched validation."""
+
+    @pytest.fixture
+    def validator(self):
+        with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key', 'VALIDATION_BATCH_SIZE': '3'}):
+            return LLMValidator()
+
+    async def test_batch_returns_per_item_results(self, validator):
+        """One completion validates several pairs; results map back by index."""
+        results = [{'index': 1, 'is_valid': False, 'notes': 'Wrong sentiment'},
+                   {'index': 0, 'is_valid': True, 'notes': 'Accurate'}]
+        validator.client.chat.completions.create = AsyncMock(return_value=completion(json.dumps({'results': results})))
+
+        validations = await validator.validate_batch([(a, SAMPLE_ANALYSIS) for a in make_articles(2)])
+
+        assert validations == [{'is_valid': True, 'notes': 'Accurate'}, {'is_valid': False, 'notes': 'Wrong sentiment'}]
+        assert validator.client.chat.completions.create.await_count == 1
+
+    async def test_unparsed_items_fall_back_to_single_validation(self, validator):
+        """Items with a missing or non-boolean verdict are validated individually."""
+        results = [{'index': 0, 'is_valid': True, 'notes': 'Accurate'}, {'index': 1, 'is_valid': 'maybe', 'notes': '?'}]
+        validator.client.chat.completions.create = AsyncMock(side_effect=[
+            completion(json.dumps({'results': results})),
+            completion(json.dumps({'is_valid': True, 'notes': 'Single'})),
+            completion(json.dumps({'is_valid': True, 'notes': 'Single'})),
+        ])
+
+        validations = await validator.validate_batch([(a, SAMPLE_ANALYSIS) for a in make_articles(3)])
+
+        assert [v['notes'] for v in validations] == ['Accurate', 'Single', 'Single']
+        assert validator.client.chat.completions.create.await_count == 3
+
+    async def test_batches_are_capped_at_batch_size(self, validator):
+        """Pairs beyond batch_size go into another completion."""
+        def respond(**kwargs):
+            count = kwargs['messages'][0]['content'].count('Original Article:')
+            return completion(json.dumps({'results': [{'index': i, 'is_valid': True, 'notes': 'ok'} for i in range(count)]}))
+        validator.client.chat.completions.create = AsyncMock(side_effect=respond)
+
+        validations = await validator.validate_batch([(a, SAMPLE_ANALYSIS) for a in make_articles(5)])
+
+        assert len(validations) == 5
+        assert validator.client.chat.completions.create.await_count == 2
+
 def test_article_data_structure():
     """Test that sample article has required fields."""
     required_fields = ['title', 'description', 'content', 'url', 'publishedAt', 'source']
@@ -0,0 +1,185 @@
+"""
+Tests for the FastAPI application wiring.
+"""
+
+import json
+import time
+import asyncio
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+import api
+from events import ArticleEvent, Event, ResultEvent
+from prewarm import TopicPrewarmer
+
+
+@pytest.fixture
+def client(tmp_path):
+    env = {
+        'NEWSAPI_KEY': 'test_key',
+        'GROQ_API_KEY': 'test_key',
+        'LLM_CACHE_PATH': str(tmp_path / 'cache.sqlite3'),
+        'JOBS_DB_PATH': str(tmp_path / 'jobs.sqlite3')
+    }
+    with patch.dict('os.environ', env):
+        with TestClient(api.app) as client:
+            yield client
+
+
+def test_health(client):
+    assert client.get('/api/health').json() == {'status': 'ok'}
+
+
+def test_clients_are_created_once_and_shared(client):
+    """The lifespan handler builds one pipeline whose components share pooled clients."""
+    pipeline = client.app.state.pipeline
+
+    assert pipeline.fetcher.client is not None
+    assert pipeline.analyzer.client is pipeline.validator.client
+    assert not pipeline.fetcher.client.is_closed
+
+
+def test_metrics_endpoint(client):
+    response = client.get('/api/metrics')
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert '# TYPE llm_request_duration_seconds histogram' in response.text
+    assert '# TYPE api_requests_in_flight gauge' in response.text
+
+
+class SlowPipeline:
+    """Emits numbered article events slowly; counts how often a run starts."""
+
+    def __init__(self, n=6):
+        self.n = n
+        self.started = 0
+
+    async def run(self, topic, count):
+        self.started += 1
+        for i in range(self.n):
+            await asyncio.sleep(0.02)
+            yield ArticleEvent({'id': i + 1})
+
+
+def read_events(response, limit=None):
+    events, current = [], {}
+    for line in response.iter_lines():
+        if line.startswith('id:'):
+            current['id'] = line[3:].strip()
+        elif line.startswith('data:'):
+            current['data'] = json.loads(line[5:].strip())
+            events.append(current)
+            current = {}
+            if limit and len(events) == limit:
+                break
+    return events
+
+
+def test_reconnect_with_last_event_id_resumes_run(client):
+    pipeline = client.app.state.pipeline = SlowPipeline()
+
+    with client.stream('GET', '/api/analyze?topic=T&count=6') as response:
+        first = read_events(response, limit=2)
+
+    with client.stream('GET', '/api/analyze?topic=T&count=6', headers={'Last-Event-ID': first[-1]['id']}) as response:
+        rest = read_events(response)
+
+    assert [event['data']['id'] for event in first + rest] == [1, 2, 3, 4, 5, 6]
+    assert pipeline.started == 1
+
+
+class ResultPipeline(SlowPipeline):
+    async def run(self, topic, count):
+        async for event in super().run(topic, count):
+            yield event
+        yield Event('result', {'id': 'result', 'topic': topic})
+
+
+def test_job_runs_in_background_and_reports_result(client):
+    client.app.state.jobs.pipeline = ResultPipeline(n=2)
+
+    response = client.post('/api/jobs', json={'topic': 'T', 'count': 2})
+    assert response.status_code == 202
+    job_id = response.json()['id']
+
+    with client.stream('GET', f'/api/jobs/{job_id}/events') as stream:
+        events = read_events(stream)
+
+    assert [event['data']['id'] for event in events] == [1, 2, 'result']
+    assert events[0]['id'] == f'{job_id}:1'
+
+    for _ in range(50):
+        job = client.get(f'/api/jobs/{job_id}').json()
+        if job['status'] == 'completed':
+            break
+        time.sleep(0.01)
+    assert job['status'] == 'completed'
+    assert job['result'] == {'id': 'result', 'topic': 'T'}
+
+
+def test_unknown_job_is_404(client):
+    assert client.get('/api/jobs/missing').status_code == 404
+    assert client.get('/api/jobs/missing/events').status_code == 404
+
+
+class ArticlesPipeline(SlowPipeline):
+    async def run(self, topic, count, incremental=False, advance_mark=False):
+        async for event in super().run(topic, count):
+            yield event
+        articles = [{'id': i + 1, 'url': f'https://example.com/{i}'} for i in range(self.n)]
+        yield ResultEvent(articles)
+
+
+def test_analyze_serves_warm_snapshot(client):
+    pipeline = client.app.state.pipeline = ArticlesPipeline(n=2)
+    prewarmer = TopicPrewarmer(pipeline, interval=60, count=2)
+    client.portal.call(prewarmer.refresh, 'T')
+    client.app.state.prewarmer = prewarmer
+
+    with client.stream('GET', '/api/analyze?topic=T&count=2') as response:
+        events = read_events(response)
+
+    assert pipeline.started == 1
+    assert [event['data'].get('id') for event in events[1:3]] == [1, 2]
+    assert len(events[3]['data']['articles']) == 2
+    assert events[0]['id'].startswith('snapshot-')
+
+
+def test_articles_endpoint_serves_stored_history(client):
+    client.app.state.articles.save('Business', [{
+        'article': {'title': 'Markets rally', 'url': 'https://example.com/1', 'publishedAt': '2024-05-01T10:00:00Z',
+                    'source': 'Reuters'},
+        'analysis': {'gist': 'Stocks rose', 'sentiment': 'positive'},
+        'validation': {'is_valid': True, 'notes': 'ok'}
+    }])
+
+    body = client.get('/api/articles', params={'topic': 'Business', 'q': 'stocks', 'limit': 10}).json()
+
+    assert body['total'] == 1
+    assert body['articles'][0]['title'] == 'Markets rally'
+    assert client.get('/api/articles', params={'sentiment': 'negative'}).json()['total'] == 0
+    assert client.get('/api/articles', params={'limit': 0}).status_code == 422
+
+
+class TopicsPipeline(SlowPipeline):
+    def __init__(self):
+        super().__init__(n=1)
+        self.calls = []
+
+    async def run(self, topic="Indian Politics", count=12, topics=None):
+        self.calls.append((topic, topics))
+        async for event in super().run(topic, count):
+            yield event
+
+
+def test_analyze_accepts_several_topics(client):
+    pipeline = client.app.state.pipeline = TopicsPipeline()
+
+    with client.stream('GET', '/api/analyze?topics=Business,Technology&count=3') as response:
+        read_events(response)
+    with client.stream('GET', '/api/analyze?topics=Business&count=3') as response:
+        read_events(response)
+
+    assert pipeline.calls == [('Indian Politics', ['Business', 'Technology']), ('Business', None)]
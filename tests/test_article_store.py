@@ -0,0 +1,118 @@
+"""
+Tests for the persistent article store.
+"""
+
+import pytest
+
+from article_store import ArticleStore, fts_query
+
+
+def make_result(n, source='Reuters', sentiment='positive', gist=None, published='2024-05-0{n}T10:00:00Z'):
+    return {
+        'article': {
+            'title': f'Headline {n}',
+            'description': f'Description {n}',
+            'url': f'https://example.com/{n}',
+            'publishedAt': published.format(n=n),
+            'source': source
+        },
+        'analysis': {'gist': gist or f'Gist {n}', 'sentiment': sentiment.upper(), 'tone': 'neutral'},
+        'validation': {'is_valid': True, 'notes': 'ok'}
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(str(tmp_path / 'articles.sqlite3'))
+    yield store
+    store.close()
+
+
+def test_query_filters_and_orders_newest_first(store):
+    store.save('Business', [make_result(1), make_result(2, source='BBC', sentiment='negative'), make_result(3)])
+    store.save('Technology', [make_result(4)])
+
+    total, articles = store.query(topic='Business')
+    assert total == 3
+    assert [article['url'] for article in articles] == ['https://example.com/3', 'https://example.com/2',
+                                                        'https://example.com/1']
+
+    assert store.query(source='BBC')[0] == 1
+    assert store.query(sentiment='Positive')[0] == 3
+    assert store.query(since='2024-05-02', until='2024-05-03T23:59:59Z')[0] == 2
+
+
+def test_query_paginates(store):
+    store.save('Business', [make_result(n) for n in range(1, 6)])
+
+    total, page = store.query(limit=2, offset=2)
+
+    assert total == 5
+    assert [article['title'] for article in page] == ['Headline 3', 'Headline 2']
+
+
+def test_full_text_search_covers_title_and_gist(store):
+    store.save('Business', [make_result(1, gist='Markets rally on rate cut hopes'), make_result(2)])
+
+    assert [a['url'] for a in store.query(text='rally')[1]] == ['https://example.com/1']
+    assert store.query(text='Headline')[0] == 2
+    # Query syntax in user input is treated as plain words
+    assert store.query(text='rate" OR (')[0] == 0
+
+
+def test_resaving_an_article_updates_it_and_its_search_index(store):
+    store.save('Business', [make_result(1, gist='Old summary')])
+    store.save('Economy', [make_result(1, gist='New summary', sentiment='negative')])
+
+    total, articles = store.query()
+    assert total == 1
+    assert articles[0]['topics'] == ['Business', 'Economy']
+    assert articles[0]['sentiment'] == 'negative'
+    # Still listed under the topic it was first archived under
+    assert store.query(topic='Business')[0] == 1
+    assert store.query(topic='Economy')[0] == 1
+    assert store.query(text='old')[0] == 0
+    assert store.query(text='new')[0] == 1
+
+
+def test_degraded_results_never_replace_archived_analyses(store):
+    store.save('Business', [make_result(1, gist='Good summary')])
+    failed_analysis = make_result(1)
+    failed_analysis['analysis'] = {'gist': 'Unable to analyze article', 'sentiment': 'neutral', 'tone': 'unknown',
+                                   'error': 'timeout'}
+    failed_validation = make_result(2)
+    failed_validation['validation'] = {'is_valid': False, 'notes': 'Validation failed', 'error': 'circuit open'}
+
+    assert store.save('Business', [failed_analysis, failed_validation]) == 0
+
+    total, articles = store.query()
+    assert total == 1
+    assert articles[0]['summary'] == 'Good summary'
+
+
+def test_archives_with_one_topic_per_article_are_migrated(tmp_path):
+    path = str(tmp_path / 'articles.sqlite3')
+    store = ArticleStore(path)
+    store.save('Business', [make_result(1)])
+    store.conn.execute('DROP TABLE article_topics')
+    store.close()
+
+    store = ArticleStore(path)
+    store.save('Economy', [make_result(1)])
+    assert store.query(topic='Business')[1][0]['topics'] == ['Business', 'Economy']
+    store.close()
+
+
+def test_articles_persist_across_connections(tmp_path):
+    path = str(tmp_path / 'articles.sqlite3')
+    first = ArticleStore(path)
+    first.save('Business', [make_result(1)])
+    first.close()
+
+    second = ArticleStore(path)
+    assert second.query()[1][0]['summary'] == 'Gist 1'
+    second.close()
+
+
+def test_fts_query_quotes_every_word():
+    assert fts_query('rate "cut"') == '"rate" """cut"""'
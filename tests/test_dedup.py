@@ -0,0 +1,58 @@
+"""
+Unit tests for near-duplicate article detection.
+"""
+
+import pytest
+
+from dedup import NearDuplicateIndex, find_near_duplicates, shingles
+
+STORY = {
+    'title': 'India announces new economic reform package to boost growth',
+    'description': 'The government on Monday unveiled a comprehensive reform package aimed at '
+                   'boosting manufacturing and exports, officials said.'
+}
+
+OTHER_STORY = {
+    'title': 'Stock markets fall as investors weigh inflation data',
+    'description': 'Shares slid across Asia on Tuesday as fresh inflation figures rattled investors.'
+}
+
+
+def test_shingles_normalize_case_and_punctuation():
+    assert shingles("Hello, World! Again here") == ['hello world again', 'world again here']
+    assert shingles("Short title") == ['short title']
+    assert shingles("") == []
+
+
+def test_syndicated_copies_are_grouped():
+    """Copies with a source suffix, case changes or a trimmed clause match the first one."""
+    articles = [
+        STORY,
+        OTHER_STORY,
+        dict(STORY, title=STORY['title'] + ' - Reuters'),
+        dict(STORY, title=STORY['title'].title()),
+        dict(STORY, description=STORY['description'].replace(', officials said', '')),
+    ]
+
+    assert find_near_duplicates(articles) == [None, None, 0, 0, 0]
+
+
+def test_different_stories_are_kept():
+    rewritten = {
+        'title': 'India announces new economic reform package',
+        'description': 'Officials said the government unveiled a comprehensive package aimed at '
+                       'boosting manufacturing and exports on Monday.'
+    }
+    assert find_near_duplicates([STORY, OTHER_STORY, rewritten]) == [None, None, None]
+
+
+def test_index_is_incremental():
+    index = NearDuplicateIndex()
+    assert index.add(10, STORY) is None
+    assert index.add(11, OTHER_STORY) is None
+    assert index.add(12, dict(STORY)) == 10
+
+
+def test_max_distance_must_fit_band_scheme():
+    with pytest.raises(ValueError):
+        NearDuplicateIndex(max_distance=8)
@@ -0,0 +1,57 @@
+"""
+Tests for typed pipeline events and their lazy serialization.
+"""
+
+import json
+import pytest
+
+import events
+from events import ArticleEvent, Event, LogEvent, dumps
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    if request.param == 'json':
+        monkeypatch.setattr(events, 'orjson', None)
+    elif events.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+
+def test_payload_is_serialized_once_on_first_read(monkeypatch):
+    serialized = []
+    monkeypatch.setattr(events, 'dumps', lambda value: serialized.append(value) or '{}')
+    event = ArticleEvent({'id': 1})
+    tagged = event.with_id('run:1')
+    assert serialized == []
+
+    tagged.data
+    tagged.data
+    copy = tagged.with_id('other:1')
+    assert copy.data is tagged.data
+    assert len(serialized) == 1
+
+
+def test_dict_style_access_and_tagging(encoder):
+    event = LogEvent('Fetching', 'fetch').with_id('run:1')
+
+    assert isinstance(event, LogEvent)
+    assert (event['event'], event['id']) == ('log', 'run:1')
+    assert json.loads(event['data']) == {'message': 'Fetching', 'step': 'fetch'}
+    assert event.get('missing', 'default') == 'default'
+    with pytest.raises(KeyError):
+        event['payload']
+
+
+def test_events_read_from_a_transport_parse_lazily(encoder):
+    event = Event('article', data='{"id":1,"title":"Café"}')
+
+    assert event.payload == {'id': 1, 'title': 'Café'}
+    assert event == Event('article', {'id': 1, 'title': 'Café'})
+
+
+def test_encoders_agree(encoder):
+    value = {'title': 'Café – news', 'count': 3, 'score': 0.5, 'tags': [None, True], 1: 'non-string key'}
+
+    assert json.loads(dumps(value)) == json.loads(json.dumps(value))
+    assert 'Café' in dumps(value)
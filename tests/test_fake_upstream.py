@@ -0,0 +1,98 @@
+"""
+End-to-end pipeline run against the local NewsAPI / Groq stand-ins.
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+
+from benchmarks.fake_upstream import FakeUpstream
+from benchmarks.bench_pipeline import BENCH_RATE_LIMITS
+from metrics import get_metrics
+from news_fetcher import NewsFetcher
+from pipeline import NewsAnalysisPipeline
+
+
+def upstream_env(upstream):
+    return {
+        'NEWSAPI_KEY': 'test_key',
+        'GROQ_API_KEY': 'test_key',
+        'NEWSAPI_BASE_URL': upstream.newsapi_base_url,
+        'GROQ_BASE_URL': upstream.groq_base_url,
+        'LLM_CACHE_PATH': '',
+        'LLM_RATE_LIMITS': BENCH_RATE_LIMITS
+    }
+
+
+def test_base_urls_are_configurable():
+    with patch.dict('os.environ', {'NEWSAPI_KEY': 'test_key', 'NEWSAPI_BASE_URL': 'http://localhost:9/v2/'}):
+        assert NewsFetcher().base_url == 'http://localhost:9/v2/everything'
+
+
+@pytest.mark.asyncio
+async def test_pipeline_against_fake_upstream():
+    async with FakeUpstream(newsapi_latency=0.0, model_latency={}, llm_latency=0.005, seed=0) as upstream:
+        with patch.dict('os.environ', upstream_env(upstream)):
+            pipeline = NewsAnalysisPipeline(precheck_confidence=2.0)
+            events = [event async for event in pipeline.run(count=12)]
+
+    articles = json.loads(next(e for e in events if e['event'] == 'result')['data'])['articles']
+    assert len(articles) == 12
+    assert all(article['validationPassed'] for article in articles)
+    assert upstream.stats['completions'] == 24
+    assert 'llm_tokens_total{model="llama-3.3-70b-versatile",kind="prompt"}' in get_metrics().render()
+
+
+@pytest.mark.asyncio
+async def test_streamed_analysis_against_fake_upstream():
+    async with FakeUpstream(newsapi_latency=0.0, model_latency={}, llm_latency=0.005, seed=0) as upstream:
+        env = dict(upstream_env(upstream), ANALYSIS_STREAMING='1')
+        with patch.dict('os.environ', env):
+            pipeline = NewsAnalysisPipeline(precheck_confidence=2.0)
+            events = [event async for event in pipeline.run(count=3)]
+
+    articles = json.loads(next(e for e in events if e['event'] == 'result')['data'])['articles']
+    partials = [json.loads(e['data']) for e in events if e['event'] == 'partial']
+    last_gist = {partial['id']: partial['gist'] for partial in partials}
+
+    assert len(partials) > 3
+    assert last_gist == {article['id']: article['summary'] for article in articles}
+    assert 'llm_tokens_total{model="llama-3.3-70b-versatile",kind="completion"}' in get_metrics().render()
+
+
+@pytest.mark.asyncio
+async def test_fake_upstream_batches_and_429s():
+    upstream = FakeUpstream(llm_latency=0.0, rate_429=1.0, seed=0)
+    status, headers, _ = await upstream._completion({'model': 'm', 'messages': []})
+    assert status == 429 and headers['Retry-After'] == '0.1'
+
+    prompt = 'You are a fact-checker ...\n[0]\nOriginal Article:\n\n[1]\nOriginal Article:\n{"results": []}'
+    answer = upstream.answer(prompt)
+    assert [item['index'] for item in answer['results']] == [0, 1]
+    assert all(item['is_valid'] for item in answer['results'])
+
+
+@pytest.mark.asyncio
+async def test_paged_fetch_requests_only_the_pages_needed():
+    async with FakeUpstream(newsapi_latency=0.0, total_results=120, seed=0) as upstream:
+        with patch.dict('os.environ', dict(upstream_env(upstream), NEWSAPI_PAGE_SIZE='50')):
+            fetcher = NewsFetcher()
+            pages = [page async for page in fetcher.stream_news(num_articles=500)]
+
+    assert [len(page) for page in pages] == [50, 50, 20]
+    assert len({article['url'] for page in pages for article in page}) == 120
+    assert upstream.stats['newsapi'] == 3
+
+
+@pytest.mark.asyncio
+async def test_paged_pipeline_against_fake_upstream():
+    async with FakeUpstream(newsapi_latency=0.01, model_latency={}, llm_latency=0.002, seed=0) as upstream:
+        env = dict(upstream_env(upstream), NEWSAPI_PAGE_SIZE='20')
+        with patch.dict('os.environ', env):
+            pipeline = NewsAnalysisPipeline(precheck_confidence=2.0)
+            events = [event async for event in pipeline.run(count=70)]
+
+    articles = json.loads(next(e for e in events if e['event'] == 'result')['data'])['articles']
+    assert [article['id'] for article in articles] == list(range(1, 71))
+    assert len({article['url'] for article in articles}) == 70
+    assert upstream.stats['newsapi'] == 4
@@ -0,0 +1,155 @@
+"""
+Tests for hedged LLM requests.
+"""
+
+import json
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from hedging import LatencyTracker, hedged, resolve_hedge_model
+from llm_analyzer import LLMAnalyzer
+from llm_cache import AnalysisCache
+from metrics import get_metrics
+
+SAMPLE_ARTICLE = {'title': 'T', 'description': 'D', 'content': 'C'}
+
+
+def answer(value, delay=0.0, error=None):
+    async def call():
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return value
+    return call
+
+
+def test_hedge_model_must_be_listed(tmp_path):
+    models = tmp_path / 'models.txt'
+    models.write_text("llama-3.3-70b-versatile\nllama-3.1-8b-instant\n")
+
+    assert resolve_hedge_model('llama-3.1-8b-instant', 'llama-3.3-70b-versatile', str(models)) == 'llama-3.1-8b-instant'
+    assert resolve_hedge_model('made-up-model', 'llama-3.3-70b-versatile', str(models)) is None
+    assert resolve_hedge_model('llama-3.3-70b-versatile', 'llama-3.3-70b-versatile', str(models)) is None
+    assert resolve_hedge_model('', 'llama-3.3-70b-versatile', str(models)) is None
+
+
+def test_threshold_adapts_to_recent_latencies():
+    tracker = LatencyTracker(quantile=0.9, min_delay=0.05, initial_delay=5, min_samples=10)
+    assert tracker.threshold() == 5
+
+    for n in range(1, 11):
+        tracker.observe(n / 10)
+    assert tracker.threshold() == 1.0
+    assert tracker.expected_beyond(0.8) == pytest.approx(0.95)
+
+    tracker.samples.clear()
+    for _ in range(10):
+        tracker.observe(0.01)
+    assert tracker.threshold() == 0.05
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    hedge_calls = []
+
+    async def hedge():
+        hedge_calls.append(1)
+        return 'hedge'
+
+    result, hedge_won, _ = await hedged(answer('primary'), hedge, delay=0.1)
+
+    assert (result, hedge_won, hedge_calls) == ('primary', False, [])
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_loses_to_the_hedge_and_is_cancelled():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    result, hedge_won, elapsed = await hedged(slow, answer('hedge', 0.01), delay=0.02)
+
+    assert (result, hedge_won, cancelled) == ('hedge', True, [True])
+    assert elapsed < 1
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_is_hedged_at_once_and_errors_surface():
+    result, hedge_won, _ = await hedged(answer(None, error=ValueError('bad json')), answer('hedge'), delay=5)
+    assert (result, hedge_won) == ('hedge', True)
+
+    with pytest.raises(ValueError, match='primary'):
+        await hedged(answer(None, error=ValueError('primary')), answer(None, error=ValueError('hedge')), delay=5)
+
+
+class ModelLatencyClient:
+    """A chat completions stand-in answering each model after its own delay."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.models = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, **kwargs):
+        self.models.append(model)
+        await asyncio.sleep(self.delays[model])
+        content = json.dumps({'gist': f'by {model}', 'sentiment': 'neutral', 'tone': 'balanced'})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+@pytest.mark.asyncio
+async def test_analyzer_records_the_model_that_answered():
+    client = ModelLatencyClient({'llama-3.3-70b-versatile': 5, 'llama-3.1-8b-instant': 0.01})
+    env = {'GROQ_API_KEY': 'test_key', 'ANALYSIS_HEDGE_MODEL': 'llama-3.1-8b-instant', 'ANALYSIS_HEDGE_MIN_DELAY': '0.02'}
+    with patch.dict('os.environ', env):
+        analyzer = LLMAnalyzer(client=client)
+    analyzer.latency.initial_delay = 0.02
+
+    result = await analyzer.analyze_article(SAMPLE_ARTICLE)
+
+    assert result['model'] == 'llama-3.1-8b-instant'
+    assert result['gist'] == 'by llama-3.1-8b-instant'
+    assert client.models == ['llama-3.3-70b-versatile', 'llama-3.1-8b-instant']
+    text = get_metrics().render()
+    assert 'llm_hedged_requests_total{model="llama-3.1-8b-instant"} 1' in text
+    assert 'llm_hedge_wins_total{model="llama-3.1-8b-instant"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_only_primary_answers_are_cached(tmp_path):
+    client = ModelLatencyClient({'llama-3.3-70b-versatile': 5, 'llama-3.1-8b-instant': 0.01})
+    env = {'GROQ_API_KEY': 'test_key', 'ANALYSIS_HEDGE_MODEL': 'llama-3.1-8b-instant', 'ANALYSIS_HEDGE_MIN_DELAY': '0.02'}
+    with patch.dict('os.environ', env):
+        analyzer = LLMAnalyzer(client=client, cache=AnalysisCache(str(tmp_path / 'cache.sqlite3')))
+    analyzer.latency.initial_delay = 0.02
+
+    hedged_answer = await analyzer.analyze_article(SAMPLE_ARTICLE)
+    assert hedged_answer['model'] == 'llama-3.1-8b-instant'
+
+    client.delays['llama-3.3-70b-versatile'] = 0.01
+    analyzer.latency.initial_delay = 1
+    primary_answer = await analyzer.analyze_article(SAMPLE_ARTICLE)
+    cached = await analyzer.analyze_article(SAMPLE_ARTICLE)
+    analyzer.cache.close()
+
+    assert primary_answer['model'] == cached['model'] == 'llama-3.3-70b-versatile'
+    assert client.models.count('llama-3.3-70b-versatile') == 2
+
+
+@pytest.mark.asyncio
+async def test_analyzer_without_hedge_model_uses_the_primary_only():
+    client = ModelLatencyClient({'llama-3.3-70b-versatile': 0.01})
+    with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key', 'ANALYSIS_HEDGE_MODEL': ''}):
+        analyzer = LLMAnalyzer(client=client)
+
+    result = await analyzer.analyze_article(SAMPLE_ARTICLE)
+
+    assert 'model' not in result
+    assert client.models == ['llama-3.3-70b-versatile']
@@ -0,0 +1,208 @@
+"""
+Tests for background pipeline jobs.
+"""
+
+import json
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from events import CloseEvent, ErrorEvent, Event, FullResultEvent, ArticleEvent
+from jobs import Job, JobManager, JobStore, QUEUED, RUNNING, COMPLETED, FAILED
+
+
+class FakePipeline:
+    """Emits a few progress events then a result; tracks how many runs overlap."""
+
+    def __init__(self, n=3, delay=0.01, fail=False):
+        self.n = n
+        self.delay = delay
+        self.fail = fail
+        self.running = 0
+        self.peak = 0
+
+    async def run(self, topic, count, full_result=False):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            for i in range(self.n):
+                await asyncio.sleep(self.delay)
+                yield ArticleEvent({'id': i + 1})
+            if self.fail:
+                yield ErrorEvent('upstream down')
+                return
+            yield Event('result', {'topic': topic, 'articles': count})
+            if full_result:
+                yield FullResultEvent([], [], {})
+            yield CloseEvent('Analysis complete')
+        finally:
+            self.running -= 1
+
+
+async def wait_finished(manager, job, timeout=2.0):
+    async def poll():
+        while manager.get(job.id).status not in (COMPLETED, FAILED):
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+@pytest.mark.asyncio
+async def test_workers_bound_concurrent_pipelines():
+    pipeline = FakePipeline()
+    manager = JobManager(pipeline, workers=2)
+    manager.start()
+    try:
+        jobs = [manager.submit('T', 3) for _ in range(5)]
+        for job in jobs:
+            await wait_finished(manager, job)
+    finally:
+        await manager.close()
+
+    assert pipeline.peak == 2
+    assert all(job.status == COMPLETED for job in jobs)
+    assert jobs[0].result == {'topic': 'T', 'articles': 3}
+
+
+@pytest.mark.asyncio
+async def test_results_are_persisted_across_managers(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    manager = JobManager(FakePipeline(), store=JobStore(path), retention=0)
+    manager.start()
+    try:
+        job = manager.submit('Economy', 5)
+        await wait_finished(manager, job)
+    finally:
+        await manager.close()
+        manager.store.close()
+
+    restarted = JobManager(FakePipeline(), store=JobStore(path))
+    stored = restarted.get(job.id)
+    events = await collect(restarted.events(stored))
+    restarted.store.close()
+
+    assert stored.status == COMPLETED
+    assert stored.result == {'topic': 'Economy', 'articles': 5}
+    assert [event['event'] for event in events] == ['result']
+    assert json.loads(events[0]['data']) == stored.result
+
+
+@pytest.mark.asyncio
+async def test_events_stream_and_resume_without_full_result():
+    manager = JobManager(FakePipeline(), workers=1)
+    manager.start()
+    try:
+        job = manager.submit('T', 3)
+        events = await collect(manager.events(job))
+        resumed = await collect(manager.events(job, last_event_id=events[1]['id']))
+    finally:
+        await manager.close()
+
+    assert [event['event'] for event in events] == ['article', 'article', 'article', 'result', 'close']
+    assert events[0]['id'] == f'{job.id}:1'
+    assert resumed == events[2:]
+
+
+@pytest.mark.asyncio
+async def test_queued_job_events_wait_for_a_worker():
+    pipeline = FakePipeline(delay=0.03)
+    manager = JobManager(pipeline, workers=1)
+    manager.start()
+    try:
+        first = manager.submit('A', 1)
+        second = manager.submit('B', 1)
+        await asyncio.sleep(0.01)
+        assert second.status == QUEUED
+
+        events = await collect(manager.events(second))
+    finally:
+        await manager.close()
+
+    assert first.status == COMPLETED
+    assert json.loads(events[-2]['data']) == {'topic': 'B', 'articles': 1}
+
+
+@pytest.mark.asyncio
+async def test_error_event_marks_job_failed():
+    manager = JobManager(FakePipeline(fail=True))
+    manager.start()
+    try:
+        job = manager.submit('T', 3)
+        await wait_finished(manager, job)
+    finally:
+        await manager.close()
+
+    assert job.status == FAILED
+    assert job.error == 'upstream down'
+    assert job.result is None
+
+
+@pytest.mark.asyncio
+async def test_start_fails_jobs_interrupted_by_a_restart(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.save(Job('abc', 'T', 3, status=RUNNING))
+    manager = JobManager(FakePipeline(), store=store)
+    manager.start()
+    try:
+        job = manager.get('abc')
+        events = await collect(manager.events(job))
+    finally:
+        await manager.close()
+        store.close()
+
+    assert job.status == FAILED
+    assert 'restart' in job.error
+    assert events[0]['event'] == 'error'
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_a_live_worker_are_not_failed(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    store = JobStore(path)
+    running = JobManager(FakePipeline(delay=0.05), store=store, workers=1)
+    running.start()
+    other = JobManager(FakePipeline(), store=JobStore(path))
+    try:
+        job = running.submit('T', 3)
+        await asyncio.sleep(0.01)
+        other.start()
+
+        foreign = other.get(job.id)
+        assert foreign.status == RUNNING
+        # Streamed from the store once the owning worker finishes it
+        events = await collect(other.events(foreign))
+    finally:
+        await running.close()
+        await other.close()
+        store.close()
+        other.store.close()
+
+    assert job.status == COMPLETED
+    assert [event['event'] for event in events] == ['result']
+
+
+@pytest.mark.asyncio
+async def test_jobs_of_a_stopped_worker_are_failed(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    store.save(Job('abc', 'T', 3, status=RUNNING), owner='gone')
+    manager = JobManager(FakePipeline(), store=store, heartbeat=0.02)
+    manager.start()
+    try:
+        assert manager.get('abc').status == RUNNING
+        await asyncio.sleep(0.1)
+        job = manager.get('abc')
+    finally:
+        await manager.close()
+        store.close()
+
+    assert job.status == FAILED
+
+
+def test_job_workers_are_split_across_worker_processes():
+    with patch.dict('os.environ', {'JOB_WORKERS': '4', 'WEB_CONCURRENCY': '3', 'JOBS_DB_PATH': ''}):
+        assert JobManager.from_env(FakePipeline()).workers == 2
+    with patch.dict('os.environ', {'JOB_WORKERS': '2', 'WEB_CONCURRENCY': '1', 'JOBS_DB_PATH': ''}):
+        assert JobManager.from_env(FakePipeline()).workers == 2
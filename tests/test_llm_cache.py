@@ -0,0 +1,175 @@
+"""
+Unit tests for the persistent LLM result caches.
+"""
+
+import pytest
+import json
+import time
+from unittest.mock import Mock, patch, AsyncMock
+
+from llm_cache import AnalysisCache, ValidationCache, article_fingerprint
+from llm_analyzer import LLMAnalyzer
+from llm_validator import LLMValidator
+
+SAMPLE_ARTICLE = {
+    'title': 'India announces new economic policy',
+    'description': 'The government unveiled a comprehensive economic reform package.',
+    'content': 'India has announced major economic reforms...',
+    'url': 'https://example.com/article'
+}
+
+SAMPLE_ANALYSIS = {
+    'gist': 'India announced major economic reforms to boost growth.',
+    'sentiment': 'positive',
+    'tone': 'analytical'
+}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AnalysisCache(str(tmp_path / 'cache.sqlite3'), ttl=60, max_entries=3)
+    yield cache
+    cache.close()
+
+
+def test_fingerprint_ignores_case_and_whitespace():
+    reformatted = dict(SAMPLE_ARTICLE, title='  INDIA announces   new economic policy\n')
+    assert article_fingerprint(reformatted) == article_fingerprint(SAMPLE_ARTICLE)
+    assert article_fingerprint(dict(SAMPLE_ARTICLE, content='Other')) != article_fingerprint(SAMPLE_ARTICLE)
+
+
+def test_key_depends_on_model_and_prompt_version():
+    key = AnalysisCache.key(SAMPLE_ARTICLE, 'model-a', '1')
+    assert key == AnalysisCache.key(dict(SAMPLE_ARTICLE, url='https://mirror.example.com'), 'model-a', '1')
+    assert key != AnalysisCache.key(SAMPLE_ARTICLE, 'model-b', '1')
+    assert key != AnalysisCache.key(SAMPLE_ARTICLE, 'model-a', '2')
+
+
+def test_hit_and_miss_counters(cache):
+    assert cache.get('k') is None
+    cache.put('k', SAMPLE_ANALYSIS)
+
+    assert cache.get('k') == SAMPLE_ANALYSIS
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_expired_entries_are_misses(cache):
+    cache.put('k', SAMPLE_ANALYSIS)
+    cache.ttl = 0.01
+    time.sleep(0.02)
+
+    assert cache.get('k') is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'v': key})
+        time.sleep(0.001)
+    cache.get('a')  # refresh 'a' so 'b' is now the oldest
+    cache.put('d', {'v': 'd'})
+
+    assert len(cache) == 3
+    assert cache.get('b') is None
+    assert cache.get('a') == {'v': 'a'}
+
+
+def test_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    AnalysisCache(path).put('k', SAMPLE_ANALYSIS)
+    assert AnalysisCache(path).get('k') == SAMPLE_ANALYSIS
+
+
+@pytest.mark.asyncio
+class TestAnalyzerCaching:
+    """Test that LLMAnalyzer consults the cache."""
+
+    def make_analyzer(self, cache, content):
+        with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key'}):
+            analyzer = LLMAnalyzer(cache=cache)
+        mock_choice = Mock()
+        mock_choice.message.content = content
+        analyzer.client.chat.completions.create = AsyncMock(return_value=Mock(choices=[mock_choice]))
+        return analyzer
+
+    async def test_warm_call_skips_llm(self, cache):
+        analyzer = self.make_analyzer(cache, json.dumps(SAMPLE_ANALYSIS))
+
+        first = await analyzer.analyze_article(SAMPLE_ARTICLE)
+        second = await analyzer.analyze_article(SAMPLE_ARTICLE)
+
+        assert first == second == SAMPLE_ANALYSIS
+        assert analyzer.client.chat.completions.create.await_count == 1
+
+    async def test_failed_analysis_is_not_cached(self, cache):
+        analyzer = self.make_analyzer(cache, "This is not JSON")
+
+        await analyzer.analyze_article(SAMPLE_ARTICLE)
+        await analyzer.analyze_article(SAMPLE_ARTICLE)
+
+        assert analyzer.client.chat.completions.create.await_count == 2
+        assert len(cache) == 0
+
+
+@pytest.fixture
+def validation_cache(tmp_path):
+    cache = ValidationCache(str(tmp_path / 'cache.sqlite3'), ttl=60, max_entries=10)
+    yield cache
+    cache.close()
+
+
+def test_validation_key_depends_on_analysis():
+    key = ValidationCache.key(SAMPLE_ARTICLE, SAMPLE_ANALYSIS, 'model', '1')
+    assert key == ValidationCache.key(SAMPLE_ARTICLE, dict(SAMPLE_ANALYSIS, sentiment='Positive'), 'model', '1')
+    assert key != ValidationCache.key(SAMPLE_ARTICLE, dict(SAMPLE_ANALYSIS, sentiment='negative'), 'model', '1')
+    assert key != ValidationCache.key(SAMPLE_ARTICLE, SAMPLE_ANALYSIS, 'model', '2')
+
+
+def test_analysis_and_validation_caches_share_a_file(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    AnalysisCache(path).put('k', SAMPLE_ANALYSIS)
+    validations = ValidationCache(path)
+
+    assert validations.get('k') is None
+    assert AnalysisCache(path).get('k') == SAMPLE_ANALYSIS
+
+
+@pytest.mark.asyncio
+class TestValidatorCaching:
+    """Test that LLMValidator caches results but retries failures."""
+
+    def make_validator(self, cache, create):
+        with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key'}):
+            validator = LLMValidator(cache=cache)
+        validator.client.chat.completions.create = create
+        return validator
+
+    async def test_repeat_validation_skips_llm(self, validation_cache):
+        mock_choice = Mock()
+        mock_choice.message.content = json.dumps({'is_valid': True, 'notes': 'Accurate.'})
+        validator = self.make_validator(validation_cache, AsyncMock(return_value=Mock(choices=[mock_choice])))
+
+        first = await validator.validate_analysis(SAMPLE_ARTICLE, SAMPLE_ANALYSIS)
+        second = await validator.validate_analysis(SAMPLE_ARTICLE, SAMPLE_ANALYSIS)
+
+        assert first == second == {'is_valid': True, 'notes': 'Accurate.'}
+        assert validator.client.chat.completions.create.await_count == 1
+
+    async def test_errors_are_stored_separately_and_retried(self, validation_cache):
+        validator = self.make_validator(validation_cache, AsyncMock(side_effect=Exception("API Error")))
+
+        await validator.validate_analysis(SAMPLE_ARTICLE, SAMPLE_ANALYSIS)
+        result = await validator.validate_analysis(SAMPLE_ARTICLE, SAMPLE_ANALYSIS)
+
+        assert result['is_valid'] is False
+        assert validator.client.chat.completions.create.await_count == 2
+        assert len(validation_cache) == 0
+        assert validation_cache.error_count() == 1
+
+    async def test_success_clears_recorded_error(self, validation_cache):
+        key = ValidationCache.key(SAMPLE_ARTICLE, SAMPLE_ANALYSIS, 'model', '1')
+        validation_cache.record_error(key, 'timeout')
+        validation_cache.put(key, {'is_valid': True, 'notes': 'ok'})
+
+        assert validation_cache.error_count() == 0
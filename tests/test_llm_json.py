@@ -0,0 +1,33 @@
+"""
+Tests for the LLM JSON helpers.
+"""
+
+import pytest
+
+from llm_json import parse_json_object, PartialFieldReader
+
+
+def test_parse_json_object_strips_fences_and_stray_text():
+    assert parse_json_object('```json\n{"a": 1}\n```') == {'a': 1}
+    assert parse_json_object('Sure! {"a": 1} Hope that helps') == {'a': 1}
+    with pytest.raises(ValueError):
+        parse_json_object('no json here')
+
+
+def test_partial_reader_follows_field_across_chunks():
+    reader = PartialFieldReader('gist')
+    chunks = ['{"sentiment": "neu', 'tral", "gi', 'st": "Talks', ' resume', ' today.", "tone": "x"}']
+
+    updates = [update for update in map(reader.feed, chunks) if update is not None]
+
+    assert updates == ['Talks', 'Talks resume', 'Talks resume today.']
+    assert reader.complete
+
+
+def test_partial_reader_holds_back_incomplete_escapes():
+    reader = PartialFieldReader('gist')
+
+    assert reader.feed('{"gist": "Say \\') == 'Say '
+    assert reader.feed('"hi\\u00') == 'Say "hi'
+    assert reader.feed('e9"}') == 'Say "hié'
+    assert reader.feed(' trailing') is None
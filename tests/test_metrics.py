@@ -0,0 +1,107 @@
+"""
+Tests for the Prometheus metrics registry and its instrumentation hooks.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+from metrics import Registry, get_metrics
+from llm_analyzer import LLMAnalyzer
+from llm_cache import AnalysisCache
+
+
+def test_counter_and_gauge_render():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests.', ['path'])
+    in_flight = registry.gauge('in_flight', 'In flight.')
+
+    requests.labels('/a').inc()
+    requests.labels(path='/a').inc(2)
+    in_flight.inc()
+    in_flight.dec()
+
+    text = registry.render()
+    assert '# TYPE requests_total counter' in text
+    assert 'requests_total{path="/a"} 3' in text
+    assert 'in_flight 0' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency.', ['model'], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.labels('m').observe(value)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{model="m",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{model="m",le="1"} 2' in text
+    assert 'latency_seconds_bucket{model="m",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{model="m"} 5.55' in text
+    assert 'latency_seconds_count{model="m"} 3' in text
+
+
+def test_counters_reject_negative_increments():
+    counter = Registry().counter('c_total', 'C.')
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_record_usage_counts_prompt_and_completion_tokens():
+    metrics = get_metrics()
+    metrics.record_usage('model-a', SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30)))
+    metrics.record_usage('model-a', SimpleNamespace(usage=None))
+
+    text = metrics.render()
+    assert 'llm_tokens_total{model="model-a",kind="prompt"} 120' in text
+    assert 'llm_tokens_total{model="model-a",kind="completion"} 30' in text
+
+
+@pytest.mark.asyncio
+async def test_analyzer_reports_latency_and_parse_failures():
+    with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key'}):
+        analyzer = LLMAnalyzer()
+
+    response = Mock()
+    response.choices = [Mock(message=Mock(content="This is not JSON"))]
+    response.usage = SimpleNamespace(prompt_tokens=50, completion_tokens=5)
+    analyzer.client.chat.completions.create = AsyncMock(return_value=response)
+
+    await analyzer.analyze_article({'title': 't', 'description': 'd', 'content': 'c'})
+
+    text = get_metrics().render()
+    assert f'llm_parse_failures_total{{model="{analyzer.model}"}} 1' in text
+    assert f'llm_request_duration_seconds_count{{model="{analyzer.model}"}} 1' in text
+    assert f'llm_requests_in_flight{{model="{analyzer.model}"}} 0' in text
+    assert f'llm_tokens_total{{model="{analyzer.model}",kind="prompt"}} 50' in text
+
+
+@pytest.mark.asyncio
+async def test_transport_errors_are_not_parse_failures():
+    with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key'}):
+        analyzer = LLMAnalyzer()
+    analyzer.client.chat.completions.create = AsyncMock(side_effect=Exception("API Error"))
+
+    await analyzer.analyze_article({'title': 't', 'description': 'd', 'content': 'c'})
+
+    assert 'llm_parse_failures_total{' not in get_metrics().render()
+
+
+def test_cache_lookups_are_counted(tmp_path):
+    cache = AnalysisCache(str(tmp_path / 'cache.sqlite3'))
+    cache.get('missing')
+    cache.put('present', {'gist': 'g'})
+    cache.get('present')
+
+    text = get_metrics().render()
+    assert 'llm_cache_lookups_total{cache="analyses",result="hit"} 1' in text
+    assert 'llm_cache_lookups_total{cache="analyses",result="miss"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_hook_counts_429s():
+    metrics = get_metrics()
+    await metrics.on_llm_response(SimpleNamespace(status_code=429))
+    await metrics.on_llm_response(SimpleNamespace(status_code=200))
+
+    assert 'upstream_rate_limited_total{upstream="groq"} 1' in metrics.render()
@@ -0,0 +1,634 @@
+"""
+Tests for the NewsAnalysisPipeline orchestration.
+Uses in-memory stand-ins for the fetcher and both LLM stages.
+"""
+
+import pytest
+import json
+import asyncio
+
+from pipeline import NewsAnalysisPipeline
+from metrics import PipelineMetrics
+from article_store import ArticleStore
+from watermarks import advance
+from news_fetcher import IncompleteFetchError
+
+
+def make_articles(n):
+    return [
+        {
+            'title': f'Article {i}',
+            'description': f'Description {i}',
+            'content': f'Content {i}',
+            'url': f'https://example.com/{i}',
+            'publishedAt': '2024-01-15T10:00:00Z',
+            'source': 'Test News'
+        }
+        for i in range(n)
+    ]
+
+
+class StubFetcher:
+    def __init__(self, articles):
+        self.articles = articles
+
+    async def fetch_news(self, topic="Indian Politics", num_articles=12):
+        return self.articles[:num_articles]
+
+
+class StubAnalyzer:
+    """Records peak concurrency; later articles finish first."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.started = 0
+        self.cancelled = 0
+
+    async def analyze_article(self, article):
+        self.in_flight += 1
+        self.started += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            last_word = article['title'].split()[-1]
+            index = int(last_word) if last_word.isdigit() else 0
+            await asyncio.sleep(self.delay * (10 - index % 10))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        return {'gist': f"Gist of {article['title']}", 'sentiment': 'Positive', 'tone': 'analytical'}
+
+
+class StubValidator:
+    async def validate_analysis(self, article, analysis):
+        return {'is_valid': True, 'notes': f"Checked {article['title']}"}
+
+
+def make_pipeline(n=6, analyzer=None, max_concurrency=3):
+    return NewsAnalysisPipeline(
+        fetcher=StubFetcher(make_articles(n)),
+        analyzer=analyzer or StubAnalyzer(),
+        validator=StubValidator(),
+        max_concurrency=max_concurrency
+    )
+
+
+async def collect(pipeline, **kwargs):
+    return [event async for event in pipeline.run(**kwargs)]
+
+
+@pytest.mark.asyncio
+class TestConcurrentAnalysis:
+    """Test the bounded-concurrency analysis stage."""
+
+    async def test_concurrency_is_bounded(self):
+        """No more than max_concurrency analyses run at once."""
+        analyzer = StubAnalyzer()
+        events = await collect(make_pipeline(n=8, analyzer=analyzer, max_concurrency=3), count=8)
+
+        assert analyzer.peak == 3
+        assert events[-1]['event'] == 'close'
+
+    async def test_results_keep_fetch_order(self):
+        """Final articles are ordered as fetched even if analyses finish out of order."""
+        events = await collect(make_pipeline(n=5), count=5)
+        result = next(e for e in events if e['event'] == 'result')
+        articles = json.loads(result['data'])['articles']
+
+        assert [a['id'] for a in articles] == [1, 2, 3, 4, 5]
+        assert [a['title'] for a in articles] == [f'Article {i}' for i in range(5)]
+        assert all(a['sentiment'] == 'positive' for a in articles)
+        assert articles[0]['summary'] == 'Gist of Article 0'
+
+    async def test_progress_event_per_article(self):
+        """One progress log event is emitted as each analysis completes."""
+        events = await collect(make_pipeline(n=4), count=4)
+        messages = [json.loads(e['data'])['message'] for e in events if e['event'] == 'log']
+        analyzed = [m for m in messages if m.startswith('Analyzed article')]
+
+        assert len(analyzed) == 4
+        assert analyzed[-1].startswith('Analyzed article 4/4')
+
+    async def test_disconnect_cancels_in_flight_tasks(self):
+        """Cancelling the consumer (client disconnect) cancels pending analyses."""
+        analyzer = StubAnalyzer(delay=1)
+        consumer = asyncio.create_task(collect(make_pipeline(n=6, analyzer=analyzer, max_concurrency=2), count=6))
+
+        # Let the first analyses start before disconnecting
+        await asyncio.sleep(0.3)
+        consumer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await consumer
+        await asyncio.sleep(0)
+
+        assert analyzer.started == 2
+        assert analyzer.cancelled == 2
+        assert analyzer.in_flight == 0
+
+
+@pytest.mark.asyncio
+class TestStreamingValidation:
+    """Test that validation overlaps with analysis."""
+
+    async def test_validation_starts_before_analysis_finishes(self):
+        """The first article is validated while slower analyses are still running."""
+        events = await collect(make_pipeline(n=6, max_concurrency=6), count=6)
+        messages = [json.loads(e['data'])['message'] for e in events if e['event'] == 'log']
+
+        first_validated = next(i for i, m in enumerate(messages) if m.startswith('Validated article'))
+        last_analyzed = max(i for i, m in enumerate(messages) if m.startswith('Analyzed article'))
+        assert first_validated < last_analyzed
+
+    async def test_full_result_pairs_each_article_with_its_results(self):
+        """full_result keeps articles, analyses and validations aligned in fetch order."""
+        events = await collect(make_pipeline(n=4), count=4, full_result=True)
+        full = json.loads(next(e for e in events if e['event'] == 'full_result')['data'])
+
+        assert len(full['raw_articles']) == 4
+        for i, item in enumerate(full['validated_results']):
+            assert item['article']['title'] == f'Article {i}'
+            assert item['analysis']['gist'] == f'Gist of Article {i}'
+            assert item['validation']['notes'] == f'Checked Article {i}'
+
+    async def test_full_result_is_only_built_on_request(self):
+        events = await collect(make_pipeline(n=2), count=2)
+
+        assert [e.event for e in events[-2:]] == ['result', 'close']
+        assert 'full_result' not in [e.event for e in events]
+
+    async def test_stage_failure_becomes_error_event(self):
+        """An unexpected exception in a stage surfaces as an error event."""
+        class BrokenValidator:
+            async def validate_analysis(self, article, analysis):
+                raise RuntimeError("boom")
+
+        pipeline = make_pipeline(n=3)
+        pipeline.validator = BrokenValidator()
+        events = await collect(pipeline, count=3)
+
+        assert events[-1]['event'] == 'error'
+        assert 'boom' in events[-1]['data']
+
+
+class BatchingAnalyzer(StubAnalyzer):
+    """Analyzer stub that supports batching and records batch sizes."""
+
+    batch_size = 4
+
+    def __init__(self):
+        super().__init__(delay=0.001)
+        self.batches = []
+
+    def plan_batches(self, articles):
+        return [list(range(i, min(i + self.batch_size, len(articles)))) for i in range(0, len(articles), self.batch_size)]
+
+    async def analyze_batch(self, articles):
+        self.batches.append(len(articles))
+        return [await self.analyze_article(article) for article in articles]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_uses_batches_when_enabled():
+    """With batching enabled, the analysis stage sends planned batches."""
+    analyzer = BatchingAnalyzer()
+    events = await collect(make_pipeline(n=10, analyzer=analyzer), count=10)
+    articles = json.loads(next(e for e in events if e['event'] == 'result')['data'])['articles']
+
+    assert sorted(analyzer.batches) == [2, 4, 4]
+    assert [a['summary'] for a in articles] == [f'Gist of Article {i}' for i in range(10)]
+
+
+class BatchingValidator(StubValidator):
+    """Validator stub that supports batching and records batch sizes."""
+
+    batch_size = 3
+
+    def __init__(self):
+        self.batches = []
+
+    async def validate_batch(self, items):
+        self.batches.append(len(items))
+        return [await self.validate_analysis(article, analysis) for article, analysis in items]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_micro_batches_validation():
+    """Analyzed articles are grouped into validation batches of at most batch_size."""
+    validator = BatchingValidator()
+    pipeline = make_pipeline(n=7, max_concurrency=7)
+    pipeline.validator = validator
+    pipeline.validation_concurrency = 2
+    pipeline.validation_linger = 0.05
+
+    events = await collect(pipeline, count=7)
+    articles = json.loads(next(e for e in events if e['event'] == 'result')['data'])['articles']
+
+    assert sum(validator.batches) == 7
+    assert max(validator.batches) <= 3
+    assert len(validator.batches) < 7
+    assert [a['validationNote'] for a in articles] == [f'Checked Article {i}' for i in range(7)]
+
+
+@pytest.mark.asyncio
+async def test_near_duplicates_share_one_analysis():
+    """Syndicated copies are analyzed once and marked as duplicates in the output."""
+    story = {
+        'title': 'India announces new economic reform package to boost growth',
+        'description': 'The government on Monday unveiled a comprehensive reform package aimed at boosting exports.',
+        'content': 'Full text', 'url': 'https://a.example.com/story', 'publishedAt': '2024-01-15T10:00:00Z', 'source': 'A'
+    }
+    articles = make_articles(2) + [story, dict(story, title=story['title'] + ' - Reuters', url='https://b.example.com/story')]
+    analyzer = StubAnalyzer(delay=0.001)
+    pipeline = NewsAnalysisPipeline(
+        fetcher=StubFetcher(articles), analyzer=analyzer, validator=StubValidator(), max_concurrency=4
+    )
+
+    events = await collect(pipeline, count=4, full_result=True)
+    result = json.loads(next(e for e in events if e['event'] == 'result')['data'])['articles']
+    full = json.loads(next(e for e in events if e['event'] == 'full_result')['data'])['validated_results']
+
+    assert analyzer.started == 3
+    assert len(result) == 4
+    assert result[3]['duplicateOf'] == 3
+    assert result[3]['summary'] == result[2]['summary']
+    assert result[3]['url'] == 'https://b.example.com/story'
+    assert 'duplicateOf' not in result[2]
+    assert full[3]['duplicate_of'] == 3
+    assert full[3]['validation'] == full[2]['validation']
+
+
+@pytest.mark.asyncio
+async def test_local_precheck_skips_llm_validation():
+    """Analyses the lexicon confidently agrees with are confirmed without the validator."""
+    class CountingValidator(StubValidator):
+        calls = 0
+
+        async def validate_analysis(self, article, analysis):
+            CountingValidator.calls += 1
+            return await super().validate_analysis(article, analysis)
+
+    articles = make_articles(3)
+    articles[0]['description'] = "Exports surge as reforms boost growth; a successful, welcomed and robust recovery."
+    pipeline = NewsAnalysisPipeline(
+        fetcher=StubFetcher(articles), analyzer=StubAnalyzer(delay=0.001), validator=CountingValidator(),
+        precheck_confidence=0.5
+    )
+
+    events = await collect(pipeline, count=3, full_result=True)
+    result = json.loads(next(e for e in events if e['event'] == 'result')['data'])['articles']
+    stats = json.loads(next(e for e in events if e['event'] == 'full_result')['data'])['stats']
+
+    assert CountingValidator.calls == 2
+    assert result[0]['validationPassed'] is True
+    assert result[0]['validationNote'].startswith('Locally confirmed')
+    assert stats == {'unique_articles': 3, 'locally_confirmed': 1, 'validation_skip_rate': pytest.approx(1 / 3)}
+
+
+@pytest.mark.asyncio
+async def test_stage_latencies_and_time_to_first_event_are_recorded():
+    metrics = PipelineMetrics()
+    pipeline = make_pipeline(n=3, analyzer=StubAnalyzer(delay=0.001))
+    pipeline.metrics = metrics
+
+    await collect(pipeline, count=3)
+
+    text = metrics.render()
+    assert 'pipeline_time_to_first_event_seconds_count 1' in text
+    for stage in ('fetch', 'analysis', 'validation', 'total'):
+        assert f'pipeline_stage_duration_seconds_count{{stage="{stage}"}} 1' in text
+
+
+class StreamingAnalyzer(StubAnalyzer):
+    """Streams the gist in two steps before returning the full analysis."""
+
+    streaming = True
+
+    async def analyze_article(self, article, on_partial=None):
+        gist = f"Gist of {article['title']}"
+        if on_partial is not None:
+            on_partial(gist[:7])
+            await asyncio.sleep(0)
+            on_partial(gist)
+        return await super().analyze_article(article)
+
+
+@pytest.mark.asyncio
+async def test_streamed_gists_are_emitted_before_the_analysis():
+    streaming = await collect(make_pipeline(n=3, analyzer=StreamingAnalyzer(delay=0.001)), count=3)
+    plain = await collect(make_pipeline(n=3, analyzer=StubAnalyzer(delay=0.001)), count=3)
+
+    partials = [json.loads(e['data']) for e in streaming if e['event'] == 'partial']
+    assert {p['id'] for p in partials} == {1, 2, 3}
+    assert {'id': 2, 'gist': 'Gist of Article 1'} in partials
+
+    first_partial = next(i for i, e in enumerate(streaming) if e['event'] == 'partial')
+    first_analyzed = next(i for i, e in enumerate(streaming)
+                          if e['event'] == 'log' and 'Analyzed article' in e['data'])
+    assert first_partial < first_analyzed
+
+    streamed_result, plain_result = (next(e for e in events if e['event'] == 'result')['data']
+                                     for events in (streaming, plain))
+    assert streamed_result == plain_result
+
+
+@pytest.mark.asyncio
+async def test_each_article_is_emitted_as_soon_as_it_is_validated():
+    articles = make_articles(4)
+    articles[3] = dict(articles[0], url='https://example.com/syndicated')
+    pipeline = NewsAnalysisPipeline(fetcher=StubFetcher(articles), analyzer=StubAnalyzer(delay=0.001),
+                                    validator=StubValidator(), precheck_confidence=2.0)
+
+    events = await collect(pipeline, count=4)
+
+    names = [event['event'] for event in events]
+    streamed = [json.loads(e['data']) for e in events if e['event'] == 'article']
+    final = json.loads(events[names.index('result')]['data'])['articles']
+    assert names.index('article') < names.index('result')
+    assert sorted(streamed, key=lambda article: article['id']) == final
+    assert next(a for a in streamed if a['id'] == 4)['duplicateOf'] == 1
+
+
+@pytest.mark.asyncio
+async def test_validated_articles_are_stored(tmp_path):
+    store = ArticleStore(str(tmp_path / 'articles.sqlite3'))
+    pipeline = make_pipeline(n=3)
+    pipeline.store = store
+
+    await collect(pipeline, topic='Business', count=3)
+
+    total, articles = store.query(topic='Business')
+    assert total == 3
+    assert {article['summary'] for article in articles} == {f'Gist of Article {i}' for i in range(3)}
+    store.close()
+
+
+class WatermarkFetcher(StubFetcher):
+    """Serves whatever is in `articles`, honouring the high-water mark API."""
+
+    def __init__(self, articles):
+        super().__init__(articles)
+        self.mark = None
+        self.since = []
+
+    def watermark(self, topic):
+        return self.mark
+
+    def advance_watermark(self, topic, articles, retry=()):
+        self.mark = advance(self.mark, articles, retry)
+
+    async def fetch_news(self, topic="Indian Politics", num_articles=12, since=None):
+        self.since.append(since)
+        return self.articles[:num_articles]
+
+
+@pytest.mark.asyncio
+async def test_incremental_runs_only_process_articles_past_the_mark():
+    articles = make_articles(3)
+    for i, article in enumerate(articles):
+        article['publishedAt'] = f'2024-01-15T1{i}:00:00Z'
+    fetcher = WatermarkFetcher(articles)
+    analyzer = StubAnalyzer(delay=0)
+    pipeline = make_pipeline(analyzer=analyzer)
+    pipeline.fetcher = fetcher
+
+    await collect(pipeline, count=3, incremental=True)
+    assert analyzer.started == 3
+    assert fetcher.mark == ('2024-01-15T12:00:00Z', ['https://example.com/2'])
+
+    fetcher.articles = [dict(articles[0], url='https://example.com/new', publishedAt='2024-01-15T13:00:00Z')] + articles
+    events = await collect(pipeline, count=4, incremental=True)
+    result = json.loads(next(e['data'] for e in events if e['event'] == 'result'))
+    assert analyzer.started == 4
+    assert [article['url'] for article in result['articles']] == ['https://example.com/new']
+    assert fetcher.since == [None, '2024-01-15T12:00:00Z']
+
+    events = await collect(pipeline, count=4, incremental=True)
+    assert json.loads(next(e['data'] for e in events if e['event'] == 'result')) == {'articles': []}
+    assert analyzer.started == 4
+
+
+class FlakyAnalyzer(StubAnalyzer):
+    """Returns the degraded placeholder for the articles in `failing`."""
+
+    def __init__(self, failing=()):
+        super().__init__(delay=0)
+        self.failing = set(failing)
+
+    async def analyze_article(self, article):
+        analysis = await super().analyze_article(article)
+        if article['url'] in self.failing:
+            return {'gist': 'Unable to analyze article', 'sentiment': 'neutral', 'tone': 'unknown', 'error': 'timeout'}
+        return analysis
+
+
+@pytest.mark.asyncio
+async def test_mark_stops_short_of_degraded_articles():
+    articles = make_articles(3)
+    for i, article in enumerate(articles):
+        article['publishedAt'] = f'2024-01-15T1{i}:00:00Z'
+    fetcher = WatermarkFetcher(articles)
+    analyzer = FlakyAnalyzer(failing={'https://example.com/1'})
+    pipeline = make_pipeline(analyzer=analyzer)
+    pipeline.fetcher = fetcher
+
+    # A full run sets the mark only when asked to
+    await collect(pipeline, count=3)
+    assert fetcher.mark is None
+    await collect(pipeline, count=3, advance_mark=True)
+    assert fetcher.mark == ('2024-01-15T10:00:00Z', ['https://example.com/0'])
+
+    analyzer.failing.clear()
+    events = await collect(pipeline, count=3, incremental=True)
+    result = json.loads(next(e['data'] for e in events if e['event'] == 'result'))
+    assert [article['url'] for article in result['articles']] == ['https://example.com/1', 'https://example.com/2']
+    assert fetcher.mark == ('2024-01-15T12:00:00Z', ['https://example.com/2'])
+
+
+class PagedFetcher(StubFetcher):
+    """Serves articles in pages of `page_size`, each after a delay; records page deliveries."""
+
+    def __init__(self, articles, page_size=3, delay=0.05):
+        super().__init__(articles)
+        self.page_size = page_size
+        self.delay = delay
+        self.delivered = 0
+        self.closed = False
+
+    async def stream_news(self, topic="Indian Politics", num_articles=500, since=None):
+        try:
+            for start in range(0, min(num_articles, len(self.articles)), self.page_size):
+                if start:
+                    await asyncio.sleep(self.delay)
+                self.delivered += 1
+                yield self.articles[start:start + self.page_size]
+        finally:
+            self.closed = True
+
+
+class PagedWatermarkFetcher(PagedFetcher):
+    """Pages newest first through the articles published from `since` on, like NewsAPI."""
+
+    def __init__(self, articles):
+        super().__init__(articles, page_size=3, delay=0)
+        self.mark = None
+
+    def watermark(self, topic):
+        return self.mark
+
+    def advance_watermark(self, topic, articles, retry=()):
+        self.mark = advance(self.mark, articles, retry)
+
+    async def stream_news(self, topic="Indian Politics", num_articles=500, since=None):
+        everything = self.articles
+        self.articles = [article for article in everything if not since or article['publishedAt'] >= since]
+        try:
+            async for page in super().stream_news(topic, num_articles, since):
+                yield page
+        finally:
+            self.articles = everything
+
+
+@pytest.mark.asyncio
+async def test_incremental_runs_page_back_to_the_mark():
+    articles = make_articles(10)
+    for i, article in enumerate(articles):
+        article['publishedAt'] = f'2024-01-15T{19 - i}:00:00Z'  # Newest first
+    fetcher = PagedWatermarkFetcher(articles[7:])
+    analyzer = StubAnalyzer(delay=0)
+    pipeline = make_pipeline(analyzer=analyzer)
+    pipeline.fetcher = fetcher
+
+    await collect(pipeline, count=3, advance_mark=True)
+    assert fetcher.mark == ('2024-01-15T12:00:00Z', ['https://example.com/7'])
+
+    # Seven new articles, more than `count`: none of them may be skipped
+    fetcher.articles = articles
+    await collect(pipeline, count=3, incremental=True)
+    assert analyzer.started == 10
+    assert fetcher.mark == ('2024-01-15T19:00:00Z', ['https://example.com/0'])
+
+
+class TruncatedFetcher(PagedWatermarkFetcher):
+    """Delivers the first page, then fails the way NewsFetcher does when a later page errors."""
+
+    async def stream_news(self, topic="Indian Politics", num_articles=500, since=None):
+        pages = super().stream_news(topic, num_articles, since)
+        yield await anext(pages)
+        await pages.aclose()
+        raise IncompleteFetchError(2, 4)
+
+
+@pytest.mark.asyncio
+async def test_truncated_fetch_is_reported_and_keeps_the_mark():
+    articles = make_articles(10)
+    for i, article in enumerate(articles):
+        article['publishedAt'] = f'2024-01-15T{19 - i}:00:00Z'  # Newest first
+    fetcher = TruncatedFetcher(articles)
+    fetcher.mark = ('2024-01-15T09:00:00Z', [])
+    pipeline = make_pipeline()
+    pipeline.fetcher = fetcher
+
+    events = await collect(pipeline, count=3, incremental=True)
+    logs = [json.loads(e['data'])['message'] for e in events if e['event'] == 'log']
+    result = json.loads(next(e['data'] for e in events if e['event'] == 'result'))
+
+    assert 'Fetching stopped after 3 articles: NewsAPI page 2 of 4 could not be fetched' in logs
+    assert not any(message.startswith('Retrieved 3 articles') for message in logs)
+    assert len(result['articles']) == 3
+    # The articles on the missing pages are older than the mark would move to
+    assert fetcher.mark == ('2024-01-15T09:00:00Z', [])
+
+
+class RecordingAnalyzer(StubAnalyzer):
+    """Records how many pages had been delivered when each analysis started."""
+
+    def __init__(self, fetcher):
+        super().__init__(delay=0)
+        self.fetcher = fetcher
+        self.pages_seen = []
+
+    async def analyze_article(self, article):
+        self.pages_seen.append(self.fetcher.delivered)
+        return await super().analyze_article(article)
+
+
+@pytest.mark.asyncio
+async def test_paged_fetch_analyzes_pages_as_they_arrive():
+    articles = make_articles(8)
+    articles[7] = dict(articles[1], url='https://example.com/syndicated')
+    fetcher = PagedFetcher(articles)
+    analyzer = RecordingAnalyzer(fetcher)
+    pipeline = make_pipeline(analyzer=analyzer)
+    pipeline.fetcher = fetcher
+
+    events = await collect(pipeline, count=8)
+    result = json.loads(next(e['data'] for e in events if e['event'] == 'result'))
+
+    assert analyzer.pages_seen[0] == 1
+    assert analyzer.started == 7
+    assert [article['id'] for article in result['articles']] == list(range(1, 9))
+    assert result['articles'][7]['duplicateOf'] == 2
+    assert fetcher.closed
+
+
+@pytest.mark.asyncio
+async def test_abandoned_paged_run_closes_the_page_stream():
+    fetcher = PagedFetcher(make_articles(9), delay=0.5)
+    pipeline = make_pipeline(analyzer=StubAnalyzer(delay=0))
+    pipeline.fetcher = fetcher
+
+    run = pipeline.run(count=9)
+    async for event in run:
+        if event['event'] == 'article':
+            break
+    await run.aclose()
+
+    assert fetcher.delivered == 1
+    assert fetcher.closed
+
+
+class TopicFetcher:
+    """Serves a fixed article list per topic; records how many fetches overlap."""
+
+    def __init__(self, by_topic, delay=0.02):
+        self.by_topic = by_topic
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def fetch_news(self, topic="Indian Politics", num_articles=12):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return self.by_topic.get(topic, [])[:num_articles]
+
+
+@pytest.mark.asyncio
+async def test_multi_topic_run_fetches_concurrently_and_analyzes_shared_articles_once(tmp_path):
+    articles = make_articles(5)
+    fetcher = TopicFetcher({'Business': articles[:3], 'Indian Politics': articles[2:]})
+    analyzer = StubAnalyzer(delay=0)
+    pipeline = make_pipeline(analyzer=analyzer)
+    pipeline.fetcher = fetcher
+    pipeline.store = ArticleStore(str(tmp_path / 'articles.sqlite3'))
+
+    events = await collect(pipeline, topics=['Business', 'Indian Politics'], count=3)
+    emitted = [json.loads(e['data']) for e in events if e['event'] == 'article']
+
+    assert fetcher.peak == 2
+    assert analyzer.started == 5
+    assert {article['url']: article['topics'] for article in emitted} == {
+        'https://example.com/0': ['Business'],
+        'https://example.com/1': ['Business'],
+        'https://example.com/2': ['Business', 'Indian Politics'],
+        'https://example.com/3': ['Indian Politics'],
+        'https://example.com/4': ['Indian Politics'],
+    }
+    assert pipeline.store.query(topic='Business')[0] == 3
+    assert pipeline.store.query(topic='Indian Politics')[0] == 3
+    assert pipeline.store.query(text='Article 2')[1][0]['topics'] == ['Business', 'Indian Politics']
+    pipeline.store.close()
@@ -0,0 +1,171 @@
+"""
+Tests for scheduled topic pre-warming.
+"""
+
+import json
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from events import ArticleEvent, CloseEvent, ErrorEvent, FullResultEvent, LogEvent, ResultEvent
+from news_fetcher import TOPIC_QUERIES
+from prewarm import TopicPrewarmer, merge_articles
+from run_coalescer import RunCoalescer
+from run_ledger import RunLedger
+
+
+class TopicPipeline:
+    """Emits a log, one new article and the final events for any topic; records each run."""
+
+    def __init__(self, fail_topics=()):
+        self.fail_topics = fail_topics
+        self.runs = []
+        self.incremental = []
+        self.advance_mark = []
+
+    async def run(self, topic, count, incremental=False, full_result=False, advance_mark=False):
+        self.runs.append(topic)
+        self.incremental.append(incremental)
+        self.advance_mark.append(advance_mark)
+        await asyncio.sleep(0.01)
+        if topic in self.fail_topics:
+            yield ErrorEvent('No articles found or API error.')
+            return
+        article = {'id': 1, 'title': topic, 'url': f'https://example.com/{topic}/{len(self.runs)}'}
+        yield LogEvent('Analyzing', 'analyze')
+        yield ArticleEvent(article)
+        yield ResultEvent([article])
+        if full_result:
+            yield FullResultEvent([], [], {})
+        yield CloseEvent()
+
+
+@pytest.mark.asyncio
+async def test_refresh_keeps_article_and_result_events():
+    prewarmer = TopicPrewarmer(TopicPipeline(), interval=60)
+
+    await prewarmer.refresh('Technology')
+    snapshot = prewarmer.snapshot('Technology', 12)
+    events = snapshot.replay()
+
+    assert [event['event'] for event in events] == ['log', 'article', 'result', 'close']
+    assert json.loads(events[1]['data'])['title'] == 'Technology'
+    assert [event['id'] for event in events] == [f'{snapshot.id}:{n}' for n in range(1, 5)]
+    assert snapshot.replay(last_event_id=events[1]['id']) == events[2:]
+    assert prewarmer.snapshot('Technology', 20) is None
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_previous_snapshot():
+    pipeline = TopicPipeline()
+    prewarmer = TopicPrewarmer(pipeline, interval=60)
+    previous = await prewarmer.refresh('Business')
+
+    pipeline.fail_topics = ('Business',)
+    assert await prewarmer.refresh('Business') is None
+    assert prewarmer.snapshot('Business', 12) is previous
+
+
+@pytest.mark.asyncio
+async def test_later_refreshes_are_incremental_and_merged():
+    pipeline = TopicPipeline()
+    prewarmer = TopicPrewarmer(pipeline, interval=60)
+
+    await prewarmer.refresh('Business')
+    snapshot = await prewarmer.refresh('Business')
+
+    assert pipeline.incremental == [False, True]
+    # The first, full refresh sets the mark the incremental ones continue from
+    assert pipeline.advance_mark == [True, False]
+    assert [(a['id'], a['url']) for a in snapshot.articles] == [
+        (1, 'https://example.com/Business/2'), (2, 'https://example.com/Business/1')
+    ]
+
+
+def test_merge_keeps_newest_and_remaps_duplicates():
+    old = [{'id': 1, 'url': 'a'}, {'id': 2, 'url': 'b', 'duplicateOf': 1}, {'id': 3, 'url': 'c', 'duplicateOf': 1}]
+    new = [{'id': 1, 'url': 'n'}, {'id': 2, 'url': 'c'}]
+
+    merged = merge_articles(new, old, count=4)
+
+    assert merged == [{'id': 1, 'url': 'n'}, {'id': 2, 'url': 'c'}, {'id': 3, 'url': 'a'},
+                      {'id': 4, 'url': 'b', 'duplicateOf': 3}]
+    assert [a['url'] for a in merge_articles(new, old, count=2)] == ['n', 'c']
+
+
+@pytest.mark.asyncio
+async def test_stale_snapshots_are_not_served():
+    prewarmer = TopicPrewarmer(TopicPipeline(), interval=60, max_age=10)
+    snapshot = await prewarmer.refresh('International')
+
+    snapshot.created_at -= 11
+
+    assert prewarmer.snapshot('International', 12) is None
+
+
+@pytest.mark.asyncio
+async def test_scheduler_refreshes_every_configured_topic():
+    pipeline = TopicPipeline()
+    prewarmer = TopicPrewarmer(pipeline, interval=60)
+    prewarmer.start()
+    try:
+        for _ in range(100):
+            if len(prewarmer.snapshots) == len(TOPIC_QUERIES):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await prewarmer.close()
+
+    assert pipeline.runs == list(TOPIC_QUERIES)
+    assert {topic for topic, _ in prewarmer.snapshots} == set(TOPIC_QUERIES)
+
+
+@pytest.mark.asyncio
+async def test_one_worker_refreshes_and_the_others_serve_its_snapshots(tmp_path):
+    path = str(tmp_path / 'runs.sqlite3')
+    ledgers = [RunLedger(path, poll_interval=0.01) for _ in range(2)]
+    pipelines = [TopicPipeline() for _ in ledgers]
+    prewarmers = [TopicPrewarmer(pipeline, interval=60, ledger=ledger, sync_interval=0.01)
+                  for pipeline, ledger in zip(pipelines, ledgers)]
+    for prewarmer in prewarmers:
+        prewarmer.start()
+    try:
+        for _ in range(200):
+            if all(len(prewarmer.snapshots) == len(TOPIC_QUERIES) for prewarmer in prewarmers):
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        for prewarmer in prewarmers:
+            await prewarmer.close()
+        for ledger in ledgers:
+            ledger.close()
+
+    # Each topic was refreshed once, by whichever worker holds the lease
+    assert sorted(pipelines[0].runs + pipelines[1].runs) == sorted(TOPIC_QUERIES)
+    assert [] in (pipelines[0].runs, pipelines[1].runs)
+    first, second = (prewarmer.snapshot('Business', 12) for prewarmer in prewarmers)
+    assert (first.id, first.articles, first.created_at) == (second.id, second.articles, second.created_at)
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_shared_with_concurrent_requests():
+    pipeline = TopicPipeline()
+    runs = RunCoalescer()
+    prewarmer = TopicPrewarmer(pipeline, interval=60, runs=runs)
+
+    refresh = asyncio.create_task(prewarmer.refresh('Technology'))
+    await asyncio.sleep(0)
+    joined = [event async for event in runs.subscribe(('Technology', 12), lambda: pipeline.run('Technology', 12))]
+    await refresh
+
+    assert pipeline.runs == ['Technology']
+    assert joined[-1]['event'] == 'close'
+
+
+def test_from_env_is_disabled_by_default():
+    with patch.dict('os.environ', {'PREWARM_INTERVAL': '0'}):
+        assert TopicPrewarmer.from_env(TopicPipeline()) is None
+
+    with patch.dict('os.environ', {'PREWARM_INTERVAL': '300', 'PREWARM_COUNT': '20'}):
+        prewarmer = TopicPrewarmer.from_env(TopicPipeline())
+    assert (prewarmer.interval, prewarmer.count, prewarmer.max_age) == (300, 20, 600)
@@ -0,0 +1,188 @@
+"""
+Unit tests for the shared LLM rate limiter.
+"""
+
+import pytest
+import json
+import time
+import asyncio
+import sqlite3
+import httpx
+from unittest.mock import Mock
+
+from rate_limiter import RateLimiter, SharedRateLimiter, TokenBucket, parse_reset, estimate_tokens, get_rate_limiter
+
+MODEL = "llama-3.1-8b-instant"
+
+
+def completion_response(status_code=200, headers=None, model=MODEL):
+    request = httpx.Request(
+        "POST",
+        "https://api.groq.com/openai/v1/chat/completions",
+        content=json.dumps({"model": model, "messages": []})
+    )
+    return httpx.Response(status_code, headers=headers or {}, request=request)
+
+
+def test_parse_reset_formats():
+    """Groq style durations are converted to seconds."""
+    assert parse_reset("7.66s") == pytest.approx(7.66)
+    assert parse_reset("2m59.56s") == pytest.approx(179.56)
+    assert parse_reset("1h2m") == pytest.approx(3720)
+    assert parse_reset("120ms") == pytest.approx(0.12)
+    assert parse_reset("3") == 3.0
+    assert parse_reset("soon") is None
+    assert parse_reset(None) is None
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("x" * 400, completion_tokens=100) == 200
+
+
+def test_token_bucket_refills_over_period():
+    """An empty bucket reports the wait needed to refill the requested amount."""
+    bucket = TokenBucket(60, period=60.0)
+    now = bucket.updated
+    bucket.take(60)
+
+    assert bucket.wait_time(10, now) == pytest.approx(10.0)
+    assert bucket.wait_time(10, now + 10) == 0.0
+
+
+@pytest.mark.asyncio
+class TestRateLimiter:
+    """Test budget enforcement and header updates."""
+
+    async def test_acquire_is_immediate_within_budget(self):
+        limiter = RateLimiter({MODEL: {"rpm": 10, "tpm": 1000}})
+        waited = await limiter.acquire(MODEL, 100)
+
+        assert waited == 0.0
+        assert limiter.budget(MODEL).tokens.tokens == pytest.approx(900, abs=1)
+
+    async def test_acquire_waits_when_tokens_exhausted(self):
+        """Calls wait for the token budget to refill rather than fail."""
+        limiter = RateLimiter({MODEL: {"rpm": 100, "tpm": 6000}})  # 100 tokens/s
+        await limiter.acquire(MODEL, 6000)
+
+        start = time.monotonic()
+        await limiter.acquire(MODEL, 10)
+        assert time.monotonic() - start == pytest.approx(0.1, abs=0.05)
+
+    async def test_record_usage_returns_unused_estimate(self):
+        limiter = RateLimiter({MODEL: {"rpm": 10, "tpm": 1000}})
+        await limiter.acquire(MODEL, 500)
+        limiter.record_usage(MODEL, 500, Mock(usage=Mock(total_tokens=200)))
+
+        assert limiter.budget(MODEL).tokens.tokens == pytest.approx(800, abs=1)
+
+    async def test_headers_update_token_budget(self):
+        """x-ratelimit-* headers resize and cap the per-model budget."""
+        limiter = RateLimiter()
+        await limiter.on_response(completion_response(headers={
+            'x-ratelimit-limit-tokens': '20000',
+            'x-ratelimit-remaining-tokens': '1500',
+            'x-ratelimit-remaining-requests': '14000',
+        }))
+        budget = limiter.budget(MODEL)
+
+        assert budget.tokens.capacity == 20000
+        assert budget.tokens.tokens == pytest.approx(1500, abs=5)
+        assert budget.blocked_until == 0.0
+
+    async def test_exhausted_request_quota_blocks_until_reset(self):
+        limiter = RateLimiter()
+        await limiter.on_response(completion_response(headers={
+            'x-ratelimit-remaining-requests': '0',
+            'x-ratelimit-reset-requests': '2m',
+        }))
+
+        assert limiter.budget(MODEL).blocked_until - time.monotonic() == pytest.approx(120, abs=1)
+
+    async def test_429_honors_retry_after(self):
+        limiter = RateLimiter()
+        await limiter.on_response(completion_response(429, headers={'retry-after': '7'}))
+
+        assert limiter.budget(MODEL).blocked_until - time.monotonic() == pytest.approx(7, abs=0.5)
+        # Other models are unaffected
+        assert limiter.budget("llama-3.3-70b-versatile").blocked_until == 0.0
+
+    async def test_hook_ignores_other_endpoints(self):
+        limiter = RateLimiter()
+        response = httpx.Response(429, request=httpx.Request("GET", "https://api.groq.com/openai/v1/models"))
+        await limiter.on_response(response)
+
+        assert limiter.budgets == {}
+
+
+@pytest.mark.asyncio
+class TestSharedRateLimiter:
+    """Budgets shared by worker processes through one SQLite file."""
+
+    async def test_workers_draw_from_one_budget(self, tmp_path):
+        path = str(tmp_path / 'limits.sqlite3')
+        limits = {MODEL: {"rpm": 100, "tpm": 6000}}  # 100 tokens/s
+        first, second = SharedRateLimiter(path, limits), SharedRateLimiter(path, limits)
+        try:
+            await first.acquire(MODEL, 6000)
+
+            start = time.monotonic()
+            await second.acquire(MODEL, 10)
+            assert time.monotonic() - start == pytest.approx(0.1, abs=0.05)
+        finally:
+            first.close()
+            second.close()
+
+    async def test_a_429_pauses_every_worker(self, tmp_path):
+        path = str(tmp_path / 'limits.sqlite3')
+        first, second = SharedRateLimiter(path), SharedRateLimiter(path)
+        try:
+            await first.on_response(completion_response(429, {"retry-after": "0.1"}))
+
+            start = time.monotonic()
+            await second.acquire(MODEL, 10)
+            assert time.monotonic() - start == pytest.approx(0.1, abs=0.05)
+        finally:
+            first.close()
+            second.close()
+
+    async def test_waiting_for_another_workers_lock_does_not_block_the_loop(self, tmp_path):
+        path = str(tmp_path / 'limits.sqlite3')
+        limiter = SharedRateLimiter(path)
+        other = sqlite3.connect(path, isolation_level=None)
+        try:
+            other.execute('BEGIN IMMEDIATE')  # Another worker mid-update
+            acquired = asyncio.create_task(limiter.acquire(MODEL, 10))
+
+            ticks = 0
+            for _ in range(5):
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert ticks == 5 and not acquired.done()
+
+            other.execute('COMMIT')
+            assert await asyncio.wait_for(acquired, 2) == 0.0
+        finally:
+            other.close()
+            limiter.close()
+
+    async def test_shared_usage_is_reconciled_in_the_background(self, tmp_path):
+        limiter = SharedRateLimiter(str(tmp_path / 'limits.sqlite3'), {MODEL: {"rpm": 10, "tpm": 1000}})
+        try:
+            await limiter.acquire(MODEL, 500)
+            limiter.record_usage(MODEL, 500, Mock(usage=Mock(total_tokens=200)))
+            await asyncio.gather(*limiter._pending)
+
+            with limiter._locked(MODEL) as budget:
+                assert budget.tokens.tokens == pytest.approx(800, abs=1)
+        finally:
+            limiter.close()
+
+    async def test_shared_only_when_configured(self, monkeypatch, tmp_path):
+        assert type(get_rate_limiter()) is RateLimiter
+
+        monkeypatch.setattr('rate_limiter._shared_limiter', None)
+        monkeypatch.setenv('RATE_LIMIT_PATH', str(tmp_path / 'limits.sqlite3'))
+        limiter = get_rate_limiter()
+        assert isinstance(limiter, SharedRateLimiter)
+        limiter.close()
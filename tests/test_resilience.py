@@ -0,0 +1,273 @@
+"""
+Tests for upstream retries and circuit breaking.
+"""
+
+import json
+import time
+import asyncio
+import httpx
+import pytest
+from email.utils import formatdate
+from unittest.mock import AsyncMock, Mock, patch
+
+import openai
+
+from llm_analyzer import LLMAnalyzer
+from llm_validator import LLMValidator
+from metrics import get_metrics
+from news_fetcher import IncompleteFetchError, NewsFetcher
+from rate_limiter import RateLimiter
+from resilience import (CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retry,
+                        is_retryable, retry_after)
+
+REQUEST = httpx.Request('POST', 'https://api.example.com/chat/completions')
+
+FAST = RetryPolicy(attempts=3, base_delay=0, max_delay=0, attempt_timeout=1, deadline=5)
+
+
+def status_error(status, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=REQUEST)
+    return httpx.HTTPStatusError(f'{status}', request=REQUEST, response=response)
+
+
+def rate_limit_error(retry_after_value='0'):
+    response = httpx.Response(429, headers={'retry-after': retry_after_value}, request=REQUEST)
+    return openai.RateLimitError('Rate limit reached', response=response, body=None)
+
+
+class Flaky:
+    """Fails with each of `errors` in turn, then returns 'ok'."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+def test_retryable_errors():
+    assert is_retryable(status_error(429))
+    assert is_retryable(status_error(503))
+    assert is_retryable(httpx.ConnectError('refused'))
+    assert is_retryable(TimeoutError())
+    assert is_retryable(rate_limit_error())
+    assert is_retryable(openai.APITimeoutError(request=REQUEST))
+    assert not is_retryable(status_error(400))
+    assert not is_retryable(ValueError('bad json'))
+
+
+def test_retry_after_forms():
+    assert retry_after(status_error(429, {'retry-after': '7'})) == 7
+    assert retry_after(status_error(429, {'retry-after-ms': '250', 'retry-after': '7'})) == 0.25
+    assert 8 <= retry_after(status_error(429, {'retry-after': formatdate(time.time() + 10, usegmt=True)})) <= 10
+    assert retry_after(status_error(503)) is None
+    assert retry_after(ValueError()) is None
+
+
+def test_backoff_is_jittered_and_capped_but_honors_retry_after():
+    policy = RetryPolicy(base_delay=1, max_delay=3)
+    delays = [policy.backoff(5) for _ in range(50)]
+    assert all(0 <= delay <= 3 for delay in delays)
+    assert len(set(delays)) > 1
+    assert policy.backoff(1, status_error(429, {'retry-after': '10'})) == 10
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried():
+    call = Flaky(rate_limit_error(), httpx.ReadTimeout('slow'))
+
+    assert await call_with_retry('groq', call, FAST, CircuitBreaker('groq')) == 'ok'
+    assert call.calls == 3
+    text = get_metrics().render()
+    assert 'upstream_retries_total{upstream="groq",reason="429"} 1' in text
+    assert 'upstream_retries_total{upstream="groq",reason="ReadTimeout"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_permanent_failures_and_exhausted_attempts_raise():
+    call = Flaky(status_error(401))
+    with pytest.raises(httpx.HTTPStatusError):
+        await call_with_retry('newsapi', call, FAST, CircuitBreaker('newsapi'))
+    assert call.calls == 1
+
+    call = Flaky(*[status_error(502)] * 3)
+    with pytest.raises(httpx.HTTPStatusError):
+        await call_with_retry('newsapi', call, FAST, CircuitBreaker('newsapi'))
+    assert call.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_retry_after_past_the_deadline_is_not_waited_for():
+    policy = RetryPolicy(attempts=3, base_delay=0, attempt_timeout=1, deadline=1)
+    call = Flaky(rate_limit_error('30'))
+
+    with patch('resilience.asyncio.sleep', new=AsyncMock()) as sleep, pytest.raises(openai.RateLimitError):
+        await call_with_retry('groq', call, policy, CircuitBreaker('groq'))
+    assert call.calls == 1
+    sleep.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_slow_attempts_time_out_and_are_retried():
+    calls = []
+
+    async def slow_then_fast():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return 'ok'
+
+    policy = RetryPolicy(attempts=2, base_delay=0, attempt_timeout=0.05, deadline=5)
+    assert await call_with_retry('groq', slow_then_fast, policy, CircuitBreaker('groq')) == 'ok'
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_rate_limit_budget_is_not_timed_or_blamed_on_the_upstream():
+    async def wait_for_budget():
+        await asyncio.sleep(0.2)
+
+    policy = RetryPolicy(attempts=1, base_delay=0, attempt_timeout=0.05, deadline=0.1)
+    breaker = CircuitBreaker('groq', failure_threshold=1)
+    call = Flaky()
+    assert await call_with_retry('groq', call, policy, breaker, before_attempt=wait_for_budget) == 'ok'
+    assert call.calls == 1
+
+    async def budget_unavailable():
+        raise ValueError('request exceeds the budget')
+
+    with pytest.raises(ValueError):
+        await call_with_retry('groq', call, policy, breaker, before_attempt=budget_unavailable)
+    assert call.calls == 1
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_recovers_through_a_probe():
+    breaker = CircuitBreaker('groq', failure_threshold=2, reset_timeout=30)
+    call = Flaky(*[status_error(503)] * 2)
+    with pytest.raises(httpx.HTTPStatusError):
+        await call_with_retry('groq', call, RetryPolicy(attempts=2, base_delay=0), breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    call = Flaky()
+    with pytest.raises(CircuitOpenError):
+        await call_with_retry('groq', call, FAST, breaker)
+    assert call.calls == 0
+    assert 'circuit_breaker_state{upstream="groq"} 2' in get_metrics().render()
+    assert 'circuit_breaker_rejections_total{upstream="groq"} 1' in get_metrics().render()
+
+    breaker.opened_at -= 31
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.opened_at -= 31
+    assert await call_with_retry('groq', Flaky(), FAST, breaker) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_rate_limiting_does_not_open_the_breaker():
+    breaker = CircuitBreaker('groq', failure_threshold=1)
+    call = Flaky(rate_limit_error(), rate_limit_error())
+
+    assert await call_with_retry('groq', call, FAST, breaker) == 'ok'
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+
+
+def test_each_model_has_its_own_breaker():
+    with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key'}):
+        analyzer, validator = LLMAnalyzer(), LLMValidator()
+
+    assert analyzer.breaker.upstream == 'groq:llama-3.3-70b-versatile'
+    assert validator.breaker.upstream == 'groq:llama-3.1-8b-instant'
+
+
+@pytest.mark.asyncio
+async def test_analyzer_retries_instead_of_degrading():
+    with patch.dict('os.environ', {'GROQ_API_KEY': 'test_key'}):
+        analyzer = LLMAnalyzer()
+    analyzer.retry = FAST
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = json.dumps({'gist': 'G', 'sentiment': 'neutral', 'tone': 'balanced'})
+    analyzer.client.chat.completions.create = AsyncMock(side_effect=[rate_limit_error(), response])
+
+    result = await analyzer.analyze_article({'title': 'T', 'description': 'D', 'content': 'C'})
+
+    assert result['gist'] == 'G'
+    assert 'llm_degraded_results_total{' not in get_metrics().render()
+
+
+@pytest.mark.asyncio
+async def test_fetcher_retries_rate_limited_pages():
+    responses = [
+        httpx.Response(429, headers={'retry-after': '0'}, json={'status': 'error'}),
+        httpx.Response(200, json={'status': 'ok', 'totalResults': 1, 'articles': [
+            {'title': 'T', 'description': 'D', 'content': 'C', 'url': 'https://example.com/1',
+             'publishedAt': '2024-05-01T10:00:00Z', 'source': {'name': 'S'}}
+        ]}),
+    ]
+    transport = httpx.MockTransport(lambda request: responses.pop(0))
+    with patch.dict('os.environ', {'NEWSAPI_KEY': 'test_key'}):
+        async with httpx.AsyncClient(transport=transport) as client:
+            fetcher = NewsFetcher(client=client)
+            fetcher.retry = FAST
+            articles = await fetcher.fetch_news(num_articles=1)
+
+    assert [article['url'] for article in articles] == ['https://example.com/1']
+    assert 'upstream_rate_limited_total{upstream="newsapi"} 1' in get_metrics().render()
+
+
+def newsapi_page(request):
+    """One article per page out of three, except page 2, which keeps failing."""
+    page = int(request.url.params['page'])
+    if page == 2:
+        return httpx.Response(500, json={'status': 'error'})
+    return httpx.Response(200, json={'status': 'ok', 'totalResults': 3, 'articles': [
+        {'title': f'T{page}', 'description': 'D', 'content': 'C', 'url': f'https://example.com/{page}',
+         'publishedAt': '2024-05-01T10:00:00Z', 'source': {'name': 'S'}}
+    ]})
+
+
+@pytest.mark.asyncio
+async def test_fetcher_reports_a_failed_middle_page():
+    env = {'NEWSAPI_KEY': 'test_key', 'NEWSAPI_PAGE_SIZE': '1'}
+    with patch.dict('os.environ', env):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(newsapi_page)) as client:
+            fetcher = NewsFetcher(client=client)
+            fetcher.retry = FAST
+            pages = []
+            with pytest.raises(IncompleteFetchError) as error:
+                async for page in fetcher.stream_news(num_articles=3):
+                    pages.append(page)
+
+    assert [[article['url'] for article in page] for page in pages] == [['https://example.com/1']]
+    assert (error.value.page, error.value.pages) == (2, 3)
+
+
+@pytest.mark.asyncio
+async def test_fetcher_requests_draw_on_the_newsapi_budget():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return newsapi_page(httpx.Request('GET', 'https://newsapi.test/?page=1'))
+
+    with patch.dict('os.environ', {'NEWSAPI_KEY': 'test_key', 'NEWSAPI_RPM': '1'}):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            fetcher = NewsFetcher(client=client, rate_limiter=RateLimiter())
+            assert len(await fetcher.fetch_news(num_articles=1)) == 1
+            # The minute's only request is spent: the next one waits for the budget to refill
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(fetcher.fetch_news(num_articles=1), 0.1)
+
+    assert len(requests) == 1
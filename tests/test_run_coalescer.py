@@ -0,0 +1,178 @@
+"""
+Unit tests for single-flight coalescing of pipeline runs.
+"""
+
+import pytest
+import asyncio
+
+from events import Event
+from run_coalescer import RunCoalescer
+
+
+class CountingSource:
+    """Factory for event streams that emit `n` events with a pause between them."""
+
+    def __init__(self, n=3, delay=0.01):
+        self.n = n
+        self.delay = delay
+        self.started = 0
+        self.cancelled = 0
+
+    def __call__(self):
+        self.started += 1
+        return self.stream()
+
+    async def stream(self):
+        try:
+            for i in range(self.n):
+                await asyncio.sleep(self.delay)
+                yield Event('log', data=str(i))
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+async def drain(stream):
+    return [event['data'] async for event in stream]
+
+
+@pytest.mark.asyncio
+class TestRunCoalescer:
+
+    async def test_concurrent_subscribers_share_one_run(self):
+        coalescer = RunCoalescer()
+        source = CountingSource()
+
+        results = await asyncio.gather(*(drain(coalescer.subscribe('k', source)) for _ in range(5)))
+
+        assert source.started == 1
+        assert all(result == ['0', '1', '2'] for result in results)
+        assert coalescer.runs == {}
+
+    async def test_late_joiner_gets_replay(self):
+        coalescer = RunCoalescer()
+        source = CountingSource(n=4, delay=0.05)
+        first = asyncio.create_task(drain(coalescer.subscribe('k', source)))
+        await asyncio.sleep(0.12)
+
+        late = await drain(coalescer.subscribe('k', source))
+
+        assert late == ['0', '1', '2', '3']
+        assert await first == ['0', '1', '2', '3']
+        assert source.started == 1
+
+    async def test_different_keys_run_separately(self):
+        coalescer = RunCoalescer()
+        source = CountingSource()
+
+        await asyncio.gather(drain(coalescer.subscribe('a', source)), drain(coalescer.subscribe('b', source)))
+
+        assert source.started == 2
+
+    async def test_run_survives_until_last_subscriber_leaves(self):
+        coalescer = RunCoalescer()
+        source = CountingSource(n=10, delay=0.02)
+        leaver = coalescer.subscribe('k', source)
+        stayer = asyncio.create_task(drain(coalescer.subscribe('k', source)))
+
+        await leaver.__anext__()
+        await leaver.aclose()
+        assert source.cancelled == 0
+
+        assert len(await stayer) == 10
+        assert source.cancelled == 0
+
+    async def test_last_subscriber_leaving_cancels_run(self):
+        coalescer = RunCoalescer()
+        source = CountingSource(n=10, delay=0.02)
+        subscription = coalescer.subscribe('k', source)
+
+        await subscription.__anext__()
+        await subscription.aclose()
+        await asyncio.sleep(0.01)
+
+        assert source.cancelled == 1
+        assert coalescer.runs == {}
+
+    async def test_finished_run_is_not_reused(self):
+        coalescer = RunCoalescer()
+        source = CountingSource()
+
+        await drain(coalescer.subscribe('k', source))
+        await drain(coalescer.subscribe('k', source))
+
+        assert source.started == 2
+
+    async def test_events_have_increasing_run_scoped_ids(self):
+        coalescer = RunCoalescer()
+        events = [event async for event in coalescer.subscribe('k', CountingSource())]
+
+        run_ids = {event['id'].split(':')[0] for event in events}
+        assert len(run_ids) == 1
+        assert [int(event['id'].split(':')[1]) for event in events] == [1, 2, 3]
+
+    async def test_resume_replays_only_later_events(self):
+        coalescer = RunCoalescer(retention=1.0)
+        source = CountingSource(n=4)
+        events = [event async for event in coalescer.subscribe('k', source)]
+
+        resumed = [event['data'] async for event in coalescer.subscribe('k', source, last_event_id=events[1]['id'])]
+
+        assert resumed == ['2', '3']
+        assert source.started == 1
+
+    async def test_unknown_or_foreign_event_id_starts_a_new_run(self):
+        coalescer = RunCoalescer(retention=1.0)
+        source = CountingSource()
+        events = [event async for event in coalescer.subscribe('k', source)]
+
+        assert await drain(coalescer.subscribe('k', source, last_event_id='nope:1')) == ['0', '1', '2']
+        assert await drain(coalescer.subscribe('other', source, last_event_id=events[0]['id'])) == ['0', '1', '2']
+        assert source.started == 3
+
+    async def test_disconnected_run_survives_grace_period_for_resume(self):
+        coalescer = RunCoalescer(resume_grace=0.5)
+        source = CountingSource(n=6, delay=0.02)
+        subscription = coalescer.subscribe('k', source)
+
+        first = await subscription.__anext__()
+        await subscription.aclose()
+        await asyncio.sleep(0.05)
+        assert source.cancelled == 0
+
+        resumed = await drain(coalescer.subscribe('k', source, last_event_id=first['id']))
+
+        assert resumed == ['1', '2', '3', '4', '5']
+        assert source.started == 1
+
+    async def test_run_is_cancelled_once_grace_period_expires(self):
+        coalescer = RunCoalescer(resume_grace=0.05)
+        source = CountingSource(n=50, delay=0.02)
+        subscription = coalescer.subscribe('k', source)
+
+        await subscription.__anext__()
+        await subscription.aclose()
+        await asyncio.sleep(0.1)
+
+        assert source.cancelled == 1
+        assert coalescer.runs == {} and coalescer.resumable == {}
+
+    async def test_replay_buffer_is_bounded(self):
+        coalescer = RunCoalescer(buffer_size=2)
+        release = asyncio.Event()
+
+        async def source():
+            for i in range(5):
+                yield Event('log', data=str(i))
+                await asyncio.sleep(0.01)
+            await release.wait()
+
+        first = coalescer.subscribe('k', source)
+        assert [(await first.__anext__())['data'] for _ in range(5)] == ['0', '1', '2', '3', '4']
+
+        late = coalescer.subscribe('k', source)
+        assert [(await late.__anext__())['data'] for _ in range(2)] == ['3', '4']
+
+        release.set()
+        await first.aclose()
+        await late.aclose()
@@ -0,0 +1,185 @@
+"""
+Tests for cross-process coordination of shared runs.
+"""
+
+import json
+import asyncio
+import logging
+import sqlite3
+import pytest
+
+from events import Event
+from run_coalescer import RunCoalescer
+from run_ledger import RunLedger
+
+
+async def events(n=3, delay=0.02):
+    for i in range(n):
+        await asyncio.sleep(delay)
+        yield Event('log', data=str(i))
+
+
+async def drain(stream):
+    return [event['data'] async for event in stream]
+
+
+@pytest.fixture
+def ledgers(tmp_path):
+    """Two ledgers on one file, standing in for two worker processes."""
+    path = str(tmp_path / 'runs.sqlite3')
+    pair = RunLedger(path, poll_interval=0.01), RunLedger(path, poll_interval=0.01)
+    yield pair
+    for ledger in pair:
+        ledger.close()
+
+
+@pytest.mark.asyncio
+async def test_live_run_is_claimed_once(ledgers):
+    first, second = ledgers
+
+    run_id, owned = await first.claim('k')
+    assert owned
+    assert await second.claim('k') == (run_id, False)
+    assert (await second.claim('other'))[1]
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_another_workers_lock_does_not_block_the_loop(ledgers):
+    ledger = ledgers[0]
+    other = sqlite3.connect(ledger.path, isolation_level=None)
+    try:
+        other.execute('BEGIN IMMEDIATE')  # Another worker mid-claim
+        claimed = asyncio.create_task(ledger.claim('k'))
+
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert ticks == 5 and not claimed.done()
+
+        other.execute('COMMIT')
+        assert (await asyncio.wait_for(claimed, 2))[1]
+    finally:
+        other.close()
+
+
+@pytest.mark.asyncio
+async def test_follower_sees_every_event_of_another_workers_run(ledgers):
+    owner, follower = ledgers
+    run_id, _ = await owner.claim('k')
+
+    published = asyncio.create_task(drain(owner.publish(run_id, events())))
+    await asyncio.sleep(0.03)
+    followed = await drain(follower.follow(run_id))
+
+    assert await published == ['0', '1', '2']
+    assert followed == ['0', '1', '2']
+    assert (await owner.claim('k'))[1]  # Finished runs are not joined again
+
+
+@pytest.mark.asyncio
+async def test_abandoned_run_ends_followers_with_an_error(ledgers):
+    owner, follower = ledgers
+    follower.lease = 0.05
+    run_id, _ = await owner.claim('k')  # Claimed, but its worker never publishes or beats
+
+    followed = [event async for event in follower.follow(run_id)]
+
+    assert followed[-1]['event'] == 'error'
+    assert 'stopped responding' in json.loads(followed[-1]['data'])['message']
+    assert (await follower.claim('k'))[1]
+
+
+@pytest.mark.asyncio
+async def test_one_worker_leads_a_role_until_its_lease_lapses(ledgers):
+    first, second = ledgers
+
+    assert await first.lead('prewarm', 0.05)
+    assert not await second.lead('prewarm', 0.05)
+    assert await first.lead('prewarm', 0.05)  # Renewed
+    await asyncio.sleep(0.06)
+    assert await second.lead('prewarm', 60)
+    assert not await first.lead('prewarm', 60)
+
+
+@pytest.mark.asyncio
+async def test_shared_values_are_returned_once_per_version(ledgers):
+    first, second = ledgers
+
+    await first.share('k', 'v1', {'articles': [1]})
+    assert await second.shared_since({}) == {'k': ('v1', {'articles': [1]})}
+    assert await second.shared_since({'k': 'v1'}) == {}
+
+
+@pytest.mark.asyncio
+async def test_coalescers_in_different_workers_share_one_run(ledgers):
+    started = []
+
+    def source():
+        started.append(1)
+        return events()
+
+    first, second = RunCoalescer(ledger=ledgers[0]), RunCoalescer(ledger=ledgers[1])
+    results = await asyncio.gather(drain(first.subscribe('k', source)), drain(second.subscribe('k', source)))
+
+    assert started == [1]
+    assert results == [['0', '1', '2'], ['0', '1', '2']]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_subscribers_in_one_worker_claim_once(ledgers, caplog):
+    caplog.set_level(logging.INFO, logger='run_coalescer')
+    started = []
+
+    def source():
+        started.append(1)
+        return events()
+
+    coalescer = RunCoalescer(ledger=ledgers[0])
+    results = await asyncio.gather(*(drain(coalescer.subscribe('k', source)) for _ in range(3)))
+
+    assert started == [1]
+    assert results == [['0', '1', '2']] * 3
+    assert 'Following run' not in caplog.text  # Not even their own run, through the ledger
+
+
+@pytest.mark.asyncio
+async def test_owner_keeps_running_while_another_worker_follows(ledgers):
+    first, second = RunCoalescer(ledger=ledgers[0]), RunCoalescer(ledger=ledgers[1])
+
+    owner_stream = first.subscribe('k', lambda: events(n=4))
+    assert (await owner_stream.__anext__())['data'] == '0'
+    followed = asyncio.create_task(drain(second.subscribe('k', lambda: events(n=4))))
+    await asyncio.sleep(0.01)
+    await owner_stream.aclose()  # The only local subscriber leaves
+
+    assert await followed == ['0', '1', '2', '3']
+
+
+@pytest.mark.asyncio
+async def test_run_is_cancelled_once_local_subscribers_and_followers_are_gone(ledgers):
+    produced = []
+
+    async def source():
+        for i in range(30):
+            await asyncio.sleep(0.02)
+            produced.append(i)
+            yield Event('log', data=str(i))
+
+    owner = RunCoalescer(ledger=ledgers[0], follower_check=0.01)
+    follower = RunCoalescer(ledger=ledgers[1])
+    owner_stream = owner.subscribe('k', source)
+    await owner_stream.__anext__()
+    follower_stream = follower.subscribe('k', source)
+    await follower_stream.__anext__()
+
+    await owner_stream.aclose()  # Kept running for the follower
+    await asyncio.sleep(0.05)
+    assert produced[-1] >= 2
+    await follower_stream.aclose()
+    await asyncio.sleep(0.1)
+    stopped_at = len(produced)
+    await asyncio.sleep(0.1)
+
+    assert len(produced) == stopped_at < 30
+    assert owner.runs == {}
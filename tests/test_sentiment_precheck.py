@@ -0,0 +1,78 @@
+"""
+Unit tests for the tier-0 local sentiment pre-check.
+"""
+
+import pytest
+
+from sentiment_precheck import LexiconSentimentScorer, LocalPrecheck
+
+POSITIVE = ("Exports surge as reforms boost growth. The successful programme was praised and welcomed "
+            "by industry, with strong gains and a robust recovery.")
+NEGATIVE = ("Crisis deepens as markets plunge. Fears of recession grow after layoffs, losses and "
+            "a collapse in demand; officials warned of turmoil.")
+NEUTRAL = ("The committee met on Tuesday to review the draft bill. Members discussed the schedule for "
+           "the next session and the procedure for submitting amendments, according to a statement "
+           "released by the parliamentary secretariat later in the day.")
+BALANCED = ("Exports rose and growth improved, but losses widened and a slowdown in demand drew concern; "
+            "officials expect support for recovery as risks persist.")
+
+
+@pytest.fixture
+def scorer():
+    return LexiconSentimentScorer()
+
+
+def test_batch_labels(scorer):
+    labels = [label for label, _ in scorer.score_batch([POSITIVE, NEGATIVE, NEUTRAL])]
+    assert labels == ['positive', 'negative', 'neutral']
+
+
+def test_negation_flips_polarity(scorer):
+    (label, _), = scorer.score_batch(["The talks did not succeed and did not improve ties: no progress, no peace."])
+    assert label == 'negative'
+
+
+def test_short_neutral_text_has_low_confidence(scorer):
+    (label, confidence), = scorer.score_batch(["Committee meets"])
+    assert label == 'neutral'
+    assert confidence < 0.2
+
+
+def test_neutral_needs_lexicon_evidence(scorer):
+    (label, confidence), = scorer.score_batch([NEUTRAL])
+    assert label == 'neutral'
+    assert confidence == 0.0  # Long, but not a single lexicon word
+
+    (label, confidence), = scorer.score_batch([BALANCED])
+    assert label == 'neutral'
+    assert confidence > 0.8
+
+
+def test_clear_headlines_are_confirmed_at_the_default_threshold(scorer):
+    precheck = LocalPrecheck()
+    scores = scorer.score_batch(["Plane crash kills dozens",
+                                 "Three killed in violence as protests turn deadly, war fears grow",
+                                 "Talks collapse"])
+
+    assert [label for label, _ in scores] == ['negative', 'negative', 'negative']
+    assert precheck.confirm(scores[0], {'sentiment': 'Negative'}) is not None
+    assert scores[1][1] > 0.95
+    # One polar word alone is not enough to skip the LLM
+    assert precheck.confirm(scores[2], {'sentiment': 'Negative'}) is None
+
+
+def test_confirm_requires_agreement_and_confidence():
+    precheck = LocalPrecheck(min_confidence=0.8)
+
+    confirmed = precheck.confirm(('negative', 0.9), {'sentiment': 'Negative', 'gist': 'g', 'tone': 't'})
+    assert confirmed['is_valid'] is True
+    assert confirmed['validated_by'] == 'local'
+
+    assert precheck.confirm(('negative', 0.9), {'sentiment': 'positive'}) is None
+    assert precheck.confirm(('negative', 0.7), {'sentiment': 'negative'}) is None
+
+
+def test_failed_analysis_is_never_confirmed():
+    precheck = LocalPrecheck(min_confidence=0.0)
+    failed = {'gist': 'Unable to analyze article', 'sentiment': 'neutral', 'tone': 'unknown', 'error': 'boom'}
+    assert precheck.confirm(('neutral', 1.0), failed) is None
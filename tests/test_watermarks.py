@@ -0,0 +1,56 @@
+"""
+Tests for per-topic high-water marks.
+"""
+
+import pytest
+
+from watermarks import WatermarkStore, advance, newer_than
+
+
+def article(url, published):
+    return {'url': url, 'publishedAt': published}
+
+
+def test_newer_than_keeps_later_articles_and_unseen_ties():
+    mark = ('2024-05-01T10:00:00Z', ['https://example.com/a'])
+    articles = [
+        article('https://example.com/b', '2024-05-01T11:00:00Z'),
+        article('https://example.com/a', '2024-05-01T10:00:00Z'),
+        article('https://example.com/c', '2024-05-01T10:00:00Z'),
+        article('https://example.com/d', '2024-05-01T09:00:00Z'),
+    ]
+
+    assert [a['url'] for a in newer_than(articles, mark)] == ['https://example.com/b', 'https://example.com/c']
+    assert newer_than(articles, None) == articles
+
+
+def test_advance_moves_forward_only():
+    mark = advance(None, [article('a', '2024-05-01T10:00:00Z'), article('b', '2024-05-01T09:00:00Z')])
+    assert mark == ('2024-05-01T10:00:00Z', ['a'])
+
+    assert advance(mark, [article('c', '2024-05-01T10:00:00Z')]) == ('2024-05-01T10:00:00Z', ['a', 'c'])
+    assert advance(mark, [article('old', '2024-04-30T10:00:00Z')]) == mark
+    assert advance(mark, []) == mark
+
+
+def test_advance_stops_short_of_articles_to_retry():
+    articles = [article('a', '2024-05-01T09:00:00Z'), article('b', '2024-05-01T10:00:00Z'),
+                article('c', '2024-05-01T10:00:00Z'), article('d', '2024-05-01T11:00:00Z')]
+
+    mark = advance(None, articles, retry=[articles[2]])
+
+    assert mark == ('2024-05-01T10:00:00Z', ['b'])
+    assert newer_than(articles, mark) == articles[2:]
+    assert advance(mark, articles[2:], retry=[article('x', '2024-04-30T10:00:00Z')]) == mark
+
+
+def test_marks_persist_across_connections(tmp_path):
+    path = str(tmp_path / 'watermarks.sqlite3')
+    store = WatermarkStore(path)
+    store.set('Business', ('2024-05-01T10:00:00Z', ['a']))
+    store.close()
+
+    reopened = WatermarkStore(path)
+    assert reopened.get('Business') == ('2024-05-01T10:00:00Z', ['a'])
+    assert reopened.get('Technology') is None
+    reopened.close()
@@ -0,0 +1,95 @@
+"""
+Per-topic high-water marks for incremental fetching.
+A mark is the newest publishedAt a topic has been processed up to, plus the
+URLs published at exactly that instant, persisted in SQLite across restarts.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATERMARK_PATH = os.path.join('cache', 'watermarks.sqlite3')
+
+
+def newer_than(articles: List[Dict[str, Any]], mark: Optional[Tuple[str, List[str]]]) -> List[Dict[str, Any]]:
+    """The articles published after `mark`, or at its instant under a URL the mark hasn't seen."""
+    if mark is None:
+        return articles
+    published_at, seen = mark
+    return [
+        article for article in articles
+        if article.get('publishedAt', '') > published_at
+        or (article.get('publishedAt', '') == published_at and article.get('url') not in seen)
+    ]
+
+
+def advance(mark: Optional[Tuple[str, List[str]]], articles: List[Dict[str, Any]],
+            retry: List[Dict[str, Any]] = ()) -> Optional[Tuple[str, List[str]]]:
+    """
+    The mark after processing `articles`; never moves backwards. Articles in
+    `retry` (failed ones, say) are left past the mark so the next incremental
+    fetch picks them up again, along with anything published after the oldest of them.
+    """
+    if retry:
+        oldest = min(article.get('publishedAt', '') for article in retry)
+        failed = {article.get('url') for article in retry}
+        articles = [article for article in articles
+                    if article.get('publishedAt', '') <= oldest and article.get('url') not in failed]
+    newest = max((article.get('publishedAt', '') for article in articles), default='')
+    if mark is not None and newest < mark[0]:
+        return mark
+    if not newest:
+        return mark
+    urls = [article['url'] for article in articles if article.get('publishedAt') == newest and article.get('url')]
+    if mark is not None and newest == mark[0]:
+        urls = sorted(set(mark[1]) | set(urls))
+    return newest, urls
+
+
+class WatermarkStore:
+    """SQLite table of one high-water mark per topic."""
+
+    def __init__(self, path: str = DEFAULT_WATERMARK_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA busy_timeout=5000')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS watermarks (
+                topic TEXT PRIMARY KEY,
+                published_at TEXT NOT NULL,
+                urls TEXT NOT NULL
+            )
+        ''')
+
+    def get(self, topic: str) -> Optional[Tuple[str, List[str]]]:
+        row = self.conn.execute('SELECT published_at, urls FROM watermarks WHERE topic = ?', (topic,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def set(self, topic: str, mark: Tuple[str, List[str]]) -> None:
+        published_at, urls = mark
+        self.conn.execute(
+            'INSERT OR REPLACE INTO watermarks (topic, published_at, urls) VALUES (?, ?, ?)',
+            (topic, published_at, json.dumps(urls))
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @classmethod
+    def from_env(cls) -> Optional['WatermarkStore']:
+        """Build the store from WATERMARK_PATH; an empty value disables incremental fetching."""
+        path = os.getenv('WATERMARK_PATH', DEFAULT_WATERMARK_PATH)
+        if not path:
+            return None
+        return cls(path)